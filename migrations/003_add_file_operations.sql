@@ -0,0 +1,19 @@
+-- Migration: Add file operation journal
+-- Date: 2026-10-19
+-- Description: Record every file move/copy/trash/delete made by organize and duplicate removal jobs
+-- so interrupted jobs can be resumed or rolled back
+
+CREATE TABLE IF NOT EXISTS file_operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    operation_type TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    destination_path TEXT,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create index on job_id for resume/rollback lookups
+CREATE INDEX IF NOT EXISTS ix_file_operations_job_id ON file_operations(job_id);
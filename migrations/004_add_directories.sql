@@ -0,0 +1,113 @@
+-- Migration: Normalize file paths into a directories table
+-- Date: 2026-10-19
+-- Description: Replace photos.full_file_path and faces.full_file_path with directory_id + filename
+-- so moving or renaming a folder updates a single directories row
+
+-- Splitting a path uses the rtrim trick: rtrim(path, <every non-separator character of path>)
+-- strips the trailing file name and leaves the directory with its trailing separator.
+-- Both '/' and '\' are treated as separators so Windows databases migrate too.
+-- Directories are stored the way os.path.split returns them: without trailing separators,
+-- except for a root, '/' or a drive root such as 'C:\', which keeps its separator.
+
+PRAGMA foreign_keys = OFF;
+BEGIN TRANSACTION;
+
+CREATE TABLE IF NOT EXISTS directories (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL
+);
+
+CREATE TEMP TABLE split_paths AS
+SELECT full_file_path,
+       directory_with_separator,
+       CASE
+           WHEN length(trimmed) = 0 THEN substr(directory_with_separator, 1, 1)
+           WHEN length(trimmed) = 2 AND substr(trimmed, 2, 1) = ':' THEN substr(directory_with_separator, 1, 3)
+           ELSE trimmed
+       END AS directory
+FROM (
+    SELECT full_file_path,
+           directory_with_separator,
+           rtrim(directory_with_separator, '/\') AS trimmed
+    FROM (
+        SELECT full_file_path,
+               rtrim(full_file_path, replace(replace(full_file_path, '/', ''), '\', '')) AS directory_with_separator
+        FROM (SELECT full_file_path FROM photos UNION SELECT full_file_path FROM faces)
+        WHERE full_file_path IS NOT NULL
+    )
+);
+
+INSERT OR IGNORE INTO directories (path)
+SELECT DISTINCT directory FROM split_paths;
+
+-- Photos
+CREATE TABLE photos_new (
+    id INTEGER PRIMARY KEY,
+    directory_id INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    date_taken TEXT,
+    year INTEGER,
+    month INTEGER,
+    status TEXT DEFAULT 'IMPORTED',
+    latitude REAL,
+    longitude REAL,
+    location_name TEXT,
+    CONSTRAINT uq_photos_directory_filename UNIQUE (directory_id, filename),
+    FOREIGN KEY(directory_id) REFERENCES directories(id)
+);
+
+INSERT INTO photos_new (id, directory_id, filename, date_taken, year, month, status, latitude, longitude, location_name)
+SELECT p.id,
+       d.id,
+       substr(p.full_file_path, length(s.directory_with_separator) + 1),
+       p.date_taken, p.year, p.month, p.status, p.latitude, p.longitude, p.location_name
+FROM photos p
+JOIN split_paths s ON s.full_file_path = p.full_file_path
+JOIN directories d ON d.path = s.directory;
+
+DROP TABLE photos;
+ALTER TABLE photos_new RENAME TO photos;
+CREATE INDEX IF NOT EXISTS ix_photos_directory_id ON photos(directory_id);
+CREATE INDEX IF NOT EXISTS idx_photos_date_taken ON photos(date_taken);
+CREATE INDEX IF NOT EXISTS idx_photos_location_name ON photos(location_name);
+
+-- Faces
+CREATE TABLE faces_new (
+    id INTEGER PRIMARY KEY,
+    embedding BLOB,
+    directory_id INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    photo_id INTEGER,
+    status TEXT,
+    location_top INTEGER,
+    location_bottom INTEGER,
+    location_left INTEGER,
+    location_right INTEGER,
+    CONSTRAINT uq_faces_directory_filename UNIQUE (directory_id, filename),
+    FOREIGN KEY(photo_id) REFERENCES photos(id) ON DELETE CASCADE,
+    FOREIGN KEY(directory_id) REFERENCES directories(id)
+);
+
+INSERT INTO faces_new (id, embedding, directory_id, filename, photo_id, status,
+                       location_top, location_bottom, location_left, location_right)
+SELECT f.id,
+       f.embedding,
+       d.id,
+       substr(f.full_file_path, length(s.directory_with_separator) + 1),
+       f.photo_id, f.status, f.location_top, f.location_bottom, f.location_left, f.location_right
+FROM faces f
+JOIN split_paths s ON s.full_file_path = f.full_file_path
+JOIN directories d ON d.path = s.directory;
+
+DROP TABLE faces;
+ALTER TABLE faces_new RENAME TO faces;
+CREATE INDEX IF NOT EXISTS ix_faces_directory_id ON faces(directory_id);
+CREATE INDEX IF NOT EXISTS idx_face_photo_id ON faces(photo_id);
+CREATE INDEX IF NOT EXISTS idx_face_status ON faces(status);
+
+DROP TABLE split_paths;
+
+COMMIT;
+PRAGMA foreign_keys = ON;
+
+-- Note: rows with a NULL full_file_path are dropped, they could not be opened anyway
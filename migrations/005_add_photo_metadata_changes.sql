@@ -0,0 +1,29 @@
+-- Migration: Add photo metadata change set
+-- Date: 2026-10-19
+-- Description: Track photos whose location or people changed since their file metadata was synced,
+-- so the Sync Metadata page no longer has to scan every photo
+
+CREATE TABLE IF NOT EXISTS photo_metadata_changes (
+    photo_id INTEGER PRIMARY KEY,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(photo_id) REFERENCES photos(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_photo_metadata_changes_changed_at ON photo_metadata_changes(changed_at);
+
+-- Seed with the photos the Sync Metadata page used to list: indexed, not yet synced,
+-- and carrying a location or at least one named person
+INSERT OR IGNORE INTO photo_metadata_changes (photo_id)
+SELECT p.id
+FROM photos p
+WHERE p.status = 'INDEXED'
+  AND (
+      p.location_name IS NOT NULL
+      OR EXISTS (
+          SELECT 1
+          FROM faces f
+          JOIN people_face pf ON pf.face_id = f.id
+          JOIN people pe ON pe.id = pf.person_id
+          WHERE f.photo_id = p.id AND pe.name IS NOT NULL AND pe.name != ''
+      )
+  );
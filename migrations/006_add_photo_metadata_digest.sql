@@ -0,0 +1,7 @@
+-- Migration: Add written metadata digest to photos
+-- Date: 2026-10-19
+-- Description: Remember what metadata sync last wrote to each file and the file's size:mtime afterwards,
+-- so syncing a photo whose metadata and file are both unchanged skips the rewrite
+
+ALTER TABLE photos ADD COLUMN metadata_digest TEXT;
+ALTER TABLE photos ADD COLUMN file_fingerprint TEXT;
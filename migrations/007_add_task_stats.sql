@@ -0,0 +1,11 @@
+-- Migration: Add task stats
+-- Date: 2026-10-19
+-- Description: Keep a moving average of the per-item cost of each job type, so fan-out routes
+-- size batches to a target duration instead of a fixed item count
+
+CREATE TABLE IF NOT EXISTS task_stats (
+    task_name TEXT PRIMARY KEY,
+    seconds_per_item REAL NOT NULL,
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
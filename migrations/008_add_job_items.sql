@@ -0,0 +1,15 @@
+-- Migration: Add job items
+-- Date: 2026-10-19
+-- Description: Store the inputs of batched jobs (import, index, sync metadata, auto-assign) one row each,
+-- with per-item status, error and timing, instead of as JSON lists in jobs.job_data
+
+CREATE TABLE IF NOT EXISTS job_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    error TEXT,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_job_items_job_id_status ON job_items(job_id, status);
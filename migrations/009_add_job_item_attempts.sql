@@ -0,0 +1,6 @@
+-- Migration: Add job item attempts
+-- Date: 2026-10-19
+-- Description: Count how often each job item was picked up by a batch, so resuming a job after a worker crash
+-- gives up on items that were being processed every time it went down
+
+ALTER TABLE job_items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
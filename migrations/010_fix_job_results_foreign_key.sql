@@ -0,0 +1,28 @@
+-- Migration: Fix the job_results foreign key
+-- Date: 2026-10-19
+-- Description: job_results referenced a table named job instead of jobs. Harmless while foreign keys were off,
+-- but every insert fails once connections enable them, so rebuild the table with the right reference
+
+PRAGMA foreign_keys = OFF;
+BEGIN TRANSACTION;
+
+CREATE TABLE job_results_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    huey_task_id TEXT NOT NULL,
+    result_data TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE
+);
+
+-- Results of jobs that were already deleted are dropped, the new foreign key would reject them
+INSERT INTO job_results_new (id, job_id, huey_task_id, result_data, created_at)
+SELECT r.id, r.job_id, r.huey_task_id, r.result_data, r.created_at
+FROM job_results r
+WHERE r.job_id IN (SELECT id FROM jobs);
+
+DROP TABLE job_results;
+ALTER TABLE job_results_new RENAME TO job_results;
+
+COMMIT;
+PRAGMA foreign_keys = ON;
@@ -0,0 +1,22 @@
+-- Migration: Add query indexes
+-- Date: 2026-10-19
+-- Description: Composite indexes matching the gallery, faces, people and locations queries, replacing
+-- the single-column indexes they start with. tests/yaffo/db/test_query_plans.py checks the routes use them
+
+-- Gallery and faces year/month filters, newest first within a month
+CREATE INDEX IF NOT EXISTS ix_photos_year_month_date_taken ON photos(year, month, date_taken);
+
+-- Proximity search and the locations map, only photos with GPS coordinates are worth indexing
+CREATE INDEX IF NOT EXISTS ix_photos_latitude_longitude ON photos(latitude, longitude) WHERE latitude IS NOT NULL;
+
+-- Covers the gallery's tag filter and the tag name and value pickers without reading rows
+CREATE INDEX IF NOT EXISTS ix_tags_tag_name_tag_value ON tags(tag_name, tag_value, photo_id);
+DROP INDEX IF EXISTS idx_tags_tag_name;
+
+-- A person's faces in similarity order
+CREATE INDEX IF NOT EXISTS ix_people_face_person_id_similarity ON people_face(person_id, similarity);
+DROP INDEX IF EXISTS idx_people_face_person_id;
+
+-- Unassigned faces, joined to their photos for the date order
+CREATE INDEX IF NOT EXISTS ix_faces_status_photo_id ON faces(status, photo_id);
+DROP INDEX IF EXISTS idx_face_status;
@@ -0,0 +1,7 @@
+-- Migration: Add person faces keyset index
+-- Date: 2026-10-19
+-- Description: The person faces page now pages on (similarity, face_id) instead of OFFSET. Adding face_id to the
+-- person/similarity index lets each page seek straight to its first face and read the rest in order
+
+CREATE INDEX IF NOT EXISTS ix_people_face_person_id_similarity_face_id ON people_face(person_id, similarity, face_id);
+DROP INDEX IF EXISTS ix_people_face_person_id_similarity;
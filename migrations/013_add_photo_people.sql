@@ -0,0 +1,63 @@
+-- Migration: Add photo people
+-- Date: 2026-10-19
+-- Description: Adds photo_people, one row per person per photo with how many of the photo's faces are theirs.
+-- Triggers on people_face and faces keep it in sync, so the gallery's people filters and the people list counts
+-- read it directly instead of joining people_face to faces for every photo
+
+CREATE TABLE IF NOT EXISTS photo_people (
+    person_id INTEGER NOT NULL,
+    photo_id INTEGER NOT NULL,
+    face_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (person_id, photo_id),
+    FOREIGN KEY(person_id) REFERENCES people(id) ON DELETE CASCADE,
+    FOREIGN KEY(photo_id) REFERENCES photos(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS ix_photo_people_photo_id_person_id ON photo_people(photo_id, person_id);
+
+CREATE TRIGGER IF NOT EXISTS tr_people_face_insert_photo_people AFTER INSERT ON people_face
+BEGIN
+    INSERT INTO photo_people (person_id, photo_id, face_count)
+    SELECT NEW.person_id, faces.photo_id, 1 FROM faces
+    WHERE faces.id = NEW.face_id AND faces.photo_id IS NOT NULL AND NEW.person_id IS NOT NULL
+    ON CONFLICT (person_id, photo_id) DO UPDATE SET face_count = face_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_people_face_delete_photo_people AFTER DELETE ON people_face
+BEGIN
+    UPDATE photo_people SET face_count = face_count - 1
+    WHERE person_id = OLD.person_id AND photo_id = (SELECT photo_id FROM faces WHERE id = OLD.face_id);
+    DELETE FROM photo_people
+    WHERE person_id = OLD.person_id AND photo_id = (SELECT photo_id FROM faces WHERE id = OLD.face_id)
+        AND face_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_people_face_update_photo_people AFTER UPDATE OF person_id, face_id ON people_face
+BEGIN
+    UPDATE photo_people SET face_count = face_count - 1
+    WHERE person_id = OLD.person_id AND photo_id = (SELECT photo_id FROM faces WHERE id = OLD.face_id);
+    DELETE FROM photo_people
+    WHERE person_id = OLD.person_id AND photo_id = (SELECT photo_id FROM faces WHERE id = OLD.face_id)
+        AND face_count <= 0;
+    INSERT INTO photo_people (person_id, photo_id, face_count)
+    SELECT NEW.person_id, faces.photo_id, 1 FROM faces
+    WHERE faces.id = NEW.face_id AND faces.photo_id IS NOT NULL AND NEW.person_id IS NOT NULL
+    ON CONFLICT (person_id, photo_id) DO UPDATE SET face_count = face_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_faces_delete_photo_people BEFORE DELETE ON faces
+BEGIN
+    UPDATE photo_people SET face_count = face_count - 1
+    WHERE photo_id = OLD.photo_id AND person_id = (SELECT person_id FROM people_face WHERE face_id = OLD.id);
+    DELETE FROM photo_people
+    WHERE photo_id = OLD.photo_id AND person_id = (SELECT person_id FROM people_face WHERE face_id = OLD.id)
+        AND face_count <= 0;
+END;
+
+-- Backfill from the faces already assigned
+INSERT OR IGNORE INTO photo_people (person_id, photo_id, face_count)
+SELECT people_face.person_id, faces.photo_id, COUNT(*)
+FROM people_face
+JOIN faces ON faces.id = people_face.face_id
+WHERE people_face.person_id IS NOT NULL AND faces.photo_id IS NOT NULL
+GROUP BY people_face.person_id, faces.photo_id;
@@ -0,0 +1,170 @@
+-- Migration: Add facet counts
+-- Date: 2026-10-19
+-- Description: Adds facet_counts, how many photos have each tag value (by tag name), year, location and person,
+-- and data_versions, whose 'facets' counter is bumped on every change to them or to people's names. Triggers keep
+-- both current as photos are indexed, so the gallery filters are read from a cache instead of DISTINCT queries over
+-- tags and photos on every page load
+
+CREATE TABLE IF NOT EXISTS facet_counts (
+    facet TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    value TEXT NOT NULL,
+    photo_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (facet, name, value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Tags
+CREATE TRIGGER IF NOT EXISTS tr_tags_insert_facets AFTER INSERT ON tags
+BEGIN
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT 'tag', NEW.tag_name, CAST(COALESCE(NEW.tag_value, '') AS TEXT), 1 WHERE NEW.tag_name IS NOT NULL
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_tags_delete_facets AFTER DELETE ON tags
+BEGIN
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = 'tag' AND name = OLD.tag_name AND value = CAST(COALESCE(OLD.tag_value, '') AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = 'tag' AND name = OLD.tag_name AND value = CAST(COALESCE(OLD.tag_value, '') AS TEXT)
+        AND photo_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_tags_update_facets AFTER UPDATE OF tag_name, tag_value ON tags
+BEGIN
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = 'tag' AND name = OLD.tag_name AND value = CAST(COALESCE(OLD.tag_value, '') AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = 'tag' AND name = OLD.tag_name AND value = CAST(COALESCE(OLD.tag_value, '') AS TEXT)
+        AND photo_count <= 0;
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT 'tag', NEW.tag_name, CAST(COALESCE(NEW.tag_value, '') AS TEXT), 1 WHERE NEW.tag_name IS NOT NULL
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+END;
+
+-- Photo years and locations
+CREATE TRIGGER IF NOT EXISTS tr_photos_insert_facets AFTER INSERT ON photos
+BEGIN
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT 'year', '', CAST(NEW.year AS TEXT), 1 WHERE NEW.year IS NOT NULL
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT 'location', '', CAST(NEW.location_name AS TEXT), 1 WHERE NEW.location_name <> ''
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_delete_facets AFTER DELETE ON photos
+BEGIN
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = 'year' AND name = '' AND value = CAST(OLD.year AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = 'year' AND name = '' AND value = CAST(OLD.year AS TEXT) AND photo_count <= 0;
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = 'location' AND name = '' AND value = CAST(OLD.location_name AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = 'location' AND name = '' AND value = CAST(OLD.location_name AS TEXT) AND photo_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_update_year_facets AFTER UPDATE OF year ON photos
+WHEN OLD.year IS NOT NEW.year
+BEGIN
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = 'year' AND name = '' AND value = CAST(OLD.year AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = 'year' AND name = '' AND value = CAST(OLD.year AS TEXT) AND photo_count <= 0;
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT 'year', '', CAST(NEW.year AS TEXT), 1 WHERE NEW.year IS NOT NULL
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_update_location_facets AFTER UPDATE OF location_name ON photos
+WHEN OLD.location_name IS NOT NEW.location_name
+BEGIN
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = 'location' AND name = '' AND value = CAST(OLD.location_name AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = 'location' AND name = '' AND value = CAST(OLD.location_name AS TEXT) AND photo_count <= 0;
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT 'location', '', CAST(NEW.location_name AS TEXT), 1 WHERE NEW.location_name <> ''
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+END;
+
+-- People, one photo_people row per person per photo
+CREATE TRIGGER IF NOT EXISTS tr_photo_people_insert_facets AFTER INSERT ON photo_people
+BEGIN
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT 'person', '', CAST(NEW.person_id AS TEXT), 1 WHERE 1
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photo_people_delete_facets AFTER DELETE ON photo_people
+BEGIN
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = 'person' AND name = '' AND value = CAST(OLD.person_id AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = 'person' AND name = '' AND value = CAST(OLD.person_id AS TEXT) AND photo_count <= 0;
+END;
+
+-- Backfill before the version triggers exist, the version starts at 1 below
+INSERT OR IGNORE INTO facet_counts (facet, name, value, photo_count)
+SELECT 'tag', tag_name, COALESCE(tag_value, ''), COUNT(*) FROM tags
+WHERE tag_name IS NOT NULL
+GROUP BY tag_name, COALESCE(tag_value, '');
+
+INSERT OR IGNORE INTO facet_counts (facet, name, value, photo_count)
+SELECT 'year', '', CAST(year AS TEXT), COUNT(*) FROM photos
+WHERE year IS NOT NULL
+GROUP BY year;
+
+INSERT OR IGNORE INTO facet_counts (facet, name, value, photo_count)
+SELECT 'location', '', location_name, COUNT(*) FROM photos
+WHERE location_name <> ''
+GROUP BY location_name;
+
+INSERT OR IGNORE INTO facet_counts (facet, name, value, photo_count)
+SELECT 'person', '', CAST(person_id AS TEXT), COUNT(*) FROM photo_people
+GROUP BY person_id;
+
+INSERT OR IGNORE INTO data_versions (name, version) VALUES ('facets', 1);
+
+-- Every change to the counts, and to the people names shown beside them, invalidates the cached facets
+CREATE TRIGGER IF NOT EXISTS tr_facet_counts_insert_facets_version AFTER INSERT ON facet_counts
+BEGIN
+    INSERT INTO data_versions (name, version) VALUES ('facets', 1)
+    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_facet_counts_update_facets_version AFTER UPDATE ON facet_counts
+BEGIN
+    INSERT INTO data_versions (name, version) VALUES ('facets', 1)
+    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_facet_counts_delete_facets_version AFTER DELETE ON facet_counts
+BEGIN
+    INSERT INTO data_versions (name, version) VALUES ('facets', 1)
+    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_people_insert_facets_version AFTER INSERT ON people
+BEGIN
+    INSERT INTO data_versions (name, version) VALUES ('facets', 1)
+    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_people_update_facets_version AFTER UPDATE OF name ON people
+BEGIN
+    INSERT INTO data_versions (name, version) VALUES ('facets', 1)
+    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_people_delete_facets_version AFTER DELETE ON people
+BEGIN
+    INSERT INTO data_versions (name, version) VALUES ('facets', 1)
+    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
@@ -0,0 +1,32 @@
+-- Migration: Add photo locations
+-- Date: 2026-10-19
+-- Description: Adds photo_locations, an R*Tree virtual table holding each geotagged photo as a point (min = max).
+-- Triggers on photos keep it in sync with latitude/longitude. Proximity search reads its candidates from the tree and
+-- keeps those within the true radius, and the locations map queries it by viewport
+
+CREATE VIRTUAL TABLE IF NOT EXISTS photo_locations USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_insert_photo_locations AFTER INSERT ON photos
+BEGIN
+    INSERT OR REPLACE INTO photo_locations (id, min_lat, max_lat, min_lon, max_lon)
+    SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+    WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_update_photo_locations AFTER UPDATE OF latitude, longitude ON photos
+BEGIN
+    DELETE FROM photo_locations WHERE id = OLD.id;
+    INSERT OR REPLACE INTO photo_locations (id, min_lat, max_lat, min_lon, max_lon)
+    SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+    WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_delete_photo_locations AFTER DELETE ON photos
+BEGIN
+    DELETE FROM photo_locations WHERE id = OLD.id;
+END;
+
+-- Backfill the photos already geotagged
+INSERT OR REPLACE INTO photo_locations (id, min_lat, max_lat, min_lon, max_lon)
+SELECT id, latitude, latitude, longitude, longitude FROM photos
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
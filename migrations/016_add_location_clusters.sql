@@ -0,0 +1,121 @@
+-- Migration: Add location clusters
+-- Date: 2026-10-19
+-- Description: Adds location_clusters, one row per occupied cell of the locations map grid at each zoom level in
+-- cluster_zoom_levels (0-12). A cell is 90 / 2^zoom degrees square, about 64 pixels at that zoom, and holds its photo
+-- count, unnamed photo count, coordinate sums for the centroid and a representative photo. Triggers on photos keep
+-- it up to date, so /api/locations/clusters reads the cells on screen instead of every geotagged photo
+
+CREATE TABLE IF NOT EXISTS cluster_zoom_levels (zoom INTEGER PRIMARY KEY);
+INSERT OR IGNORE INTO cluster_zoom_levels (zoom) VALUES (0), (1), (2), (3), (4), (5), (6), (7), (8), (9), (10), (11), (12);
+
+CREATE TABLE IF NOT EXISTS location_clusters (
+    zoom INTEGER NOT NULL,
+    cell_x INTEGER NOT NULL,
+    cell_y INTEGER NOT NULL,
+    photo_count INTEGER NOT NULL DEFAULT 0,
+    unnamed_count INTEGER NOT NULL DEFAULT 0,
+    lat_sum REAL NOT NULL DEFAULT 0,
+    lon_sum REAL NOT NULL DEFAULT 0,
+    photo_id INTEGER,
+    PRIMARY KEY (zoom, cell_x, cell_y)
+) WITHOUT ROWID;
+
+-- Backfill every zoom level from the photos already geotagged
+INSERT OR IGNORE INTO location_clusters (zoom, cell_x, cell_y, photo_count, unnamed_count, lat_sum, lon_sum, photo_id)
+SELECT
+    zoom,
+    CAST((longitude + 180) * (1 << zoom) / 90.0 AS INTEGER) AS cell_x,
+    CAST((latitude + 90) * (1 << zoom) / 90.0 AS INTEGER) AS cell_y,
+    COUNT(*),
+    SUM(COALESCE(location_name, '') = ''),
+    SUM(latitude),
+    SUM(longitude),
+    MIN(photos.id)
+FROM photos CROSS JOIN cluster_zoom_levels
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+GROUP BY zoom, cell_x, cell_y;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_insert_location_clusters AFTER INSERT ON photos
+BEGIN
+    INSERT INTO location_clusters (zoom, cell_x, cell_y, photo_count, unnamed_count, lat_sum, lon_sum, photo_id)
+    SELECT zoom, CAST((NEW.longitude + 180) * (1 << zoom) / 90.0 AS INTEGER),
+        CAST((NEW.latitude + 90) * (1 << zoom) / 90.0 AS INTEGER), 1,
+        COALESCE(NEW.location_name, '') = '', NEW.latitude, NEW.longitude, NEW.id
+    FROM cluster_zoom_levels WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+    ON CONFLICT (zoom, cell_x, cell_y) DO UPDATE SET
+        photo_count = photo_count + 1,
+        unnamed_count = unnamed_count + excluded.unnamed_count,
+        lat_sum = lat_sum + excluded.lat_sum,
+        lon_sum = lon_sum + excluded.lon_sum;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_delete_location_clusters AFTER DELETE ON photos
+BEGIN
+    UPDATE location_clusters SET
+        photo_count = photo_count - 1,
+        unnamed_count = unnamed_count - (COALESCE(OLD.location_name, '') = ''),
+        lat_sum = lat_sum - OLD.latitude,
+        lon_sum = lon_sum - OLD.longitude,
+        photo_id = CASE WHEN photo_id IS NOT OLD.id THEN photo_id ELSE (
+            SELECT photos.id FROM photos
+            WHERE photos.latitude IS NOT NULL AND photos.id <> OLD.id
+                AND photos.latitude >= location_clusters.cell_y * 90.0 / (1 << location_clusters.zoom) - 90
+                AND photos.latitude < (location_clusters.cell_y + 1) * 90.0 / (1 << location_clusters.zoom) - 90
+                AND CAST((photos.longitude + 180) * (1 << location_clusters.zoom) / 90.0 AS INTEGER) = location_clusters.cell_x
+                AND CAST((photos.latitude + 90) * (1 << location_clusters.zoom) / 90.0 AS INTEGER) = location_clusters.cell_y
+            LIMIT 1
+        ) END
+    WHERE (zoom, cell_x, cell_y) IN (
+        SELECT zoom, CAST((OLD.longitude + 180) * (1 << zoom) / 90.0 AS INTEGER),
+            CAST((OLD.latitude + 90) * (1 << zoom) / 90.0 AS INTEGER)
+        FROM cluster_zoom_levels
+    );
+    DELETE FROM location_clusters
+    WHERE (zoom, cell_x, cell_y) IN (
+        SELECT zoom, CAST((OLD.longitude + 180) * (1 << zoom) / 90.0 AS INTEGER),
+            CAST((OLD.latitude + 90) * (1 << zoom) / 90.0 AS INTEGER)
+        FROM cluster_zoom_levels
+    ) AND photo_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_photos_update_location_clusters
+AFTER UPDATE OF latitude, longitude, location_name ON photos
+WHEN OLD.latitude IS NOT NEW.latitude OR OLD.longitude IS NOT NEW.longitude
+    OR (COALESCE(OLD.location_name, '') = '') <> (COALESCE(NEW.location_name, '') = '')
+BEGIN
+    UPDATE location_clusters SET
+        photo_count = photo_count - 1,
+        unnamed_count = unnamed_count - (COALESCE(OLD.location_name, '') = ''),
+        lat_sum = lat_sum - OLD.latitude,
+        lon_sum = lon_sum - OLD.longitude,
+        photo_id = CASE WHEN photo_id IS NOT OLD.id THEN photo_id ELSE (
+            SELECT photos.id FROM photos
+            WHERE photos.latitude IS NOT NULL AND photos.id <> OLD.id
+                AND photos.latitude >= location_clusters.cell_y * 90.0 / (1 << location_clusters.zoom) - 90
+                AND photos.latitude < (location_clusters.cell_y + 1) * 90.0 / (1 << location_clusters.zoom) - 90
+                AND CAST((photos.longitude + 180) * (1 << location_clusters.zoom) / 90.0 AS INTEGER) = location_clusters.cell_x
+                AND CAST((photos.latitude + 90) * (1 << location_clusters.zoom) / 90.0 AS INTEGER) = location_clusters.cell_y
+            LIMIT 1
+        ) END
+    WHERE (zoom, cell_x, cell_y) IN (
+        SELECT zoom, CAST((OLD.longitude + 180) * (1 << zoom) / 90.0 AS INTEGER),
+            CAST((OLD.latitude + 90) * (1 << zoom) / 90.0 AS INTEGER)
+        FROM cluster_zoom_levels
+    );
+    DELETE FROM location_clusters
+    WHERE (zoom, cell_x, cell_y) IN (
+        SELECT zoom, CAST((OLD.longitude + 180) * (1 << zoom) / 90.0 AS INTEGER),
+            CAST((OLD.latitude + 90) * (1 << zoom) / 90.0 AS INTEGER)
+        FROM cluster_zoom_levels
+    ) AND photo_count <= 0;
+    INSERT INTO location_clusters (zoom, cell_x, cell_y, photo_count, unnamed_count, lat_sum, lon_sum, photo_id)
+    SELECT zoom, CAST((NEW.longitude + 180) * (1 << zoom) / 90.0 AS INTEGER),
+        CAST((NEW.latitude + 90) * (1 << zoom) / 90.0 AS INTEGER), 1,
+        COALESCE(NEW.location_name, '') = '', NEW.latitude, NEW.longitude, NEW.id
+    FROM cluster_zoom_levels WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+    ON CONFLICT (zoom, cell_x, cell_y) DO UPDATE SET
+        photo_count = photo_count + 1,
+        unnamed_count = unnamed_count + excluded.unnamed_count,
+        lat_sum = lat_sum + excluded.lat_sum,
+        lon_sum = lon_sum + excluded.lon_sum;
+END;
@@ -41,23 +41,50 @@ def start_app(c, host="127.0.0.1", port=5000, debug=True):
 
 
 @task
-def start_tasks(c, workers=4, worker_type="process"):
+def start_tasks(c, io_workers=4, cpu_workers=4, worker_type="process", queue="all", preload=True):
     """
-    Start the Huey task consumer for background job processing.
+    Start the Huey task consumers for background job processing.
+
+    CPU-heavy tasks (face indexing, duplicate hashing) and IO/DB-light tasks (import,
+    sync, organize, auto-assign) have separate queues, each drained by its own pool.
+    Batched jobs left unfinished by the previous consumers are resumed before starting.
+    Workers warm up (face models, image plugins, exiftool) before taking tasks.
 
     Args:
-        workers: Number of worker processes/threads (default: 8)
+        io_workers: Number of workers for the IO queue (default: 4)
+        cpu_workers: Number of workers for the CPU queue (default: 4)
         worker_type: Worker type - 'process' or 'thread' (default: process)
+        queue: Which pool to start - 'io', 'cpu' or 'all' (default: all)
+        preload: Load the face models in the cpu consumer before it forks its workers,
+            so they share one copy (default: True)
 
     Example:
         inv start-tasks
-        inv start-tasks --workers=4 --worker-type=thread
+        inv start-tasks --io-workers=2 --cpu-workers=8
+        inv start-tasks --queue=cpu --cpu-workers=6 --worker-type=thread
     """
-    print(f"Starting Huey consumer with {workers} {worker_type} workers")
-    c.run(
-        f"huey_consumer.py yaffo.background_tasks.main.huey -w {workers} -k {worker_type}",
-        pty=True
-    )
+    consumers = {
+        "io": f"huey_consumer.py yaffo.background_tasks.main.huey -w {io_workers} -k {worker_type}",
+        "cpu": f"huey_consumer.py yaffo.background_tasks.main.cpu_huey -w {cpu_workers} -k {worker_type}",
+    }
+    # Consumer environment per queue, merged into the inherited one
+    consumer_env = {"io": {}, "cpu": {"YAFFO_PRELOAD_MODELS": "1"} if preload else {}}
+    if queue not in consumers and queue != "all":
+        print(f"Error: unknown queue '{queue}', expected one of: io, cpu, all")
+        return
+
+    c.run(f"python -m yaffo.scripts.resume_jobs --queue={queue}")
+    if queue != "all":
+        print(f"Starting Huey {queue} consumer")
+        c.run(consumers[queue], pty=True, env=consumer_env[queue])
+        return
+
+    print(f"Starting Huey consumers: {io_workers} io and {cpu_workers} cpu {worker_type} workers")
+    cpu_consumer = c.run(consumers["cpu"], asynchronous=True, env=consumer_env["cpu"])
+    try:
+        c.run(consumers["io"], pty=True, env=consumer_env["io"])
+    finally:
+        cpu_consumer.runner.kill()
 
 
 @task
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from yaffo.db.models import Job, JOB_STATUS_CANCELLED, JOB_STATUS_COMPLETED, JOB_STATUS_PENDING, JOB_STATUS_RUNNING
+from yaffo.background_tasks import utils
+from yaffo.background_tasks.utils import complete_job_if_finished, record_job_progress, is_job_cancelled, \
+    signal_job_cancelled, clear_job_signal, record_task_timing, batch_size_for
+
+
+def _job(session, task_count: int, status: str = JOB_STATUS_PENDING) -> Job:
+    job = Job(id="job", name="test", status=status, task_count=task_count,
+              completed_count=0, error_count=0, cancelled_count=0)
+    session.add(job)
+    session.commit()
+    return job
+
+
+def test_only_the_last_batch_completes_the_job(session):
+    _job(session, task_count=5)
+
+    assert record_job_progress(session, "job", completed=2, status=JOB_STATUS_RUNNING) is False
+    assert record_job_progress(session, "job", completed=1, errors=1) is False
+    assert record_job_progress(session, "job", cancelled=1) is True
+    session.commit()
+
+    job = session.get(Job, "job")
+    assert job.status == JOB_STATUS_COMPLETED
+    assert job.completed_at is not None
+    assert (job.completed_count, job.error_count, job.cancelled_count) == (3, 1, 1)
+
+
+def test_completion_happens_once(session):
+    _job(session, task_count=1)
+
+    assert record_job_progress(session, "job", completed=1) is True
+    assert complete_job_if_finished(session, "job") is False
+
+
+def test_cancelled_job_is_not_completed(session):
+    _job(session, task_count=1, status=JOB_STATUS_CANCELLED)
+
+    assert record_job_progress(session, "job", completed=1) is False
+    session.commit()
+    assert session.get(Job, "job").status == JOB_STATUS_CANCELLED
+
+
+def test_empty_job_completes_immediately(session):
+    _job(session, task_count=0)
+    assert complete_job_if_finished(session, "job") is True
+
+
+class TestCancelSignal:
+    @pytest.fixture(autouse=True)
+    def signals_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(utils, "JOB_SIGNALS_DIR", tmp_path / "job_signals")
+        monkeypatch.setattr(utils, "JOB_SIGNAL_TTL_SECONDS", 0.05)
+
+    def test_signal_is_seen_after_the_cache_expires(self):
+        assert is_job_cancelled("job") is False
+        signal_job_cancelled("job")
+        assert is_job_cancelled("job") is False
+
+        time.sleep(0.06)
+        assert is_job_cancelled("job") is True
+
+    def test_clear_takes_effect_immediately(self):
+        signal_job_cancelled("job")
+        assert is_job_cancelled("job") is True
+
+        clear_job_signal("job")
+        assert is_job_cancelled("job") is False
+
+
+def test_batch_size_follows_the_measured_cost_per_item(session):
+    assert batch_size_for(session, "index_photos", 10_000, default=10) == 10
+
+    record_task_timing(session, "index_photos", 10, 30.0)
+    record_task_timing(session, "index_photos", 10, 10.0)
+    session.commit()
+    # Evenly averaged over the first batches: 2s per item
+    assert batch_size_for(session, "index_photos", 10_000, default=10) == int(utils.TARGET_BATCH_SECONDS / 2.0)
+
+    record_task_timing(session, "sync_metadata", 1000, 0.001)
+    assert batch_size_for(session, "sync_metadata", 100_000, default=250) == utils.MAX_BATCH_SIZE
+    # Small jobs are still spread over several batches
+    assert batch_size_for(session, "sync_metadata", 80, default=250) == 80 // utils.MIN_BATCH_COUNT
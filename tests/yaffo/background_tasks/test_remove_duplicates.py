@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from yaffo.background_tasks import utils
+from yaffo.background_tasks.tasks import remove_duplicates
+from yaffo.db.models import Job, JOB_STATUS_COMPLETED, JOB_STATUS_RUNNING
+from yaffo.utils.file_operations import FILE_OPERATION_DELETE, journal_file_operations
+
+
+@pytest.fixture
+def task_sessions(session, tmp_path, monkeypatch):
+    """Point the task and the job helpers at the test database."""
+    factory = scoped_session(sessionmaker(bind=session.get_bind()))
+    monkeypatch.setattr(utils, "SessionFactory", factory)
+    monkeypatch.setattr(remove_duplicates, "SessionFactory", factory)
+    monkeypatch.setattr(utils, "JOB_SIGNALS_DIR", tmp_path / "job_signals")
+
+
+def test_resumed_job_adds_to_the_counts_of_earlier_runs(session, task_sessions, tmp_path):
+    files = []
+    for name in ("a.jpg", "b.jpg"):
+        files.append(tmp_path / name)
+        files[-1].write_text("duplicate")
+    session.add(Job(id="job", name="remove_duplicates", status=JOB_STATUS_RUNNING, task_count=3,
+                    completed_count=0, error_count=0, cancelled_count=0))
+    ids = journal_file_operations(session, "job", [
+        {'source': str(path), 'type': FILE_OPERATION_DELETE} for path in [*files, tmp_path / "missing.jpg"]
+    ])
+    session.commit()
+
+    # The first run was interrupted after one file, the resume handles the rest
+    remove_duplicates.remove_duplicates_task.call_local("job", ids[:1])
+    session.expire_all()
+    job = session.get(Job, "job")
+    assert (job.completed_count, job.status) == (1, JOB_STATUS_RUNNING)
+
+    remove_duplicates.remove_duplicates_task.call_local("job", ids[1:])
+    session.expire_all()
+    assert (job.completed_count, job.error_count, job.status) == (2, 1, JOB_STATUS_COMPLETED)
+    assert not any(path.exists() for path in files)
@@ -0,0 +1,32 @@
+from huey import SqliteHuey
+
+from yaffo.background_tasks.config import batch_priority
+
+
+def test_concurrent_jobs_take_turns_and_quick_jobs_go_first(tmp_path):
+    queue = SqliteHuey(filename=str(tmp_path / "huey.db"))
+
+    @queue.task(priority=0)
+    def bulk(job_id, batch):
+        pass
+
+    @queue.task(priority=100)
+    def quick(job_id, batch):
+        pass
+
+    for batch_index in range(3):
+        bulk("first", batch_index, priority=batch_priority(bulk, batch_index))
+    for batch_index in range(3):
+        bulk("second", batch_index, priority=batch_priority(bulk, batch_index))
+    quick("quick", 0, priority=batch_priority(quick, 0))
+
+    order = []
+    while (task := queue.dequeue()) is not None:
+        order.append(task.args)
+
+    assert order == [
+        ("quick", 0),
+        ("first", 0), ("second", 0),
+        ("first", 1), ("second", 1),
+        ("first", 2), ("second", 2),
+    ]
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+from sqlalchemy.orm import Session
+
+from yaffo.db import db
+from yaffo.db.engine import create_db_engine
+from yaffo.db.models import Photo, Tag
+
+
+@pytest.fixture
+def session():
+    """An empty in-memory library, connected the way the app connects, triggers included."""
+    engine = create_db_engine("sqlite://")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def make_photo(session):
+    """Add a photo named name under /photos, with tags as {tag_name: tag_value} and any other columns."""
+    def make(name: str, tags: dict[str, str] | None = None, **columns) -> Photo:
+        photo = Photo(full_file_path=os.path.join(os.sep, "photos", name), **columns)
+        photo.tags = [Tag(tag_name=tag_name, tag_value=tag_value) for tag_name, tag_value in (tags or {}).items()]
+        session.add(photo)
+        session.flush()
+        return photo
+
+    return make
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from yaffo.db.models import Directory, Face, Photo
+from yaffo.db.repositories.directory_repository import count_files_in_directory, find_move_clashes, move_directory
+
+
+def _path(*parts: str) -> str:
+    return os.path.join(os.sep, *parts)
+
+
+class TestFullFilePath:
+    def test_photos_in_the_same_folder_share_a_directory(self, session):
+        session.add_all([
+            Photo(full_file_path=_path("photos", "2020", "a.jpg")),
+            Photo(full_file_path=_path("photos", "2020", "b.jpg")),
+        ])
+        session.commit()
+
+        assert session.query(Directory).count() == 1
+        assert {p.full_file_path for p in session.query(Photo)} == {
+            _path("photos", "2020", "a.jpg"),
+            _path("photos", "2020", "b.jpg"),
+        }
+
+    def test_queries_by_full_file_path(self, session):
+        session.add_all([
+            Photo(full_file_path=_path("photos", "a.jpg")),
+            Photo(full_file_path=_path("other", "a.jpg")),
+        ])
+        session.commit()
+
+        assert session.query(Photo).filter(Photo.full_file_path == _path("other", "a.jpg")).count() == 1
+        assert session.query(Photo).filter(
+            Photo.full_file_path.in_([_path("photos", "a.jpg"), _path("other", "a.jpg"), _path("none.jpg")])
+        ).count() == 2
+        assert session.query(Photo.full_file_path).order_by(Photo.id).first().full_file_path == _path("photos", "a.jpg")
+
+    def test_selected_path_matches_the_python_path_for_files_in_the_root(self, session):
+        photo = Photo(full_file_path=_path("a.jpg"))
+        session.add(photo)
+        session.commit()
+
+        assert session.query(Photo.full_file_path).scalar() == photo.full_file_path == _path("a.jpg")
+
+    def test_reassigning_moves_the_photo(self, session):
+        photo = Photo(full_file_path=_path("photos", "a.jpg"))
+        session.add(photo)
+        session.commit()
+
+        photo.full_file_path = _path("sorted", "a.jpg")
+        session.commit()
+
+        assert session.get(Photo, photo.id).full_file_path == _path("sorted", "a.jpg")
+
+
+class TestMoveDirectory:
+    def test_moves_subtree_without_touching_file_rows(self, session):
+        session.add_all([
+            Face(full_file_path=_path("thumbs", "f1.jpg")),
+            Face(full_file_path=_path("thumbs", "nested", "f2.jpg")),
+            Face(full_file_path=_path("thumbsother", "f3.jpg")),
+        ])
+        session.commit()
+
+        assert count_files_in_directory(session, Face, _path("thumbs")) == 2
+        assert move_directory(session, _path("thumbs"), _path("new")) == 2
+        session.commit()
+
+        assert {f.full_file_path for f in session.query(Face)} == {
+            _path("new", "f1.jpg"),
+            _path("new", "nested", "f2.jpg"),
+            _path("thumbsother", "f3.jpg"),
+        }
+
+    def test_merges_into_existing_directory(self, session):
+        session.add_all([
+            Photo(full_file_path=_path("old", "a.jpg")),
+            Photo(full_file_path=_path("new", "b.jpg")),
+        ])
+        session.commit()
+
+        move_directory(session, _path("old"), _path("new"))
+        session.commit()
+        session.expire_all()
+
+        assert session.query(Directory).count() == 1
+        assert {p.full_file_path for p in session.query(Photo)} == {_path("new", "a.jpg"), _path("new", "b.jpg")}
+
+    def test_merge_refuses_files_with_the_same_name(self, session):
+        session.add_all([
+            Photo(full_file_path=_path("old", "a.jpg")),
+            Photo(full_file_path=_path("old", "b.jpg")),
+            Photo(full_file_path=_path("new", "a.jpg")),
+        ])
+        session.commit()
+
+        assert find_move_clashes(session, _path("old"), _path("new")) == [_path("new", "a.jpg")]
+        with pytest.raises(ValueError, match="1 file"):
+            move_directory(session, _path("old"), _path("new"))
+        assert session.query(Directory).count() == 2
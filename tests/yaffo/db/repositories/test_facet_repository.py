@@ -0,0 +1,42 @@
+import os
+
+from yaffo.db.models import Face, Person, PersonFace
+from yaffo.db.repositories.facet_repository import FacetValue, get_facets
+
+
+def test_facets_count_the_photos_with_each_value(session, make_photo):
+    alice, bob = Person(name="Alice"), Person(name="Bob")
+    session.add_all([alice, bob])
+    first = make_photo("a.jpg", tags={"Make": "Canon", "Model": "R5"}, year=2021, location_name="Paris")
+    make_photo("b.jpg", tags={"Make": "Canon"}, year=2021, location_name="Lyon")
+    make_photo("c.jpg", tags={"Make": "Nikon"}, year=2019)
+    face = Face(photo=first, full_file_path=os.path.join(os.sep, "faces", "a_0.jpg"))
+    face.person_face = PersonFace(person=alice)
+    session.add(face)
+    session.commit()
+
+    facets = get_facets(session)
+
+    assert facets.tag_names == [FacetValue("Make", 3), FacetValue("Model", 1)]
+    assert facets.tag_values["Make"] == [FacetValue("Canon", 2), FacetValue("Nikon", 1)]
+    assert facets.years == [FacetValue(2019, 1), FacetValue(2021, 2)]
+    assert facets.locations == [FacetValue("Lyon", 1), FacetValue("Paris", 1)]
+    assert facets.people == [FacetValue(alice.id, 1, "Alice"), FacetValue(bob.id, 0, "Bob")]
+
+
+def test_facets_are_cached_until_the_data_changes(session, make_photo):
+    photo = make_photo("a.jpg", tags={"Make": "Canon"}, year=2021)
+    session.commit()
+    facets = get_facets(session)
+
+    assert get_facets(session) is facets
+
+    # Indexing fills in a photo's date and location after it was imported
+    photo.year, photo.location_name = 2022, "Paris"
+    session.delete(photo.tags[0])
+    session.commit()
+    facets = get_facets(session)
+
+    assert facets.years == [FacetValue(2022, 1)]
+    assert facets.locations == [FacetValue("Paris", 1)]
+    assert facets.tag_names == []
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from yaffo.db.models import JobItem, JOB_ITEM_STATUS_DONE, JOB_ITEM_STATUS_FAILED, JOB_ITEM_STATUS_RUNNING
+from yaffo.db.repositories.job_item_repository import (
+    MAX_JOB_ITEM_ATTEMPTS,
+    add_job_items,
+    claim_job_items,
+    count_job_items_by_status,
+    count_pending_job_items,
+    fail_job_items,
+    finish_job_items,
+    get_failed_job_items,
+    job_item_outcome,
+    next_job_item_range,
+    requeue_job_items,
+)
+
+
+def test_ranges_cover_only_pending_items_of_the_job(session):
+    add_job_items(session, "job", range(5))
+    add_job_items(session, "other", range(3))
+    session.flush()
+
+    first_id, last_id = next_job_item_range(session, "job", 0, 3)
+    items = claim_job_items(session, "job", first_id, last_id)
+    assert [item.item_key for item in items] == ["0", "1", "2"]
+    assert count_pending_job_items(session, "job", through_item_id=last_id) == 0
+    assert claim_job_items(session, "job", first_id, last_id) == []
+
+    first_id, last_id = next_job_item_range(session, "job", last_id, 3)
+    assert [item.item_key for item in claim_job_items(session, "job", first_id, last_id)] == ["3", "4"]
+    assert next_job_item_range(session, "job", last_id, 3) is None
+
+
+def test_failing_a_batch_records_the_error_for_its_pending_items(session):
+    add_job_items(session, "job", ["/photos/a.jpg", "/photos/b.jpg"])
+    session.flush()
+    first_id, last_id = next_job_item_range(session, "job", 0, 10)
+    done = claim_job_items(session, "job", first_id, first_id)[0]
+    finish_job_items(session, [job_item_outcome(done, JOB_ITEM_STATUS_DONE, datetime.utcnow())])
+
+    assert fail_job_items(session, "job", first_id, last_id, "worker crashed") == 1
+
+    failed = get_failed_job_items(session, "job")
+    assert [(item.item_key, item.error) for item in failed] == [("/photos/b.jpg", "worker crashed")]
+    assert session.query(JobItem).filter_by(status=JOB_ITEM_STATUS_FAILED).count() == 1
+
+
+def test_requeue_resumes_dead_batches_until_attempts_run_out(session):
+    add_job_items(session, "job", ["a", "b", "c"])
+    session.flush()
+    first_id, last_id = next_job_item_range(session, "job", 0, 10)
+    claim_job_items(session, "job", first_id, last_id)
+    finish_job_items(session, [{'id': first_id, 'status': JOB_ITEM_STATUS_DONE}])
+
+    assert requeue_job_items(session, "job", running_before=datetime.utcnow() - timedelta(minutes=1)) == 0
+    assert requeue_job_items(session, "job", running_before=datetime.utcnow() + timedelta(seconds=1)) == 2
+
+    for _ in range(MAX_JOB_ITEM_ATTEMPTS - 1):
+        claim_job_items(session, "job", first_id, last_id)
+    assert count_job_items_by_status(session, "job") == {JOB_ITEM_STATUS_DONE: 1, JOB_ITEM_STATUS_RUNNING: 2}
+
+    assert requeue_job_items(session, "job", running_before=datetime.utcnow() + timedelta(seconds=1)) == 0
+    assert count_job_items_by_status(session, "job") == {JOB_ITEM_STATUS_DONE: 1, JOB_ITEM_STATUS_FAILED: 2}
+    assert requeue_job_items(session, "job", retry_failed=True) == 2
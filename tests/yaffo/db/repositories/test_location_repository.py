@@ -0,0 +1,91 @@
+import pytest
+
+from yaffo.db.models import Photo
+from yaffo.db.repositories.location_repository import within_distance, get_photos_in_viewport, \
+    get_location_clusters, get_locations_extent
+from yaffo.domain.geo import haversine_miles, bounding_boxes
+
+
+def _names_within(session, lat: float, lon: float, miles: float) -> set[str]:
+    return {photo.filename for photo in session.query(Photo).filter(within_distance(lat, lon, miles))}
+
+
+def test_proximity_keeps_the_radius_not_the_box(session, make_photo):
+    make_photo("center.jpg", latitude=48.85, longitude=2.35)
+    # About 9 miles north, and about 9 miles north and east: inside the 10 mile box, outside the circle
+    make_photo("north.jpg", latitude=48.98, longitude=2.35)
+    make_photo("corner.jpg", latitude=48.98, longitude=2.55)
+    make_photo("untagged.jpg")
+
+    assert _names_within(session, 48.85, 2.35, 10) == {"center.jpg", "north.jpg"}
+
+
+def test_proximity_and_viewports_cross_the_antimeridian(session, make_photo):
+    make_photo("fiji.jpg", latitude=-17.7, longitude=179.9)
+    make_photo("samoa.jpg", latitude=-17.7, longitude=-179.9)
+    make_photo("greenwich.jpg", latitude=-17.7, longitude=0.0)
+
+    assert _names_within(session, -17.7, 179.95, 20) == {"fiji.jpg", "samoa.jpg"}
+    assert {photo['filename'] for photo in get_photos_in_viewport(session, 170, -20, -170, -10)} == \
+        {"fiji.jpg", "samoa.jpg"}
+
+
+def test_photo_locations_follow_photo_coordinates(session, make_photo):
+    photo = make_photo("moved.jpg", latitude=10.0, longitude=10.0)
+    photo.latitude, photo.longitude = 50.0, 50.0
+    session.flush()
+
+    assert get_photos_in_viewport(session, 0, 0, 20, 20) == []
+    assert [row['id'] for row in get_photos_in_viewport(session, 40, 40, 60, 60)] == [photo.id]
+
+    session.delete(photo)
+    session.flush()
+    assert get_photos_in_viewport(session, 40, 40, 60, 60) == []
+
+
+def test_bounding_boxes_cover_the_circle():
+    # Near the pole a degree of longitude is short, the box must still reach points due east at its poleward edge
+    boxes = bounding_boxes(70.0, 20.0, 100)
+    assert len(boxes) == 1
+    min_lat, max_lat, min_lon, max_lon = boxes[0]
+    assert haversine_miles(70.0, 20.0, max_lat, 20.0) == pytest.approx(100, rel=1e-3)
+    assert haversine_miles(max_lat - 0.01, 20.0, max_lat - 0.01, max_lon) > 99
+
+    assert bounding_boxes(89.5, 0.0, 50) == [(pytest.approx(88.777, abs=1e-3), 90.0, -180.0, 180.0)]
+
+
+def test_clusters_merge_nearby_photos_until_zoomed_in(session, make_photo):
+    first = make_photo("louvre.jpg", latitude=48.8606, longitude=2.3376, location_name="Paris")
+    second = make_photo("eiffel.jpg", latitude=48.8584, longitude=2.2945)
+    make_photo("lyon.jpg", latitude=45.7640, longitude=4.8357)
+
+    france = get_location_clusters(session, 5, -5, 42, 8, 51)
+    assert sorted(cluster['count'] for cluster in france) == [1, 2]
+    paris = next(cluster for cluster in france if cluster['count'] == 2)
+    assert paris['lat'] == pytest.approx((48.8606 + 48.8584) / 2)
+    assert paris['photo_id'] in (first.id, second.id)
+
+    # A cell's bbox lists its photos, about 2.4 km cells at zoom 12 separate the two
+    assert {photo['id'] for photo in get_photos_in_viewport(session, *paris['bbox'])} == {first.id, second.id}
+    assert len(get_location_clusters(session, 12, 2.2, 48.8, 2.4, 48.9)) == 2
+    assert [cluster['count'] for cluster in get_location_clusters(session, 5, -5, 42, 8, 51, unnamed_only=True)] \
+        == [1, 1]
+
+
+def test_clusters_follow_moved_renamed_and_deleted_photos(session, make_photo):
+    first = make_photo("first.jpg", latitude=10.0, longitude=10.0)
+    second = make_photo("second.jpg", latitude=10.001, longitude=10.001)
+    cell = (9, 9, 11, 11)
+    assert get_location_clusters(session, 6, *cell)[0]['count'] == 2
+
+    first.location_name = "Somewhere"
+    session.flush()
+    assert get_location_clusters(session, 6, *cell, unnamed_only=True)[0]['count'] == 1
+
+    session.delete(first)
+    second.latitude = 50.0
+    session.flush()
+    assert get_location_clusters(session, 6, *cell) == []
+    assert [(cluster['count'], cluster['photo_id']) for cluster in get_location_clusters(session, 6, 9, 49, 11, 51)] \
+        == [(1, second.id)]
+    assert get_locations_extent(session) == pytest.approx([9.84375, 49.921875, 10.1953125, 50.2734375])
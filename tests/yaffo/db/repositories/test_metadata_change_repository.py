@@ -0,0 +1,54 @@
+import os
+from datetime import datetime, timedelta
+
+from yaffo.db.models import Face, Person, PersonFace, Photo, PhotoMetadataChange, PHOTO_STATUS_INDEXED, \
+    PHOTO_STATUS_SYNCED
+from yaffo.db.repositories.metadata_change_repository import (
+    clear_dirty_photos,
+    count_dirty_photos,
+    get_dirty_photo_ids,
+    load_dirty_photos_page,
+    mark_person_photos_dirty,
+    mark_photos_dirty,
+)
+
+
+def test_marking_twice_keeps_one_row_and_resets_synced_status(session, make_photo):
+    photo = make_photo("a.jpg", status=PHOTO_STATUS_SYNCED)
+
+    mark_photos_dirty(session, [photo.id])
+    mark_photos_dirty(session, [photo.id, None])
+    session.commit()
+
+    assert count_dirty_photos(session) == 1
+    assert session.get(Photo, photo.id).status == PHOTO_STATUS_INDEXED
+
+
+def test_person_rename_marks_every_photo_of_that_person(session, make_photo):
+    alice = Person(name="Alice")
+    first, second, other = (make_photo(name, status=PHOTO_STATUS_SYNCED) for name in ("a.jpg", "b.jpg", "c.jpg"))
+    faces = [Face(photo_id=p.id, full_file_path=os.path.join(os.sep, "faces", f"{p.id}.jpg"))
+             for p in (first, second, other)]
+    session.add_all([alice, *faces])
+    session.flush()
+    session.add_all([PersonFace(person_id=alice.id, face_id=faces[0].id),
+                     PersonFace(person_id=alice.id, face_id=faces[1].id)])
+    session.flush()
+
+    mark_person_photos_dirty(session, alice.id)
+
+    assert get_dirty_photo_ids(session) == [first.id, second.id]
+    page = load_dirty_photos_page(session, page=1, page_size=1)
+    assert len(page) == 1
+    assert page[0]['people_names'] == ["Alice"]
+
+
+def test_clear_keeps_photos_changed_after_the_sync_read(session, make_photo):
+    photo = make_photo("a.jpg", status=PHOTO_STATUS_SYNCED, location_name="Paris")
+    mark_photos_dirty(session, [photo.id])
+
+    clear_dirty_photos(session, [photo.id], datetime.utcnow() - timedelta(minutes=1))
+    assert count_dirty_photos(session) == 1
+
+    clear_dirty_photos(session, [photo.id], datetime.utcnow())
+    assert session.query(PhotoMetadataChange).count() == 0
@@ -0,0 +1,33 @@
+import os
+
+from yaffo.db.models import Directory, Photo, PHOTO_STATUS_INDEXED
+from yaffo.db.repositories.photos_repository import insert_photos
+
+
+def _path(*parts: str) -> str:
+    return os.path.join(os.sep, *parts)
+
+
+def test_insert_photos_creates_rows_and_directories(session):
+    paths = [_path("photos", "a.jpg"), _path("photos", "b.jpg"), _path("photos", "2020", "c.jpg")]
+
+    created = insert_photos(session, paths)
+    session.commit()
+
+    assert set(created) == set(paths)
+    assert {p.id: p.full_file_path for p in session.query(Photo)} == {photo_id: path for path, photo_id in created.items()}
+    assert session.query(Directory).count() == 2
+
+
+def test_insert_photos_skips_paths_already_in_the_library(session):
+    existing = Photo(full_file_path=_path("photos", "a.jpg"), status=PHOTO_STATUS_INDEXED)
+    session.add(existing)
+    session.commit()
+
+    created = insert_photos(session, [_path("photos", "a.jpg"), _path("photos", "b.jpg")])
+    session.commit()
+
+    assert list(created) == [_path("photos", "b.jpg")]
+    assert session.query(Photo).count() == 2
+    assert session.get(Photo, existing.id).status == PHOTO_STATUS_INDEXED
+    assert insert_photos(session, []) == {}
@@ -0,0 +1,61 @@
+import multiprocessing
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from yaffo.db import db
+from yaffo.db.engine import create_db_engine, init_flask_db, write_with_retry
+from yaffo.db.models import Job, JobItem, JOB_STATUS_RUNNING
+
+WORKER_COUNT = 4
+WRITES_PER_WORKER = 100
+
+
+def _worker(uri: str, worker_index: int):
+    engine = create_db_engine(uri)
+    with Session(engine) as session:
+        for index in range(WRITES_PER_WORKER):
+            def write():
+                session.add(JobItem(job_id="job", item_key=f"{worker_index}-{index}"))
+                session.query(Job).filter_by(id="job").update({"completed_count": Job.completed_count + 1})
+            write_with_retry(session, write)
+    engine.dispose()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_web_app_and_workers_share_the_database_without_locking_errors(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'yaffo.db'}"
+    engine = create_db_engine(uri)
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Job(id="job", name="index_photos", status=JOB_STATUS_RUNNING, task_count=0,
+                        completed_count=0, error_count=0, cancelled_count=0, message=""))
+        session.commit()
+        assert session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    engine.dispose()
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_worker, args=(uri, index)) for index in range(WORKER_COUNT)]
+    for worker in workers:
+        worker.start()
+
+    app = Flask(__name__)
+    init_flask_db(app, uri)
+    with app.app_context():
+        # The web app keeps polling job progress and writing while the workers commit
+        while any(worker.is_alive() for worker in workers):
+            db.session.query(Job).filter_by(id="job").one()
+            write_with_retry(db.session, lambda: db.session.query(Job).filter_by(id="job").update(
+                {"message": "Indexed {totalCount}/{taskCount} photos"}
+            ))
+        for worker in workers:
+            worker.join()
+
+        assert [worker.exitcode for worker in workers] == [0] * WORKER_COUNT
+        assert db.session.query(Job).filter_by(id="job").one().completed_count == WORKER_COUNT * WRITES_PER_WORKER
+        assert db.session.query(JobItem).count() == WORKER_COUNT * WRITES_PER_WORKER
+        assert db.session.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        db.session.remove()
+        db.engine.dispose()
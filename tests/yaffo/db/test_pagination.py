@@ -0,0 +1,65 @@
+import pytest
+
+from yaffo.db.models import Photo
+from yaffo.db.pagination import paginate, get_page_index, clear_page_indexes
+
+PAGE_KEYS = (Photo.date_taken, Photo.id)
+PAGE_SIZE = 4
+
+
+@pytest.fixture
+def session(session, make_photo):
+    # Several photos share a date and some were imported but not indexed yet, so have none
+    dates = [f"2021-0{index % 5 + 1}-01" for index in range(15)] + [None] * 3
+    for index, date_taken in enumerate(dates):
+        make_photo(f"{index}.jpg", date_taken=date_taken)
+    session.commit()
+    yield session
+    clear_page_indexes()
+
+
+def _expected_ids(session, descending):
+    ordering = [key.desc() if descending else key.asc() for key in PAGE_KEYS]
+    return [photo.id for photo in session.query(Photo).order_by(*ordering)]
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_next_and_previous_cursors_walk_every_row_once(session, descending):
+    pages = [paginate(session.query(Photo), PAGE_KEYS, PAGE_SIZE, descending=descending)]
+    while pages[-1].next_cursor:
+        pages.append(paginate(session.query(Photo), PAGE_KEYS, PAGE_SIZE, descending=descending,
+                              cursor=pages[-1].next_cursor, page_number=pages[-1].page_number + 1))
+
+    assert [photo.id for page in pages for photo in page.items] == _expected_ids(session, descending)
+    assert [page.page_number for page in pages] == [1, 2, 3, 4, 5]
+    assert pages[0].previous_cursor is None
+
+    previous = paginate(session.query(Photo), PAGE_KEYS, PAGE_SIZE, descending=descending,
+                        cursor=pages[-1].previous_cursor, page_number=pages[-1].page_number - 1)
+    assert [photo.id for photo in previous.items] == [photo.id for photo in pages[-2].items]
+
+
+def test_page_number_jumps_through_the_page_index(session):
+    expected_ids = _expected_ids(session, True)
+
+    page = paginate(session.query(Photo), PAGE_KEYS, PAGE_SIZE, descending=True, page_number=3)
+    assert [photo.id for photo in page.items] == expected_ids[8:12]
+    assert (page.page_number, page.total_items, page.total_pages) == (3, 18, 5)
+
+    last_page = paginate(session.query(Photo), PAGE_KEYS, PAGE_SIZE, descending=True, page_number=99)
+    assert [photo.id for photo in last_page.items] == expected_ids[16:]
+    assert last_page.page_number == 5 and last_page.next_cursor is None
+
+
+def test_page_index_counts_the_filtered_rows(session):
+    page_index = get_page_index(session.query(Photo).filter(Photo.date_taken.isnot(None)), PAGE_KEYS, PAGE_SIZE)
+
+    assert page_index.total_items == 15
+    assert page_index.total_pages == 4
+    assert page_index.page_starts[0] == ("2021-01-01", 1)
+
+
+def test_an_invalid_cursor_starts_from_the_first_page(session):
+    page = paginate(session.query(Photo), PAGE_KEYS, PAGE_SIZE, descending=True, cursor="not-a-cursor")
+
+    assert [photo.id for photo in page.items] == _expected_ids(session, True)[:PAGE_SIZE]
@@ -0,0 +1,56 @@
+import os
+
+from sqlalchemy import delete, update
+
+from yaffo.db.models import Face, Person, PersonFace, Photo, PhotoPerson
+
+
+def _faces(session, photo: Photo, face_count: int) -> list[Face]:
+    faces = [
+        Face(photo=photo, full_file_path=os.path.join(os.sep, "faces", f"{photo.filename}_{index}.jpg"))
+        for index in range(face_count)
+    ]
+    session.add_all(faces)
+    session.flush()
+    return faces
+
+
+def _photo_people(session) -> set[tuple[int, int, int]]:
+    return {
+        (row.person_id, row.photo_id, row.face_count)
+        for row in session.query(PhotoPerson.person_id, PhotoPerson.photo_id, PhotoPerson.face_count)
+    }
+
+
+def test_photo_people_follows_face_assignments(session, make_photo):
+    alice, bob = Person(name="Alice"), Person(name="Bob")
+    session.add_all([alice, bob])
+    photo = make_photo("a.jpg")
+    faces = _faces(session, photo, 3)
+
+    session.add_all([PersonFace(person=alice, face_id=faces[0].id), PersonFace(person=alice, face_id=faces[1].id)])
+    session.flush()
+    assert _photo_people(session) == {(alice.id, photo.id, 2)}
+
+    session.execute(update(PersonFace).where(PersonFace.face_id == faces[1].id).values(person_id=bob.id))
+    assert _photo_people(session) == {(alice.id, photo.id, 1), (bob.id, photo.id, 1)}
+
+    session.execute(delete(PersonFace).where(PersonFace.person_id == alice.id))
+    assert _photo_people(session) == {(bob.id, photo.id, 1)}
+
+
+def test_deleting_faces_and_photos_removes_their_people(session, make_photo):
+    alice = Person(name="Alice")
+    session.add(alice)
+    first, second = make_photo("a.jpg"), make_photo("b.jpg")
+    first_faces, second_faces = _faces(session, first, 2), _faces(session, second, 1)
+    session.add_all(PersonFace(person=alice, face_id=face.id) for face in [*first_faces, *second_faces])
+    session.flush()
+
+    session.delete(first_faces[0])
+    session.flush()
+    assert _photo_people(session) == {(alice.id, first.id, 1), (alice.id, second.id, 1)}
+
+    session.delete(second)
+    session.flush()
+    assert _photo_people(session) == {(alice.id, first.id, 1)}
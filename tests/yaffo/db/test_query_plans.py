@@ -0,0 +1,142 @@
+import os
+import re
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from yaffo.app import create_app
+from yaffo.db import db
+from yaffo.db.models import Photo, Tag, Face, Person, PersonFace, PersonEmbedding, FACE_STATUS_ASSIGNED, \
+    FACE_STATUS_UNASSIGNED
+from yaffo.db.pagination import encode_cursor, clear_page_indexes, CURSOR_AFTER, CURSOR_BEFORE
+from yaffo.scripts.init_db import init_db
+
+# Tables that grow with the library. Listing every person is what /people does, so people may be scanned
+LIBRARY_TABLES = {"directories", "photos", "faces", "people_face", "tags"}
+
+# A SCAN without USING reads every row of the table; "SCAN photos USING INDEX ..." walks an index in order.
+# Plans name a table by its alias when it has one, such as photos_1 for an eager load
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+ALIAS = re.compile(r"\b(\w+) AS (\w+)\b")
+
+ROUTES = [
+    "/",
+    "/?year=2021",
+    "/?year=2021&month=6",
+    "/?person=1&person=2",
+    "/?person=1&person=2&person-match-type=all",
+    "/?tag-name=Make",
+    "/?tag-name=Make&tag-value=Canon",
+    "/?location=Paris",
+    "/?proximity-lat=48.85&proximity-lon=2.35&proximity-distance=10",
+    "/api/tag-values?tag_name=Make",
+    "/faces?group_by=people",
+    "/faces?year=2021&month=6&group_by=people",
+    "/people",
+    "/people/1/faces",
+    "/people/1/faces?year=2021&min_similarity=0.5",
+    "/locations",
+    "/api/locations/photos?bbox=2.3,48.8,2.4,48.9",
+    "/api/locations/photos?bbox=170,-10,-170,10",
+    "/api/locations/clusters?bbox=-180,-85,180,85&zoom=2",
+    "/api/locations/clusters?bbox=2.3,48.8,2.4,48.9&zoom=10&unnamed=true",
+    "/api/locations/clusters?bbox=2.3,48.8,2.4,48.9&zoom=15",
+    "/api/locations/extent?unnamed=true",
+    # Later pages, by cursor and by page number, and the page counts loaded after them
+    f"/?page-size=5&page=2&cursor={encode_cursor(CURSOR_AFTER, ('2021-06-01 12:00:00', 20))}",
+    f"/?page-size=5&page=2&cursor={encode_cursor(CURSOR_BEFORE, ('2020-01-01 12:00:00', 3))}",
+    "/?page-size=5&page=4",
+    "/api/photos/page-count?page-size=5&year=2021",
+    f"/faces?group_by=people&page_size=5&cursor={encode_cursor(CURSOR_AFTER, ('2021-06-01 12:00:00', 60))}",
+    "/faces?group_by=people&page_size=5&page=3",
+    "/api/faces/page-count?page_size=5",
+    f"/people/1/faces?page-size=5&cursor={encode_cursor(CURSOR_AFTER, (0.5, 30))}",
+    "/people/1/faces?page-size=5&page=3",
+    "/api/people/1/faces/page-count?page-size=5",
+]
+
+
+def _embedding(rng: np.random.Generator) -> bytes:
+    return rng.random(128).astype(np.float64).tobytes()
+
+
+def _seed(session):
+    rng = np.random.default_rng(0)
+    people = [Person(name="Alice"), Person(name="Bob")]
+    session.add_all(people)
+    for person in people:
+        person.embeddings_by_year.append(PersonEmbedding(year=2021, avg_embedding=_embedding(rng)))
+
+    for index in range(40):
+        month = index % 12 + 1
+        photo = Photo(
+            full_file_path=os.path.join(os.sep, "photos", str(2020 + index % 3), f"{index}.jpg"),
+            date_taken=f"{2020 + index % 3}-{month:02d}-01 12:00:00",
+            year=2020 + index % 3,
+            month=month,
+            latitude=48.85 + index / 1000,
+            longitude=2.35 + index / 1000,
+            location_name="Paris" if index % 2 else "Lyon",
+        )
+        photo.tags.append(Tag(tag_name="Make", tag_value="Canon" if index % 2 else "Nikon"))
+        session.add(photo)
+        for face_index, person in enumerate([*people, None]):
+            face = Face(
+                full_file_path=os.path.join(os.sep, "faces", f"{index}_{face_index}.jpg"),
+                photo=photo,
+                embedding=_embedding(rng),
+                status=FACE_STATUS_ASSIGNED if person else FACE_STATUS_UNASSIGNED,
+            )
+            if person:
+                face.person_face = PersonFace(person=person, similarity=float(rng.random()))
+            session.add(face)
+    session.commit()
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    # The schema users get from init_db, without ANALYZE: most libraries never run it,
+    # so plans must hold up on the planner's defaults
+    db_path = tmp_path_factory.mktemp('query_plans') / 'yaffo.db'
+    init_db(str(db_path))
+    app = create_app(f"sqlite:///{db_path}")
+    with app.app_context():
+        _seed(db.session)
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _selects_run_by(app, url: str) -> list[tuple[str, tuple]]:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    # A cached page index would skip the query building it
+    clear_page_indexes()
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = app.test_client().get(url)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return statements
+
+
+@pytest.mark.parametrize("url", ROUTES)
+def test_route_queries_do_not_scan_library_tables(app, url):
+    statements = _selects_run_by(app, url)
+    assert statements
+
+    with db.engine.connect() as connection:
+        for statement, parameters in statements:
+            tables = {alias: table for table, alias in ALIAS.findall(statement)}
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            full_scans = [
+                row.detail for row in plan
+                if (match := FULL_SCAN.match(row.detail)) and tables.get(match[1], match[1]) in LIBRARY_TABLES
+            ]
+            assert not full_scans, f"{url} scans {full_scans}:\n{statement}"
@@ -0,0 +1,17 @@
+import pytest
+
+from yaffo.app import create_app
+from yaffo.db import db
+from yaffo.scripts.init_db import init_db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """The web app on an empty library created by init_db, inside an app context."""
+    db_path = tmp_path / 'yaffo.db'
+    init_db(str(db_path))
+    app = create_app(f"sqlite:///{db_path}")
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,20 @@
+import pytest
+
+from yaffo.db import db
+from yaffo.db.models import Job, FileOperation, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, FILE_OPERATION_STATUS_PENDING
+from yaffo.utils.file_operations import FILE_OPERATION_DELETE, journal_file_operations
+
+
+@pytest.mark.parametrize("status", [JOB_STATUS_PENDING, JOB_STATUS_RUNNING])
+def test_file_operation_jobs_are_not_resumed_while_running(app, status):
+    db.session.add(Job(id="job", name="remove_duplicates", status=status, task_count=1,
+                       completed_count=0, error_count=0, cancelled_count=0))
+    journal_file_operations(db.session, "job", [{'source': "/photos/a.jpg", 'type': FILE_OPERATION_DELETE}])
+    db.session.commit()
+
+    response = app.test_client().post("/jobs/job/resume")
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Job is still running'}
+    assert db.session.get(Job, "job").status == status
+    assert db.session.query(FileOperation).one().status == FILE_OPERATION_STATUS_PENDING
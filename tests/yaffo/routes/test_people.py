@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+from yaffo.db import db
+from yaffo.db.models import Face, Person, PersonFace, Photo, PhotoMetadataChange, FACE_STATUS_ASSIGNED
+
+
+def _person_in_photos(name: str, count: int) -> tuple[Person, list[Face]]:
+    person = Person(name=name)
+    faces = []
+    for index in range(count):
+        photo = Photo(full_file_path=os.path.join(os.sep, "photos", f"{name}_{index}.jpg"))
+        face = Face(
+            full_file_path=os.path.join(os.sep, "faces", f"{name}_{index}.jpg"),
+            photo=photo,
+            embedding=np.zeros(128).tobytes(),
+            status=FACE_STATUS_ASSIGNED,
+        )
+        face.person_face = PersonFace(person=person)
+        faces.append(face)
+    db.session.add_all([person, *faces])
+    db.session.commit()
+    return person, faces
+
+
+def _dirty_photo_ids() -> set[int]:
+    return {change.photo_id for change in db.session.query(PhotoMetadataChange)}
+
+
+def test_unassigning_faces_marks_their_photos_for_sync(app):
+    person, faces = _person_in_photos("Alice", 3)
+
+    response = app.test_client().post(
+        f"/people/{person.id}/faces/remove", data={'faces': [faces[0].id, faces[1].id]}
+    )
+
+    assert response.status_code == 302
+    assert _dirty_photo_ids() == {faces[0].photo_id, faces[1].photo_id}
+
+
+def test_deleting_a_person_marks_their_photos_for_sync(app):
+    person, faces = _person_in_photos("Alice", 2)
+    _person_in_photos("Bob", 1)
+
+    response = app.test_client().post(f"/people/{person.id}/delete")
+
+    assert response.status_code == 302
+    assert _dirty_photo_ids() == {face.photo_id for face in faces}
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Generous for a cold CI machine, importing the app used to take several seconds
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Only the background workers need these, lazy_import keeps them unexecuted in the web process
+HEAVY_MODULES = ["dlib", "sklearn", "scipy", "pillow_heif._pillow_heif"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import yaffo.app
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+def _import_app(data_dir: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        env={**os.environ, "YAFFO_DATA_DIR": str(data_dir)},
+        cwd=Path(__file__).parents[2],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.slow
+def test_importing_the_app_stays_within_budget(tmp_path):
+    runs = [_import_app(tmp_path) for _ in range(3)]
+
+    assert runs[0]['loaded'] == []
+    assert min(run['seconds'] for run in runs) < IMPORT_BUDGET_SECONDS
+    assert not list(tmp_path.glob("*.log")), "log files should only be opened on the first record"
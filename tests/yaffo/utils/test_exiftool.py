@@ -0,0 +1,58 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from yaffo.utils.exiftool import ExifToolSession
+
+# Answers stay_open commands like exiftool does, echoing its arguments, and never answers "hang"
+FAKE_EXIFTOOL = """#!{python}
+import json, sys, time
+args = []
+for line in sys.stdin:
+    line = line.rstrip("\\n")
+    if args[-1:] == ["-stay_open"] and line == "False":
+        break
+    if not line.startswith("-execute"):
+        args.append(line)
+        continue
+    if "hang" in args:
+        time.sleep(60)
+    marker = args[args.index("-echo4") + 1]
+    print(json.dumps({{"argv": sys.argv[1:], "args": args[:args.index("-echo4")]}}))
+    print(marker, flush=True)
+    print(marker, file=sys.stderr, flush=True)
+    args = []
+"""
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="runs the fake exiftool through its shebang")
+
+
+@pytest.fixture
+def exiftool_path(tmp_path) -> Path:
+    path = tmp_path / "exiftool"
+    path.write_text(FAKE_EXIFTOOL.format(python=sys.executable))
+    path.chmod(0o755)
+    return path
+
+
+def test_every_command_reads_paths_as_utf8(exiftool_path):
+    with ExifToolSession(exiftool_path) as session:
+        stdout, _ = session.execute(["-json", "/photos/café.jpg"])
+
+    output = json.loads(stdout)
+    assert output["argv"][-3:] == ["-common_args", "-charset", "filename=utf8"]
+    assert output["args"] == ["-json", "/photos/café.jpg"]
+
+
+def test_stuck_command_times_out_and_restarts_the_session(exiftool_path):
+    with ExifToolSession(exiftool_path, timeout=0.5) as session:
+        stuck_process = session.process
+
+        with pytest.raises(TimeoutError):
+            session.execute(["hang"])
+
+        assert stuck_process.poll() is not None
+        assert session.running and session.process is not stuck_process
+        assert json.loads(session.execute(["a.jpg"])[0])["args"] == ["a.jpg"]
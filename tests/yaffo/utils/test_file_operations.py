@@ -0,0 +1,155 @@
+from pathlib import Path
+
+import pytest
+
+from yaffo.db.models import FileOperation, Photo, FILE_OPERATION_STATUS_DONE, FILE_OPERATION_STATUS_FAILED, \
+    FILE_OPERATION_STATUS_ROLLED_BACK
+from yaffo.utils.file_operations import (
+    FILE_OPERATION_COPY,
+    FILE_OPERATION_DELETE,
+    FILE_OPERATION_MOVE,
+    copy_file,
+    execute_file_operations,
+    journal_file_operations,
+    load_file_operations,
+    resolve_destinations,
+    rollback_file_operations,
+)
+
+
+def _write(path: Path, content: str = "data") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+class TestResolveDestinations:
+    def test_collisions_within_plan_and_on_disk_get_unique_names(self, tmp_path):
+        _write(tmp_path / "dest" / "a.jpg")
+        operations = [
+            {'source': str(tmp_path / "one" / "a.jpg"), 'destination': str(tmp_path / "dest" / "a.jpg"), 'type': 'move'},
+            {'source': str(tmp_path / "two" / "a.jpg"), 'destination': str(tmp_path / "dest" / "a.jpg"), 'type': 'move'},
+        ]
+
+        resolved = resolve_destinations(operations)
+
+        assert [Path(op['destination']).name for op in resolved] == ["a_1.jpg", "a_2.jpg"]
+
+    def test_operation_onto_itself_is_dropped(self, tmp_path):
+        source = _write(tmp_path / "a.jpg")
+        assert resolve_destinations([{'source': str(source), 'destination': str(source), 'type': 'move'}]) == []
+
+
+class TestExecuteFileOperations:
+    def test_move_updates_journal_and_photo_path(self, session, tmp_path):
+        source = _write(tmp_path / "src" / "nested" / "a.jpg")
+        destination = tmp_path / "dest" / "2021" / "a.jpg"
+        session.add(Photo(full_file_path=str(source)))
+        ids = journal_file_operations(session, "job", [
+            {'source': str(source), 'destination': str(destination), 'type': FILE_OPERATION_MOVE}
+        ])
+
+        done, failed = execute_file_operations(session, load_file_operations(session, ids))
+        session.commit()
+
+        assert (done, failed) == (1, 0)
+        assert destination.read_text() == "data"
+        assert not (tmp_path / "src").exists()
+        assert session.query(Photo).one().full_file_path == str(destination)
+        assert session.get(FileOperation, ids[0]).status == FILE_OPERATION_STATUS_DONE
+
+    def test_copy_keeps_source(self, session, tmp_path):
+        source = _write(tmp_path / "a.jpg", "copy me")
+        destination = tmp_path / "copies" / "a.jpg"
+        ids = journal_file_operations(session, "job", [
+            {'source': str(source), 'destination': str(destination), 'type': FILE_OPERATION_COPY}
+        ])
+
+        execute_file_operations(session, load_file_operations(session, ids))
+
+        assert source.exists()
+        assert destination.read_text() == "copy me"
+
+    def test_missing_source_is_recorded_as_failed(self, session, tmp_path):
+        ids = journal_file_operations(session, "job", [
+            {'source': str(tmp_path / "missing.jpg"), 'destination': None, 'type': FILE_OPERATION_DELETE}
+        ])
+
+        done, failed = execute_file_operations(session, load_file_operations(session, ids))
+
+        assert (done, failed) == (0, 1)
+        assert session.get(FileOperation, ids[0]).status == FILE_OPERATION_STATUS_FAILED
+
+    def test_resume_skips_moves_that_already_happened(self, session, tmp_path):
+        source = _write(tmp_path / "a.jpg")
+        destination = tmp_path / "dest" / "a.jpg"
+        ids = journal_file_operations(session, "job", [
+            {'source': str(source), 'destination': str(destination), 'type': FILE_OPERATION_MOVE}
+        ])
+        destination.parent.mkdir()
+        source.rename(destination)
+
+        done, failed = execute_file_operations(session, load_file_operations(session, ids))
+
+        assert (done, failed) == (1, 0)
+
+    def test_resume_skips_copies_that_already_happened(self, session, tmp_path):
+        source = _write(tmp_path / "a.jpg")
+        destination = tmp_path / "dest" / "a.jpg"
+        ids = journal_file_operations(session, "job", [
+            {'source': str(source), 'destination': str(destination), 'type': FILE_OPERATION_COPY}
+        ])
+        destination.parent.mkdir()
+        copy_file(source, destination)
+
+        done, failed = execute_file_operations(session, load_file_operations(session, ids))
+
+        assert (done, failed) == (1, 0)
+
+    @pytest.mark.parametrize("operation_type", [FILE_OPERATION_MOVE, FILE_OPERATION_COPY])
+    def test_file_that_appeared_at_the_destination_is_not_replaced(self, session, tmp_path, operation_type):
+        source = _write(tmp_path / "a.jpg", "photo")
+        destination = tmp_path / "dest" / "a.jpg"
+        ids = journal_file_operations(session, "job", [
+            {'source': str(source), 'destination': str(destination), 'type': operation_type}
+        ])
+        _write(destination, "someone else's")
+
+        done, failed = execute_file_operations(session, load_file_operations(session, ids))
+
+        assert (done, failed) == (0, 1)
+        assert source.read_text() == "photo"
+        assert destination.read_text() == "someone else's"
+        assert session.get(FileOperation, ids[0]).status == FILE_OPERATION_STATUS_FAILED
+
+
+class TestRollbackFileOperations:
+    def test_moves_are_undone_and_copies_removed(self, session, tmp_path):
+        moved = _write(tmp_path / "src" / "a.jpg")
+        copied = _write(tmp_path / "src" / "b.jpg")
+        session.add(Photo(full_file_path=str(moved)))
+        ids = journal_file_operations(session, "job", [
+            {'source': str(moved), 'destination': str(tmp_path / "dest" / "a.jpg"), 'type': FILE_OPERATION_MOVE},
+            {'source': str(copied), 'destination': str(tmp_path / "dest" / "b.jpg"), 'type': FILE_OPERATION_COPY},
+        ])
+        execute_file_operations(session, load_file_operations(session, ids))
+        session.commit()
+
+        rolled_back, failed = rollback_file_operations(session, "job")
+        session.commit()
+
+        assert (rolled_back, failed) == (2, 0)
+        assert moved.exists() and copied.exists()
+        assert not (tmp_path / "dest").exists()
+        assert session.query(Photo).one().full_file_path == str(moved)
+        assert {op.status for op in session.query(FileOperation)} == {FILE_OPERATION_STATUS_ROLLED_BACK}
+
+
+def test_copy_file_preserves_content_and_leaves_no_partial(tmp_path):
+    source = _write(tmp_path / "a.jpg", "x" * 100_000)
+    destination = tmp_path / "b.jpg"
+
+    copy_file(source, destination)
+
+    assert destination.read_text() == source.read_text()
+    assert list(tmp_path.glob(".*.partial")) == []
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import imagehash
+from PIL import Image
+
+from yaffo.utils.image import (
+    PHASH_DECODE_SIZE,
+    PREVIEW_SIZES,
+    get_cached_preview,
+    image_from_path,
+    image_from_path_reduced,
+    preview_from_path,
+)
+
+
+def _write_jpeg(path: Path, size=(2000, 1500), orientation: int | None = None) -> Path:
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[Image.ExifTags.Base.Orientation] = orientation
+    image.save(path, format="JPEG", quality=90, exif=exif)
+    return path
+
+
+class TestImageFromPathReduced:
+    def test_jpeg_is_decoded_at_reduced_scale(self, tmp_path):
+        path = _write_jpeg(tmp_path / "photo.jpg")
+        image = image_from_path_reduced(path, 256)
+        assert image.size[0] < 2000
+        assert min(image.size) >= 256
+
+    def test_png_falls_back_to_full_decode(self, tmp_path):
+        path = tmp_path / "photo.png"
+        Image.new("RGBA", (300, 200), (10, 20, 30, 255)).save(path)
+        image = image_from_path_reduced(path, 32)
+        assert image.size == (300, 200)
+        assert image.mode == "RGB"
+
+    def test_phash_matches_full_decode(self, tmp_path):
+        path = _write_jpeg(tmp_path / "photo.jpg")
+        full_hash = imagehash.phash(image_from_path(path))
+        reduced_hash = imagehash.phash(image_from_path_reduced(path, PHASH_DECODE_SIZE))
+        assert full_hash - reduced_hash <= 2
+
+
+class TestPreviews:
+    def test_preview_is_bounded(self, tmp_path):
+        path = _write_jpeg(tmp_path / "photo.jpg")
+        image = preview_from_path(path, 512)
+        assert max(image.size) == 512
+
+    def test_cached_preview_is_reused(self, tmp_path):
+        path = _write_jpeg(tmp_path / "photo.jpg")
+        cache_dir = tmp_path / "previews"
+        first = get_cached_preview(path, 300, cache_dir)
+        second = get_cached_preview(path, 300, cache_dir)
+        assert first == second
+        with Image.open(first) as preview:
+            assert max(preview.size) == PREVIEW_SIZES[1]
+
+    def test_cached_preview_is_turned_upright(self, tmp_path):
+        # Orientation 6: the camera was held sideways, the pixels need a quarter turn clockwise
+        path = _write_jpeg(tmp_path / "portrait.jpg", size=(2000, 1000), orientation=6)
+        with Image.open(get_cached_preview(path, 512, tmp_path / "previews")) as preview:
+            assert preview.size == (256, 512)
+            assert Image.ExifTags.Base.Orientation not in preview.getexif()
+
+    def test_cached_preview_changes_when_source_changes(self, tmp_path):
+        path = _write_jpeg(tmp_path / "photo.jpg")
+        cache_dir = tmp_path / "previews"
+        first = get_cached_preview(path, 256, cache_dir)
+        _write_jpeg(path, size=(1000, 800))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second = get_cached_preview(path, 256, cache_dir)
+        assert first != second
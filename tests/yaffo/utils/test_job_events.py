@@ -0,0 +1,62 @@
+import socket
+from queue import Empty
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from yaffo.db import db
+from yaffo.db.models import Job
+from yaffo.utils import job_events
+from yaffo.utils.job_events import JobEventHub
+
+
+@pytest.fixture
+def events_address(monkeypatch):
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    address = probe.getsockname()
+    probe.close()
+    monkeypatch.setattr(job_events, "JOB_EVENTS_ADDRESS", address)
+    return address
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={'check_same_thread': False})
+    db.metadata.create_all(engine)
+    return engine
+
+
+def test_committing_a_job_change_wakes_the_hub(events_address, engine):
+    session = Session(engine)
+    session.add(Job(id="job", name="test", task_count=2, completed_count=0, error_count=0, cancelled_count=0))
+    session.commit()
+
+    def load_changed_jobs(since):
+        with Session(engine) as hub_session:
+            return [job.to_dict() for job in hub_session.query(Job).filter(Job.updated_at >= since)]
+
+    hub = JobEventHub.start(load_changed_jobs)
+    queue = hub.subscribe()
+
+    session.query(Job).filter_by(id="job").update({'completed_count': Job.completed_count + 1})
+    session.commit()
+    snapshot = queue.get(timeout=5)
+
+    assert snapshot['id'] == "job"
+    assert snapshot['completed_count'] == 1
+
+    # An unchanged job is not sent again
+    job_events.publish_jobs_changed()
+    with pytest.raises(Empty):
+        queue.get(timeout=0.5)
+
+    hub.unsubscribe(queue)
+    session.close()
+
+
+def test_second_hub_on_the_same_port_is_unavailable(events_address):
+    first = JobEventHub.start(lambda since: [])
+    assert first is not None
+    assert JobEventHub.start(lambda since: []) is None
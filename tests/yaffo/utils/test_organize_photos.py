@@ -0,0 +1,73 @@
+from datetime import datetime
+from pathlib import Path
+
+import piexif
+from PIL import Image
+
+from yaffo.utils import organize_photos
+from yaffo.utils.organize_photos import get_destination_folder, plan_file_operation, read_photo_dates
+
+
+def _write_jpeg(path: Path, date_taken: str | None = None) -> Path:
+    image = Image.new("RGB", (32, 32), (200, 100, 50))
+    if date_taken:
+        exif_bytes = piexif.dump({"Exif": {piexif.ExifIFD.DateTimeOriginal: date_taken.encode()}})
+        image.save(path, format="JPEG", exif=exif_bytes)
+    else:
+        image.save(path, format="JPEG")
+    return path
+
+
+class TestGetDestinationFolder:
+    def test_year_month(self):
+        folder = get_destination_folder(Path("/photos"), "year_month", datetime(2021, 12, 5))
+        assert folder == Path("/photos/2021/December")
+
+    def test_year_month_day(self):
+        folder = get_destination_folder(Path("/photos"), "year_month_day", datetime(2021, 3, 7))
+        assert folder == Path("/photos/2021/March/07")
+
+    def test_missing_date_goes_to_unknown(self):
+        assert get_destination_folder(Path("/photos"), "year", None) == Path("/photos/unknown")
+
+
+class TestPlanFileOperation:
+    def test_file_already_in_place_is_skipped(self, tmp_path):
+        folder = tmp_path / "2021"
+        folder.mkdir()
+        photo = _write_jpeg(folder / "a.jpg")
+        assert plan_file_operation(photo, datetime(2021, 1, 1), tmp_path, "year", "move") is None
+
+    def test_file_is_planned_into_date_folder(self, tmp_path):
+        photo = _write_jpeg(tmp_path / "a.jpg")
+        operation = plan_file_operation(photo, datetime(2021, 1, 1), tmp_path, "year", "copy")
+        assert operation == {
+            'source': str(photo),
+            'destination': str(tmp_path / "2021" / "a.jpg"),
+            'type': 'copy'
+        }
+
+
+class TestReadPhotoDates:
+    def test_falls_back_to_pillow_without_exiftool(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(organize_photos, "read_exif_batch", lambda paths, tags: None)
+        with_exif = _write_jpeg(tmp_path / "a.jpg", "2020:06:01 10:00:00")
+        from_name = _write_jpeg(tmp_path / "photo_2019-02-03.jpg")
+
+        dates = read_photo_dates([with_exif, from_name])
+
+        assert dates[str(with_exif)] == datetime(2020, 6, 1, 10, 0, 0)
+        assert dates[str(from_name)] == datetime(2019, 2, 3)
+
+    def test_uses_exiftool_results(self, tmp_path, monkeypatch):
+        photo = _write_jpeg(tmp_path / "a.jpg")
+        no_date = _write_jpeg(tmp_path / "photo_2019-02-03.jpg", "2020:06:01 10:00:00")
+        monkeypatch.setattr(organize_photos, "read_exif_batch", lambda paths, tags: {
+            str(photo): {"SourceFile": str(photo), "DateTimeOriginal": "2018:01:02 03:04:05"},
+            str(no_date): {"SourceFile": str(no_date)},
+        })
+
+        dates = read_photo_dates([photo, no_date])
+
+        assert dates[str(photo)] == datetime(2018, 1, 2, 3, 4, 5)
+        assert dates[str(no_date)] == datetime(2019, 2, 3)
@@ -14,7 +14,11 @@ from yaffo.utils.write_metadata import (
     _write_heic_metadata,
     _write_jpeg_metadata,
     _write_png_metadata,
-    _run_exiftool
+    _run_exiftool,
+    PhotoMetadata,
+    write_photos_metadata_batch,
+    metadata_digest,
+    file_fingerprint
 )
 
 
@@ -379,6 +383,64 @@ class TestRunExiftool:
             _run_exiftool(["-version"])
 
 
+class TestWritePhotosMetadataBatch:
+    @patch('yaffo.utils.write_metadata._HAS_EXIFTOOL', True)
+    @patch('yaffo.utils.write_metadata.get_exiftool_session')
+    @patch('yaffo.utils.write_metadata.read_exif_batch')
+    def test_reads_people_once_and_writes_through_session(self, mock_read, mock_session, temp_dir):
+        first = temp_dir / "a.jpg"
+        second = temp_dir / "b.jpg"
+        for path in (first, second):
+            Image.new('RGB', (10, 10)).save(path)
+        mock_read.return_value = {str(first): {"PersonInImage": "alice"}}
+        session = mock_session.return_value
+        session.execute.side_effect = [
+            ("    1 image files updated\n", ""),
+            ("", "Error: File format error - b.jpg\n"),
+        ]
+
+        results = write_photos_metadata_batch([
+            PhotoMetadata(first, date_taken="2024-01-15", people_names=["Alice", "Bob"]),
+            PhotoMetadata(second, location_name="Paris", people_names=["Carol"]),
+        ])
+
+        mock_read.assert_called_once_with([first, second], ["XMP:PersonInImage"])
+        first_args = session.execute.call_args_list[0][0][0]
+        assert "-DateTimeOriginal=2024-01-15 00:00:00" in first_args
+        assert [a for a in first_args if a.startswith("-XMP:PersonInImage")] == [
+            "-XMP:PersonInImage=alice", "-XMP:PersonInImage=Bob"
+        ]
+        assert first_args[-1] == str(first)
+        assert results[first] == (True, None)
+        assert results[second][0] is False
+        assert "File format error" in results[second][1]
+
+    def test_missing_file_is_reported(self, temp_dir):
+        missing = temp_dir / "missing.jpg"
+        results = write_photos_metadata_batch([PhotoMetadata(missing)])
+        assert results[missing][0] is False
+
+
+class TestMetadataDigest:
+    def test_people_order_and_case_do_not_change_digest(self):
+        first = PhotoMetadata(Path("a.jpg"), "2024-01-15", "Paris", ["Alice", "Bob"])
+        second = PhotoMetadata(Path("b.jpg"), "2024-01-15 00:00:00", "Paris", ["bob", "alice"])
+        assert metadata_digest(first) == metadata_digest(second)
+
+    def test_new_person_or_location_changes_digest(self):
+        base = PhotoMetadata(Path("a.jpg"), location_name="Paris", people_names=["Alice"])
+        assert metadata_digest(base) != metadata_digest(
+            PhotoMetadata(Path("a.jpg"), location_name="Paris", people_names=["Alice", "Bob"]))
+        assert metadata_digest(base) != metadata_digest(
+            PhotoMetadata(Path("a.jpg"), location_name="Rome", people_names=["Alice"]))
+
+    def test_file_fingerprint_tracks_content_changes(self, temp_jpeg):
+        before = file_fingerprint(temp_jpeg)
+        temp_jpeg.write_bytes(temp_jpeg.read_bytes() + b"\0")
+        assert file_fingerprint(temp_jpeg) != before
+        assert file_fingerprint(temp_jpeg.parent / "missing.jpg") is None
+
+
 class TestPersonInImageMerging:
     """Tests for merging PersonInImage metadata without duplicates."""
 
@@ -2,15 +2,14 @@ import os
 import logging
 
 from flask import Flask
-from yaffo.db import db
-from yaffo.common import DB_PATH
+from yaffo.db.engine import init_flask_db, DATABASE_URI
 from yaffo.logging_config import get_logger
 from yaffo.template_filters import init_template_filters
 from yaffo.routes.init_routes import init_routes
 
 logger = get_logger(__name__, 'webapp')
 
-def create_app():
+def create_app(database_uri: str = DATABASE_URI):
     app = Flask(__name__)
 
     # Configure werkzeug logger to use our logging system
@@ -22,7 +21,6 @@ def create_app():
     app.logger.setLevel(logger.level)
 
     logger.info("Starting Photo Organizer application")
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SQLALCHEMY_ECHO"] = os.environ.get("SQLALCHEMY_ECHO", "").lower() == "true"
     app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
@@ -34,7 +32,7 @@ def create_app():
     app.config['SESSION_PERMANENT'] = True
     #app.config['SESSION_USE_SIGNER'] = True
 
-    db.init_app(app)
+    init_flask_db(app, database_uri)
 
     # Make url_map available in all templates
     @app.context_processor
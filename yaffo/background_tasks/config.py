@@ -1,7 +1,38 @@
 from yaffo.common import HUEY_DB_PATH
 from huey import SqliteHuey
+
+# IO and database-light work: imports, metadata sync, file operations, auto-assign
 huey = SqliteHuey(
     filename=str(HUEY_DB_PATH),
     immediate=False,
     utc=True,
 )
+
+# CPU-heavy work (face detection, hashing) runs on its own queue and consumer pool,
+# so thousands of queued index batches never sit in front of a quick sync or organize job
+cpu_huey = SqliteHuey(
+    name='cpu',
+    filename=str(HUEY_DB_PATH),
+    immediate=False,
+    utc=True,
+)
+
+# Task priorities per job type, higher runs first within a queue. Combined with
+# batch_priority() the gap between two job types is the number of batches the
+# higher one gets ahead before they interleave.
+PRIORITY_INTERACTIVE = 1000
+PRIORITY_FILE_OPERATIONS = 500
+PRIORITY_METADATA = 500
+PRIORITY_AUTO_ASSIGN = 200
+PRIORITY_BULK = 0
+
+
+def batch_priority(task, batch_index: int) -> int:
+    """
+    Priority for the batch_index-th batch of a job fanned out over `task`.
+
+    Lowering the task's priority by one per batch makes concurrent jobs on the same
+    queue take turns: batch N of a job queued later runs alongside batch N of the
+    earlier one instead of behind all of its remaining batches.
+    """
+    return task.task_class.default_priority - batch_index
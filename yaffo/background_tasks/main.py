@@ -1,7 +1,13 @@
 # main.py
-from yaffo.background_tasks.config import huey  # import the "background_tasks" object.
+import os
+
+from yaffo.background_tasks.config import huey, cpu_huey  # import the "background_tasks" objects, one per consumer pool.
 from yaffo.background_tasks.tasks import index_photo_task  # import any background_tasks / decorated functions
+from yaffo.background_tasks.warmup import PRELOAD_MODELS_ENV, fork_after_load  # registers the worker startup hooks
+
+if os.environ.get(PRELOAD_MODELS_ENV):
+    fork_after_load()
 
 if __name__ == '__main__':
     result = index_photo_task('', [])
-    print('1 + 2 = %s' % result.get(blocking=True))
\ No newline at end of file
+    print('1 + 2 = %s' % result.get(blocking=True))
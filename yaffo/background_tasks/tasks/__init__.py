@@ -1,33 +1,56 @@
-from yaffo.background_tasks.tasks.import_photo import import_photo_task
 from yaffo.background_tasks.tasks.index_photo import index_photo_task
 from yaffo.background_tasks.tasks.auto_assign_faces import auto_assign_faces_task
 from yaffo.background_tasks.tasks.sync_metadata import sync_metadata_task
 from yaffo.background_tasks.tasks.organize_photos import organize_photos_task
-from yaffo.background_tasks.tasks.complete_job import complete_job_task
+from yaffo.background_tasks.tasks.plan_organize import plan_organize_task
+from yaffo.background_tasks.tasks.job_watchdog import job_watchdog_task
 from yaffo.background_tasks.tasks.find_duplicates import find_duplicates_task
 from yaffo.background_tasks.tasks.remove_duplicates import remove_duplicates_task
+from yaffo.background_tasks.tasks.file_operations import rollback_file_operations_task
+from yaffo.background_tasks.tasks.fan_out import fan_out_job_task
+from yaffo.background_tasks.tasks.job_recovery import resume_orphaned_jobs
+
+from yaffo.background_tasks.config import batch_priority
 
 # Re-export utilities for backward compatibility
 from yaffo.background_tasks.utils import (
     get_job_status,
     load_assign_faces_task_data,
-    schedule_job_completion,
+    complete_job_if_finished,
+    clear_job_signal,
+    is_job_cancelled,
+    signal_job_cancelled,
+    record_job_progress,
+    record_task_timing,
+    requeue_job,
+    batch_size_for,
     SessionFactory,
 )
 
 __all__ = [
     # Tasks
-    'import_photo_task',
     'index_photo_task',
     'auto_assign_faces_task',
     'sync_metadata_task',
     'organize_photos_task',
-    'complete_job_task',
+    'plan_organize_task',
+    'job_watchdog_task',
     'find_duplicates_task',
     'remove_duplicates_task',
+    'rollback_file_operations_task',
+    'fan_out_job_task',
+    'resume_orphaned_jobs',
+    'batch_priority',
     # Utilities (for backward compatibility)
     'get_job_status',
     'load_assign_faces_task_data',
-    'schedule_job_completion',
+    'complete_job_if_finished',
+    'clear_job_signal',
+    'is_job_cancelled',
+    'signal_job_cancelled',
+    'record_job_progress',
+    'record_task_timing',
+    'requeue_job',
+    'batch_size_for',
     'SessionFactory',
 ]
\ No newline at end of file
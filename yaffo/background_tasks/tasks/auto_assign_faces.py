@@ -1,55 +1,74 @@
 import json
+import time
+from datetime import datetime
 
-from yaffo.db.models import Job, JobResult, JOB_STATUS_CANCELLED, JOB_STATUS_RUNNING, JOB_STATUS_PENDING
+from yaffo.db.models import JobResult, JOB_STATUS_CANCELLED, JOB_STATUS_RUNNING, JOB_STATUS_PENDING, \
+    JOB_ITEM_STATUS_DONE
+from yaffo.db.repositories.job_item_repository import claim_job_items, job_item_outcome, finish_job_items, \
+    fail_job_items
+from yaffo.db.engine import write_with_retry
 from yaffo.logging_config import get_logger
-from yaffo.background_tasks.config import huey
-from yaffo.background_tasks.utils import SessionFactory, get_job_status, load_assign_faces_task_data
+from yaffo.background_tasks.config import huey, PRIORITY_AUTO_ASSIGN
+from yaffo.background_tasks.utils import SessionFactory, get_job_status, load_assign_faces_task_data, record_job_progress, \
+    record_task_timing
 from yaffo.domain.compare_utils import calculate_similarity
 
 logger = get_logger(__name__, 'background_tasks')
 
 
-@huey.task(context=True)
-def auto_assign_faces_task(job_id: str, face_id_batch: list[int], person_id: int, similarity_threshold: float,
-                           task=None):
+@huey.task(context=True, priority=PRIORITY_AUTO_ASSIGN)
+def auto_assign_faces_task(job_id: str, first_item_id: int, last_item_id: int, person_id: int,
+                           similarity_threshold: float, task=None):
     """Huey task to auto-assign faces to a person based on similarity threshold."""
-    logger.info(f"Starting auto_assign_faces_task for job {job_id} with {len(face_id_batch)} faces. task = {task}")
+    started = time.perf_counter()
+    started_at = datetime.utcnow()
+    logger.info(
+        f"Starting auto_assign_faces_task for job {job_id} with items {first_item_id}-{last_item_id}. task = {task}"
+    )
     error_count = 0
     job_status = get_job_status(job_id)
     if job_status == JOB_STATUS_CANCELLED:
         return
 
-    person, faces = load_assign_faces_task_data(person_id, face_id_batch)
+    session = SessionFactory()
+    try:
+        job_items = write_with_retry(session, lambda: claim_job_items(session, job_id, first_item_id, last_item_id))
+    finally:
+        session.close()
+        SessionFactory.remove()
+
+    person, faces = load_assign_faces_task_data(person_id, [int(job_item.item_key) for job_item in job_items])
     similarities = calculate_similarity(person, faces)
     matches = [
         {'face_id': face_id, 'similarity': similarity}
         for face_id, similarity in similarities.items()
         if similarity >= similarity_threshold
     ]
-    processed_count = len(face_id_batch)
+    processed_count = len(job_items)
 
     session = SessionFactory()
     try:
-        job_result = JobResult(job_id=job_id, huey_task_id=task.id, result_data=json.dumps({'matches': matches}))
-        session.add(job_result)
-        update_job_params = {
-            'error_count': Job.error_count + error_count,
-            'completed_count': Job.completed_count + processed_count,
-        }
+        update_job_params = {}
         if job_status == JOB_STATUS_PENDING:
             update_job_params['status'] = JOB_STATUS_RUNNING
 
-        session.query(Job).filter_by(id=job_id).update(update_job_params)
-        session.commit()
-        logger.info(f"Completed job {job_id} batch: processed={len(face_id_batch)}, matches={len(matches)}")
+        def save_batch():
+            session.add(JobResult(job_id=job_id, huey_task_id=task.id, result_data=json.dumps({'matches': matches})))
+            finish_job_items(session, [
+                job_item_outcome(job_item, JOB_ITEM_STATUS_DONE, started_at) for job_item in job_items
+            ])
+            record_task_timing(session, 'auto_assign_faces', processed_count, time.perf_counter() - started)
+            record_job_progress(session, job_id, completed=processed_count, errors=error_count, **update_job_params)
+
+        write_with_retry(session, save_batch)
+        logger.info(f"Completed job {job_id} batch: processed={processed_count}, matches={len(matches)}")
 
     except Exception as e:
         logger.error(f"Error in auto_assign_faces_task for job {job_id}: {e}", exc_info=True)
         session.rollback()
-        session.query(Job).filter_by(id=job_id).update({
-            'error_count': Job.error_count + len(face_id_batch)
-        })
+        failed_count = fail_job_items(session, job_id, first_item_id, last_item_id, str(e))
+        record_job_progress(session, job_id, errors=failed_count)
         session.commit()
     finally:
         session.close()
-        SessionFactory.remove()
\ No newline at end of file
+        SessionFactory.remove()
@@ -0,0 +1,93 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from huey.api import TaskWrapper
+
+from yaffo.db.models import Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_FAILED
+from yaffo.db.repositories.job_item_repository import count_pending_job_items, next_job_item_range
+from yaffo.logging_config import get_logger
+from yaffo.background_tasks.config import huey, batch_priority, PRIORITY_INTERACTIVE
+from yaffo.background_tasks.utils import SessionFactory, batch_size_for, is_job_cancelled
+from yaffo.background_tasks.tasks.index_photo import index_photo_task
+from yaffo.background_tasks.tasks.sync_metadata import sync_metadata_task
+from yaffo.background_tasks.tasks.auto_assign_faces import auto_assign_faces_task
+
+logger = get_logger(__name__, 'background_tasks')
+
+# Batches a job may have queued but not finished, the fan-out waits for room before adding more
+FAN_OUT_WINDOW_BATCHES = 16
+FAN_OUT_POLL_SECONDS = 2
+
+
+@dataclass(frozen=True)
+class FanOut:
+    """How to split a job's items into batch tasks, each task gets a first and last item id."""
+    task: TaskWrapper
+    default_batch_size: int
+    # job_data values passed unchanged to every batch
+    task_kwargs: tuple[str, ...] = ()
+
+
+FAN_OUT_JOBS = {
+    'index_photos': FanOut(index_photo_task, 10),
+    'sync_metadata': FanOut(sync_metadata_task, 200),
+    'auto_assign_faces': FanOut(auto_assign_faces_task, 100, task_kwargs=('person_id', 'similarity_threshold')),
+}
+
+
+@huey.task(priority=PRIORITY_INTERACTIVE)
+def fan_out_job_task(job_id: str, after_item_id: int = 0, batch_size: int | None = None, batch_index: int = 0):
+    """
+    Enqueue a job's batches progressively instead of all at once from the request.
+
+    Each run tops the job up to FAN_OUT_WINDOW_BATCHES unfinished batches of its pending
+    job items, then reschedules itself with the last item id queued until every item is.
+    """
+    session = SessionFactory()
+    try:
+        job = session.get(Job, job_id)
+        if job is None or job.status not in (JOB_STATUS_PENDING, JOB_STATUS_RUNNING) or is_job_cancelled(job_id):
+            return
+
+        fan_out = FAN_OUT_JOBS[job.name]
+        if batch_size is None:
+            batch_size = batch_size_for(session, job.name, count_pending_job_items(session, job_id),
+                                        default=fan_out.default_batch_size)
+        job_data = json.loads(job.job_data) if job.job_data else {}
+        task_kwargs = {name: job_data[name] for name in fan_out.task_kwargs}
+
+        # Items up to after_item_id that are still pending sit in batches already queued
+        unfinished = count_pending_job_items(session, job_id, through_item_id=after_item_id)
+        first_batch_index = batch_index
+        while unfinished < FAN_OUT_WINDOW_BATCHES * batch_size:
+            item_range = next_job_item_range(session, job_id, after_item_id, batch_size)
+            if item_range is None:
+                logger.debug(f"Fan-out for job {job_id} finished after {batch_index} batches")
+                return
+            first_item_id, after_item_id = item_range
+            fan_out.task(
+                job_id=job_id,
+                first_item_id=first_item_id,
+                last_item_id=after_item_id,
+                **task_kwargs,
+                priority=batch_priority(fan_out.task, batch_index)
+            )
+            batch_index += 1
+            unfinished += batch_size
+
+        logger.debug(f"Fan-out for job {job_id} enqueued {batch_index - first_batch_index} batches")
+        fan_out_job_task.schedule(args=(job_id, after_item_id, batch_size, batch_index), delay=FAN_OUT_POLL_SECONDS)
+
+    except Exception as e:
+        logger.error(f"Error in fan_out_job_task for job {job_id}: {e}", exc_info=True)
+        session.rollback()
+        session.query(Job).filter_by(id=job_id).update({
+            'status': JOB_STATUS_FAILED,
+            'error': f"Failed to enqueue batches: {e}",
+            'completed_at': datetime.utcnow()
+        }, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+        SessionFactory.remove()
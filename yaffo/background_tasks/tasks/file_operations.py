@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from yaffo.db.models import Job, JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED, JOB_STATUS_FAILED
+from yaffo.logging_config import get_logger
+from yaffo.background_tasks.config import huey, PRIORITY_FILE_OPERATIONS
+from yaffo.background_tasks.utils import SessionFactory
+from yaffo.utils.file_operations import rollback_file_operations
+
+logger = get_logger(__name__, 'background_tasks')
+
+
+@huey.task(priority=PRIORITY_FILE_OPERATIONS)
+def rollback_file_operations_task(job_id: str, source_job_id: str):
+    """Huey task to undo the journaled moves and copies of source_job_id."""
+    logger.info(f"Starting rollback_file_operations_task for job {job_id} (rolling back {source_job_id})")
+
+    session = SessionFactory()
+    try:
+        session.query(Job).filter_by(id=job_id).update({
+            'status': JOB_STATUS_RUNNING,
+            'started_at': datetime.utcnow()
+        })
+        session.commit()
+
+        rolled_back, failed = rollback_file_operations(session, source_job_id)
+        session.query(Job).filter_by(id=job_id).update({
+            'completed_count': rolled_back,
+            'error_count': failed,
+            'status': JOB_STATUS_COMPLETED,
+            'completed_at': datetime.utcnow()
+        })
+        session.commit()
+        logger.info(f"Completed job {job_id}: rolled_back={rolled_back}, errors={failed}")
+    except Exception as e:
+        logger.error(f"Error in rollback_file_operations_task for job {job_id}: {e}", exc_info=True)
+        session.rollback()
+        session.query(Job).filter_by(id=job_id).update({
+            'status': JOB_STATUS_FAILED,
+            'error': str(e)
+        })
+        session.commit()
+    finally:
+        session.close()
+        SessionFactory.remove()
@@ -1,24 +1,25 @@
 from pathlib import Path
 import json
 from collections import defaultdict
-import imagehash
 
 from yaffo.db.models import Job, JobResult, JOB_STATUS_CANCELLED, JOB_STATUS_RUNNING, JOB_STATUS_PENDING, \
     JOB_STATUS_COMPLETED
 from yaffo.logging_config import get_logger
-from yaffo.background_tasks.config import huey
-from yaffo.background_tasks.utils import SessionFactory, get_job_status
-from yaffo.utils.image import image_from_path
+from yaffo.background_tasks.config import cpu_huey, PRIORITY_INTERACTIVE
+from yaffo.background_tasks.utils import SessionFactory, get_job_status, is_job_cancelled
+from yaffo.utils.image import image_from_path_reduced, PHASH_DECODE_SIZE
+from yaffo.utils.lazy_import import lazy_import
+
+imagehash = lazy_import("imagehash")
 
 logger = get_logger(__name__, 'background_tasks')
 
 
-@huey.task(context=True)
+@cpu_huey.task(context=True, priority=PRIORITY_INTERACTIVE)
 def find_duplicates_task(job_id: str, file_paths: list[str], task=None):
     """Huey task to find duplicate photos using perceptual hashing."""
     logger.info(f"Starting find_duplicates_task for job {job_id} with {len(file_paths)} files")
 
-    check_cancel_frequency = 10
     hashes = defaultdict(list)
     processed_count = 0
     error_count = 0
@@ -41,15 +42,13 @@ def find_duplicates_task(job_id: str, file_paths: list[str], task=None):
         SessionFactory.remove()
 
     for index, file_path in enumerate(file_paths):
-        if index > 0 and index % check_cancel_frequency == 0:
-            job_status = get_job_status(job_id)
-            if job_status == JOB_STATUS_CANCELLED:
-                logger.info(f"Job {job_id} cancelled at file {index}/{len(file_paths)}")
-                cancel_count = len(file_paths) - index
-                break
+        if is_job_cancelled(job_id):
+            logger.info(f"Job {job_id} cancelled at file {index}/{len(file_paths)}")
+            cancel_count = len(file_paths) - index
+            break
 
         try:
-            image = image_from_path(Path(file_path))
+            image = image_from_path_reduced(Path(file_path), PHASH_DECODE_SIZE)
             hash_value = imagehash.phash(image)
             hashes[str(hash_value)].append(file_path)
             processed_count += 1
@@ -57,7 +56,9 @@ def find_duplicates_task(job_id: str, file_paths: list[str], task=None):
             logger.warning(f"Failed to hash {file_path}: {e}")
             error_count += 1
 
-        if (index + 1) % 50 == 0:
+        # The final count is written together with the result, a progress update reporting every
+        # file would let complete_job_if_finished (the job watchdog) finish the job without it
+        if (index + 1) % 50 == 0 and index + 1 < len(file_paths):
             session = SessionFactory()
             try:
                 session.query(Job).filter_by(id=job_id).update({
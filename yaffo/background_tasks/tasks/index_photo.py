@@ -1,48 +1,42 @@
+import time
+from datetime import datetime
 from pathlib import Path
 
 from yaffo.db.models import Job, Photo, Face, Tag, JOB_STATUS_CANCELLED, FACE_STATUS_UNASSIGNED, \
-    JOB_STATUS_RUNNING, JOB_STATUS_PENDING, PHOTO_STATUS_INDEXED
+    JOB_STATUS_RUNNING, JOB_STATUS_PENDING, PHOTO_STATUS_INDEXED, JOB_ITEM_STATUS_DONE, JOB_ITEM_STATUS_FAILED, \
+    JOB_ITEM_STATUS_CANCELLED
+from yaffo.db.repositories.job_item_repository import claim_job_items, job_item_outcome, finish_job_items, \
+    fail_job_items
+from yaffo.db.engine import write_with_retry
+from yaffo.db.repositories.photos_repository import insert_photos
 from yaffo.utils.index_photos import index_photo
 from yaffo.common import THUMBNAIL_DIR
 from yaffo.logging_config import get_logger
-from yaffo.background_tasks.config import huey
-from yaffo.background_tasks.utils import SessionFactory, get_job_status
+from yaffo.background_tasks.config import cpu_huey, PRIORITY_BULK
+from yaffo.background_tasks.utils import SessionFactory, get_job_status, is_job_cancelled, record_job_progress, \
+    record_task_timing
 
 logger = get_logger(__name__, 'background_tasks')
 
 
-@huey.task()
-def index_photo_task(job_id: str, file_path_batch: list[str]):
-    """Huey task to index photos - detect faces, extract tags, etc."""
-    logger.info(f"Starting index_photo_task for job {job_id} with {len(file_path_batch)} files")
+@cpu_huey.task(priority=PRIORITY_BULK)
+def index_photo_task(job_id: str, first_item_id: int, last_item_id: int):
+    """
+    Huey task to index photos - detect faces, extract tags, etc.
+
+    Photos without a row yet get one in the same transaction as their index results,
+    so a library sync is a single index job rather than an import job followed by one.
+    """
+    started = time.perf_counter()
+    logger.info(f"Starting index_photo_task for job {job_id} with items {first_item_id}-{last_item_id}")
     processed_results = []
+    outcomes = []
     error_count = 0
     cancel_count = 0
-    check_cancel_frequency = 5
     job_status = get_job_status(job_id)
     if job_status == JOB_STATUS_CANCELLED:
         return
 
-    for index, file_path in enumerate(file_path_batch):
-        if index > 0 and index % check_cancel_frequency == 0:
-            job_status = get_job_status(job_id)
-            if job_status == JOB_STATUS_CANCELLED:
-                logger.info(f"Job {job_id} cancelled at photo {index}/{len(file_path_batch)}")
-                cancel_count = len(file_path_batch) - index
-                break
-
-        logger.debug(f"Processing photo {file_path}")
-        index_results = index_photo(Path(file_path), THUMBNAIL_DIR)
-        if index_results is None:
-            logger.warning(f"Failed to process faces for photo {file_path}")
-            error_count += 1
-            continue
-
-        processed_results.append({
-            'full_file_path': file_path,
-            'index_results': index_results,
-        })
-
     session = SessionFactory()
     try:
         job = session.query(Job).filter_by(id=job_id).first()
@@ -50,7 +44,34 @@ def index_photo_task(job_id: str, file_path_batch: list[str]):
             logger.error(f"Job {job_id} not found")
             return
 
-        photos_in_batch = session.query(Photo).filter(Photo.full_file_path.in_(file_path_batch)).all()
+        items = write_with_retry(session, lambda: claim_job_items(session, job_id, first_item_id, last_item_id))
+        for index, item in enumerate(items):
+            item_started = datetime.utcnow()
+            if is_job_cancelled(job_id):
+                logger.info(f"Job {job_id} cancelled at photo {index}/{len(items)}")
+                cancel_count = len(items) - index
+                outcomes.extend(job_item_outcome(i, JOB_ITEM_STATUS_CANCELLED, item_started) for i in items[index:])
+                break
+
+            file_path = item.item_key
+            logger.debug(f"Processing photo {file_path}")
+            index_results = index_photo(Path(file_path), THUMBNAIL_DIR)
+            if index_results is None:
+                logger.warning(f"Failed to process faces for photo {file_path}")
+                error_count += 1
+                outcomes.append(job_item_outcome(item, JOB_ITEM_STATUS_FAILED, item_started, "Failed to index photo"))
+                continue
+
+            processed_results.append({
+                'item': item,
+                'item_started': item_started,
+                'full_file_path': file_path,
+                'index_results': index_results,
+            })
+
+        file_paths = [result["full_file_path"] for result in processed_results]
+        insert_photos(session, file_paths)
+        photos_in_batch = session.query(Photo).filter(Photo.full_file_path.in_(file_paths)).all()
         processed_count = 0
 
         for result in processed_results:
@@ -61,10 +82,13 @@ def index_photo_task(job_id: str, file_path_batch: list[str]):
             longitude = index_results["longitude"]
             location_name = index_results["location_name"]
             tags = index_results["tags"]
-            photo = next(photo for photo in photos_in_batch if photo.full_file_path == full_file_path)
+            photo = next((photo for photo in photos_in_batch if photo.full_file_path == full_file_path), None)
             if photo is None:
                 logger.error(f"Failed to find photo in db for {full_file_path}")
                 error_count += 1
+                outcomes.append(job_item_outcome(
+                    result["item"], JOB_ITEM_STATUS_FAILED, result["item_started"], "Photo not imported"
+                ))
                 continue
             photo.latitude = latitude
             photo.longitude = longitude
@@ -95,15 +119,17 @@ def index_photo_task(job_id: str, file_path_batch: list[str]):
                 )
                 session.add(face)
             processed_count += 1
+            outcomes.append(job_item_outcome(result["item"], JOB_ITEM_STATUS_DONE, result["item_started"]))
 
-        update_job_params = {
-            'cancelled_count': Job.cancelled_count + cancel_count,
-            'completed_count': Job.completed_count + processed_count,
-            'error_count': Job.error_count + error_count,
-        }
+        update_job_params = {}
         if job_status == JOB_STATUS_PENDING:
             update_job_params['status'] = JOB_STATUS_RUNNING
-        session.query(Job).filter_by(id=job_id).update(update_job_params)
+        finish_job_items(session, outcomes)
+        record_task_timing(session, 'index_photos', len(items) - cancel_count, time.perf_counter() - started)
+        record_job_progress(
+            session, job_id, completed=processed_count, errors=error_count, cancelled=cancel_count,
+            **update_job_params
+        )
         session.commit()
         logger.info(
             f"Completed job {job_id} batch: processed={processed_count}, errors={error_count}, cancelled={cancel_count}")
@@ -111,9 +137,8 @@ def index_photo_task(job_id: str, file_path_batch: list[str]):
     except Exception as e:
         logger.error(f"Error in index_photo_task for job {job_id}: {e}", exc_info=True)
         session.rollback()
-        session.query(Job).filter_by(id=job_id).update({
-            'error_count': Job.error_count + len(file_path_batch)
-        })
+        failed_count = fail_job_items(session, job_id, first_item_id, last_item_id, str(e))
+        record_job_progress(session, job_id, errors=failed_count)
         session.commit()
     finally:
         session.close()
@@ -0,0 +1,67 @@
+from datetime import datetime
+from itertools import chain
+
+from huey import SqliteHuey
+
+from yaffo.db.models import Job, JobItem, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_ITEM_STATUS_RUNNING
+from yaffo.logging_config import get_logger
+from yaffo.background_tasks.config import huey, cpu_huey
+from yaffo.background_tasks.utils import SessionFactory, requeue_job
+from yaffo.background_tasks.tasks.fan_out import FAN_OUT_JOBS, fan_out_job_task
+
+logger = get_logger(__name__, 'background_tasks')
+
+
+def queued_job_ids() -> set[str]:
+    """Job ids of every task still waiting in either huey queue or schedule."""
+    job_ids = set()
+    for task in chain(huey.pending(), huey.scheduled(), cpu_huey.pending(), cpu_huey.scheduled()):
+        job_id = task.kwargs.get('job_id') if task.kwargs else None
+        if job_id is None and task.args:
+            job_id = task.args[0]
+        job_ids.add(job_id)
+    return job_ids
+
+
+def resume_orphaned_jobs(queue: SqliteHuey) -> list[str]:
+    """
+    Pick up batched jobs that lost work when the consumer for `queue` went down.
+
+    Run before that consumer starts, so any item still RUNNING for one of its jobs
+    belonged to a batch that died with the previous consumer. Those items, and jobs
+    with pending items but nothing left in the queue to process them, are requeued
+    and get a fresh fan-out. Everything committed by earlier batches is kept, a crash
+    costs at most the batches that were in flight. Returns the resumed job ids.
+    """
+    job_names = [name for name, fan_out in FAN_OUT_JOBS.items() if fan_out.task.huey is queue]
+    running_before = datetime.utcnow()
+    resumed_job_ids = []
+
+    session = SessionFactory()
+    try:
+        jobs = session.query(Job).filter(
+            Job.name.in_(job_names),
+            Job.status.in_([JOB_STATUS_PENDING, JOB_STATUS_RUNNING])
+        ).all()
+        if not jobs:
+            return resumed_job_ids
+
+        queued = queued_job_ids()
+        for job in jobs:
+            has_running_items = session.query(JobItem.id).filter(
+                JobItem.job_id == job.id,
+                JobItem.status == JOB_ITEM_STATUS_RUNNING
+            ).first() is not None
+            if not has_running_items and job.id in queued:
+                continue
+
+            pending_count = requeue_job(session, job.id, running_before=running_before)
+            session.commit()
+            if pending_count:
+                fan_out_job_task(job.id)
+            resumed_job_ids.append(job.id)
+            logger.info(f"Resumed orphaned job {job.id} ({job.name}) with {pending_count} pending items")
+    finally:
+        session.close()
+        SessionFactory.remove()
+    return resumed_job_ids
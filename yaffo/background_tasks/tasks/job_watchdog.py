@@ -0,0 +1,95 @@
+import time
+from datetime import datetime, timedelta
+
+from huey import crontab
+
+from yaffo.common import JOB_SIGNALS_DIR
+from yaffo.db.models import Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_FAILED
+from yaffo.logging_config import get_logger
+from yaffo.background_tasks.config import huey, PRIORITY_INTERACTIVE
+from yaffo.background_tasks.utils import SessionFactory, complete_job_if_finished, requeue_job
+from yaffo.background_tasks.tasks.fan_out import FAN_OUT_JOBS, fan_out_job_task
+from yaffo.background_tasks.tasks.job_recovery import queued_job_ids
+
+logger = get_logger(__name__, 'background_tasks')
+
+JOB_STALL_TIMEOUT = timedelta(minutes=30)
+
+
+def _remove_old_job_signals():
+    """Cancel flags only matter to batches that were running at the time, drop them once those are long gone."""
+    if not JOB_SIGNALS_DIR.exists():
+        return
+    expires_before = time.time() - JOB_STALL_TIMEOUT.total_seconds()
+    for signal_path in JOB_SIGNALS_DIR.glob("*.cancel"):
+        try:
+            if signal_path.stat().st_mtime < expires_before:
+                signal_path.unlink()
+        except OSError:
+            pass
+
+
+@huey.periodic_task(crontab(minute='*'), priority=PRIORITY_INTERACTIVE)
+def job_watchdog_task():
+    """
+    Periodic safety net for jobs no task will finish.
+
+    Jobs normally complete from the task whose progress update reports their last item
+    (see record_job_progress). This only catches jobs whose counters already add up
+    without a task left to notice, and jobs that made no progress for JOB_STALL_TIMEOUT
+    with nothing of theirs left in the queue, e.g. after a worker was killed mid-batch.
+    Batched jobs are resumed from their job items; the others are marked FAILED rather
+    than COMPLETED so the UI doesn't report missing work as done.
+    """
+    _remove_old_job_signals()
+
+    session = SessionFactory()
+    try:
+        active_job_ids = [
+            job_id for (job_id,) in
+            session.query(Job.id).filter(Job.status.in_([JOB_STATUS_PENDING, JOB_STATUS_RUNNING]))
+        ]
+        for job_id in active_job_ids:
+            if complete_job_if_finished(session, job_id):
+                logger.info(f"Watchdog completed job {job_id}")
+        session.commit()
+
+        stalled_before = datetime.utcnow() - JOB_STALL_TIMEOUT
+        stalled_jobs = session.query(Job).filter(
+            Job.status.in_([JOB_STATUS_PENDING, JOB_STATUS_RUNNING]),
+            Job.updated_at < stalled_before
+        ).all()
+        if not stalled_jobs:
+            return
+
+        queued = queued_job_ids()
+        for job in stalled_jobs:
+            if job.id in queued:
+                continue
+            if job.name in FAN_OUT_JOBS:
+                pending_count = requeue_job(session, job.id, running_before=stalled_before)
+                session.commit()
+                if pending_count:
+                    fan_out_job_task(job.id)
+                logger.warning(f"Watchdog resumed stalled job {job.id} with {pending_count} pending items")
+                continue
+            finished = job.completed_count + job.error_count + job.cancelled_count
+            # Conditional on updated_at so a batch that reported since the query above wins
+            failed = session.query(Job).filter(
+                Job.id == job.id,
+                Job.status.in_([JOB_STATUS_PENDING, JOB_STATUS_RUNNING]),
+                Job.updated_at < stalled_before
+            ).update({
+                'status': JOB_STATUS_FAILED,
+                'error': f"Stalled after {finished}/{job.task_count} tasks with nothing left in the queue",
+                'completed_at': datetime.utcnow()
+            }, synchronize_session=False)
+            if failed:
+                logger.warning(f"Watchdog failed stalled job {job.id}: {finished}/{job.task_count} tasks finished")
+        session.commit()
+    except Exception as e:
+        logger.error(f"Error in job_watchdog_task: {e}", exc_info=True)
+        session.rollback()
+    finally:
+        session.close()
+        SessionFactory.remove()
@@ -0,0 +1,131 @@
+from datetime import datetime
+from pathlib import Path
+import json
+
+from yaffo.db.models import Job, JobResult, Photo, JOB_STATUS_CANCELLED, JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED, \
+    PHOTO_STATUS_IMPORTED
+from yaffo.logging_config import get_logger
+from yaffo.background_tasks.config import huey, PRIORITY_INTERACTIVE
+from yaffo.background_tasks.utils import SessionFactory, get_job_status, is_job_cancelled
+from yaffo.utils.organize_photos import read_photo_dates, plan_file_operation
+
+logger = get_logger(__name__, 'background_tasks')
+
+# Planned operations are stored in JobResult rows of exactly this many entries (the last one may be
+# shorter) so the preview page can find a page by chunk index without loading the whole plan.
+PLAN_CHUNK_SIZE = 500
+PLAN_BATCH_SIZE = 500
+
+
+def load_indexed_dates(file_paths: list[str]) -> dict[str, datetime | None]:
+    """Return date_taken for files that have already been indexed, keyed by path."""
+    session = SessionFactory()
+    try:
+        dates = {}
+        for start in range(0, len(file_paths), PLAN_BATCH_SIZE):
+            rows = session.query(Photo.full_file_path, Photo.date_taken).filter(
+                Photo.full_file_path.in_(file_paths[start:start + PLAN_BATCH_SIZE]),
+                Photo.status != PHOTO_STATUS_IMPORTED
+            ).all()
+            for full_file_path, date_taken in rows:
+                dates[full_file_path] = datetime.fromisoformat(date_taken) if date_taken else None
+        return dates
+    finally:
+        session.close()
+        SessionFactory.remove()
+
+
+@huey.task(context=True, priority=PRIORITY_INTERACTIVE)
+def plan_organize_task(
+        job_id: str,
+        file_paths: list[str],
+        target_directory: str,
+        pattern: str,
+        operation_type: str,
+        task=None
+):
+    """Huey task to work out where organize_photos would put each file, without touching any files."""
+    logger.info(f"Starting plan_organize_task for job {job_id} with {len(file_paths)} files")
+
+    if get_job_status(job_id) == JOB_STATUS_CANCELLED:
+        return
+
+    target_path = Path(target_directory)
+    indexed_dates = load_indexed_dates(file_paths)
+    logger.info(f"Job {job_id}: {len(indexed_dates)}/{len(file_paths)} dates loaded from the database")
+
+    planned = []
+    chunk_index = 0
+    files_to_move = 0
+    processed_count = 0
+
+    session = SessionFactory()
+    try:
+        session.query(Job).filter_by(id=job_id).update({'status': JOB_STATUS_RUNNING})
+        session.commit()
+
+        for start in range(0, len(file_paths), PLAN_BATCH_SIZE):
+            if is_job_cancelled(job_id):
+                logger.info(f"Job {job_id} cancelled at file {start}/{len(file_paths)}")
+                return
+
+            batch = [Path(p) for p in file_paths[start:start + PLAN_BATCH_SIZE]]
+            unindexed = [p for p in batch if str(p) not in indexed_dates]
+            read_dates = read_photo_dates(unindexed) if unindexed else {}
+
+            for photo_file in batch:
+                key = str(photo_file)
+                date_taken = indexed_dates[key] if key in indexed_dates else read_dates.get(key)
+                operation = plan_file_operation(photo_file, date_taken, target_path, pattern, operation_type)
+                if operation is not None:
+                    planned.append(operation)
+            processed_count += len(batch)
+
+            while len(planned) >= PLAN_CHUNK_SIZE:
+                session.add(JobResult(
+                    job_id=job_id,
+                    huey_task_id=f"{task.id}-{chunk_index}",
+                    result_data=json.dumps(planned[:PLAN_CHUNK_SIZE])
+                ))
+                files_to_move += PLAN_CHUNK_SIZE
+                planned = planned[PLAN_CHUNK_SIZE:]
+                chunk_index += 1
+
+            # The final count is written together with the summary, so the job never looks
+            # finished before the whole plan has been stored
+            if processed_count < len(file_paths):
+                session.query(Job).filter_by(id=job_id).update({'completed_count': processed_count})
+            session.commit()
+
+        if planned:
+            session.add(JobResult(
+                job_id=job_id,
+                huey_task_id=f"{task.id}-{chunk_index}",
+                result_data=json.dumps(planned)
+            ))
+            files_to_move += len(planned)
+
+        job = session.query(Job).filter_by(id=job_id).first()
+        job_data = json.loads(job.job_data) if job.job_data else {}
+        job_data.update({
+            'total_files': len(file_paths),
+            'files_to_move': files_to_move,
+            'files_staying': len(file_paths) - files_to_move,
+        })
+        job.job_data = json.dumps(job_data)
+        job.completed_count = processed_count
+        job.status = JOB_STATUS_COMPLETED
+        session.commit()
+        logger.info(f"Completed job {job_id}: files={len(file_paths)}, files_to_move={files_to_move}")
+
+    except Exception as e:
+        logger.error(f"Error in plan_organize_task for job {job_id}: {e}", exc_info=True)
+        session.rollback()
+        session.query(Job).filter_by(id=job_id).update({
+            'error_count': len(file_paths) - processed_count,
+            'error': str(e)
+        })
+        session.commit()
+    finally:
+        session.close()
+        SessionFactory.remove()
@@ -1,25 +1,34 @@
+import time
+from datetime import datetime
 from pathlib import Path
 from sqlalchemy.orm import joinedload
 
-from yaffo.db.models import Job, Photo, Face, JOB_STATUS_CANCELLED, JOB_STATUS_RUNNING, JOB_STATUS_PENDING, \
-    PHOTO_STATUS_SYNCED
+from yaffo.db.models import Photo, Face, PhotoMetadataChange, JOB_STATUS_CANCELLED, JOB_STATUS_RUNNING, \
+    JOB_STATUS_PENDING, PHOTO_STATUS_SYNCED, JOB_ITEM_STATUS_DONE, JOB_ITEM_STATUS_FAILED, JOB_ITEM_STATUS_CANCELLED
+from yaffo.db.repositories.job_item_repository import claim_job_items, job_item_outcome, finish_job_items, \
+    fail_job_items
+from yaffo.db.engine import write_with_retry
+from yaffo.db.repositories.metadata_change_repository import clear_dirty_photos
 from yaffo.logging_config import get_logger
-from yaffo.background_tasks.config import huey
-from yaffo.background_tasks.utils import SessionFactory, get_job_status
+from yaffo.background_tasks.config import huey, PRIORITY_METADATA
+from yaffo.background_tasks.utils import SessionFactory, get_job_status, is_job_cancelled, record_job_progress, \
+    record_task_timing
 
 logger = get_logger(__name__, 'background_tasks')
 
 
-@huey.task()
-def sync_metadata_task(job_id: str, photo_id_batch: list[int]):
+@huey.task(priority=PRIORITY_METADATA)
+def sync_metadata_task(job_id: str, first_item_id: int, last_item_id: int):
     """Huey task to sync metadata to photo files."""
-    from yaffo.utils.write_metadata import write_photo_metadata
+    from yaffo.utils.write_metadata import PhotoMetadata, write_photos_metadata_batch, metadata_digest, \
+        file_fingerprint
 
-    logger.info(f"Starting sync_metadata_task for job {job_id} with {len(photo_id_batch)} photos")
+    started = time.perf_counter()
+    logger.info(f"Starting sync_metadata_task for job {job_id} with items {first_item_id}-{last_item_id}")
     processed_count = 0
+    skipped_count = 0
     error_count = 0
     cancel_count = 0
-    check_cancel_frequency = 5
 
     job_status = get_job_status(job_id)
     if job_status == JOB_STATUS_CANCELLED:
@@ -27,23 +36,43 @@ def sync_metadata_task(job_id: str, photo_id_batch: list[int]):
 
     session = SessionFactory()
     try:
+        read_at = datetime.utcnow()
+        job_items = write_with_retry(session, lambda: claim_job_items(session, job_id, first_item_id, last_item_id))
+        job_items_by_photo_id = {int(job_item.item_key): job_item for job_item in job_items}
         photos = session.query(Photo).options(
             joinedload(Photo.faces).joinedload(Face.people)
-        ).filter(Photo.id.in_(photo_id_batch)).all()
+        ).filter(Photo.id.in_(list(job_items_by_photo_id))).all()
         success_photo_ids = []
+        items = []
+        photos_by_path = {}
+        digests_by_path = {}
+        outcomes = []
+
+        for photo_id in job_items_by_photo_id.keys() - {photo.id for photo in photos}:
+            logger.warning(f"Photo {photo_id} no longer exists")
+            error_count += 1
+            outcomes.append(job_item_outcome(
+                job_items_by_photo_id[photo_id], JOB_ITEM_STATUS_FAILED, read_at, "Photo not found"
+            ))
 
         for index, photo in enumerate(photos):
-            if index > 0 and index % check_cancel_frequency == 0:
-                job_status = get_job_status(job_id)
-                if job_status == JOB_STATUS_CANCELLED:
-                    logger.info(f"Job {job_id} cancelled at photo {index}/{len(photos)}")
-                    cancel_count = len(photos) - index
-                    break
+            if is_job_cancelled(job_id):
+                logger.info(f"Job {job_id} cancelled at photo {index}/{len(photos)}")
+                cancel_count = len(photos) - index
+                outcomes.extend(
+                    job_item_outcome(job_items_by_photo_id[p.id], JOB_ITEM_STATUS_CANCELLED, read_at)
+                    for p in photos[index:]
+                )
+                break
 
             photo_path = Path(photo.full_file_path)
-            if not photo_path.exists():
+            fingerprint = file_fingerprint(photo_path)
+            if fingerprint is None:
                 logger.warning(f"Photo file not found: {photo_path}")
                 error_count += 1
+                outcomes.append(job_item_outcome(
+                    job_items_by_photo_id[photo.id], JOB_ITEM_STATUS_FAILED, read_at, "File not found"
+                ))
                 continue
 
             people_names = []
@@ -54,43 +83,69 @@ def sync_metadata_task(job_id: str, photo_id_batch: list[int]):
 
             people_names = list(set(people_names))
 
-            success, error = write_photo_metadata(
+            item = PhotoMetadata(
                 photo_path=photo_path,
                 date_taken=photo.date_taken,
                 location_name=photo.location_name,
                 people_names=people_names if people_names else None
             )
+            digest = metadata_digest(item)
+            # Nothing to write when we already wrote this metadata and the file hasn't changed since
+            if photo.metadata_digest == digest and photo.file_fingerprint == fingerprint:
+                success_photo_ids.append(photo.id)
+                processed_count += 1
+                skipped_count += 1
+                outcomes.append(job_item_outcome(job_items_by_photo_id[photo.id], JOB_ITEM_STATUS_DONE, read_at))
+                continue
+
+            items.append(item)
+            photos_by_path[photo_path] = photo
+            digests_by_path[photo_path] = digest
 
+        for photo_path, (success, error) in write_photos_metadata_batch(items).items():
+            photo = photos_by_path[photo_path]
             if success:
+                photo.metadata_digest = digests_by_path[photo_path]
+                photo.file_fingerprint = file_fingerprint(photo_path)
                 success_photo_ids.append(photo.id)
                 processed_count += 1
+                outcomes.append(job_item_outcome(job_items_by_photo_id[photo.id], JOB_ITEM_STATUS_DONE, read_at))
                 logger.debug(f"Successfully synced metadata for {photo_path}")
             else:
                 error_count += 1
+                outcomes.append(job_item_outcome(
+                    job_items_by_photo_id[photo.id], JOB_ITEM_STATUS_FAILED, read_at, error
+                ))
                 logger.warning(f"Failed to sync metadata for {photo_path}: {error}")
 
-        update_job_params = {
-            'completed_count': Job.completed_count + processed_count,
-            'error_count': Job.error_count + error_count,
-            'cancelled_count': Job.cancelled_count + cancel_count,
-        }
+        update_job_params = {}
         if job_status == JOB_STATUS_PENDING:
             update_job_params['status'] = JOB_STATUS_RUNNING
-        session.query(Photo).filter(Photo.id.in_(success_photo_ids)).update({
+        clear_dirty_photos(session, success_photo_ids, read_at)
+        # Photos edited while this batch was being written stay dirty and unsynced
+        session.query(Photo).filter(
+            Photo.id.in_(success_photo_ids),
+            ~Photo.id.in_(session.query(PhotoMetadataChange.photo_id))
+        ).update({
             'status': PHOTO_STATUS_SYNCED
-        })
-        session.query(Job).filter_by(id=job_id).update(update_job_params)
+        }, synchronize_session=False)
+        finish_job_items(session, outcomes)
+        record_task_timing(session, 'sync_metadata', len(job_items) - cancel_count, time.perf_counter() - started)
+        record_job_progress(
+            session, job_id, completed=processed_count, errors=error_count, cancelled=cancel_count,
+            **update_job_params
+        )
         session.commit()
         logger.info(
-            f"Completed job {job_id} batch: processed={processed_count}, errors={error_count}, cancelled={cancel_count}"
+            f"Completed job {job_id} batch: processed={processed_count}, unchanged={skipped_count}, "
+            f"errors={error_count}, cancelled={cancel_count}"
         )
 
     except Exception as e:
         logger.error(f"Error in sync_metadata_task for job {job_id}: {e}", exc_info=True)
         session.rollback()
-        session.query(Job).filter_by(id=job_id).update({
-            'error_count': Job.error_count + len(photo_id_batch)
-        })
+        failed_count = fail_job_items(session, job_id, first_item_id, last_item_id, str(e))
+        record_job_progress(session, job_id, errors=failed_count)
         session.commit()
     finally:
         session.close()
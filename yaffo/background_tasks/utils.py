@@ -1,20 +1,39 @@
 import time
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session, joinedload
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
 
-from yaffo.db.models import Job, JOB_STATUS_CANCELLED, Face, Person, JOB_STATUS_COMPLETED
-from yaffo.common import DB_PATH
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import sessionmaker, scoped_session, joinedload, Session
+
+from yaffo.db.models import Job, JOB_STATUS_CANCELLED, Face, Person, JOB_STATUS_COMPLETED, JOB_STATUS_PENDING, \
+    JOB_STATUS_RUNNING, TaskStat, JOB_ITEM_STATUS_DONE, JOB_ITEM_STATUS_FAILED, JOB_ITEM_STATUS_CANCELLED
+from yaffo.db.repositories.job_item_repository import count_job_items_by_status, requeue_job_items
+from yaffo.common import JOB_SIGNALS_DIR
+from yaffo.db.engine import create_db_engine
 from yaffo.logging_config import get_logger
+# Registers the commit listeners that publish job changes to the web process
+from yaffo.utils import job_events  # noqa: F401
 
-engine = create_engine(
-    f"sqlite:///{DB_PATH}",
-    connect_args={'check_same_thread': False},
-    pool_pre_ping=True
-)
+engine = create_db_engine()
 
 SessionFactory = scoped_session(sessionmaker(bind=engine))
 logger = get_logger(__name__, 'background_tasks')
 
+# How long a worker trusts its last look at a job's cancel flag
+JOB_SIGNAL_TTL_SECONDS = 0.5
+_cancel_checks: dict[str, tuple[float, bool]] = {}
+
+# Fan-out batches are sized to take about this long: long enough that queueing and the
+# per-batch commit are noise, short enough that job progress keeps moving
+TARGET_BATCH_SECONDS = 15.0
+MAX_BATCH_SIZE = 1000
+# Small jobs are still split this many ways so every worker gets a share
+MIN_BATCH_COUNT = 8
+# Weight of the newest batch in a job type's moving average per-item cost
+TASK_STATS_SMOOTHING = 0.2
+
 
 def get_job_status(job_id: str) -> str:
     """Get the current status of a job."""
@@ -27,6 +46,41 @@ def get_job_status(job_id: str) -> str:
         SessionFactory.remove()
 
 
+def _job_signal_path(job_id: str) -> Path:
+    return JOB_SIGNALS_DIR / f"{job_id}.cancel"
+
+
+def signal_job_cancelled(job_id: str):
+    """Raise the cancel flag for a job, running tasks see it within JOB_SIGNAL_TTL_SECONDS."""
+    JOB_SIGNALS_DIR.mkdir(parents=True, exist_ok=True)
+    _job_signal_path(job_id).touch()
+
+
+def clear_job_signal(job_id: str):
+    _job_signal_path(job_id).unlink(missing_ok=True)
+    _cancel_checks.pop(job_id, None)
+
+
+def is_job_cancelled(job_id: str) -> bool:
+    """
+    Check a job's cancel flag from inside a task loop.
+
+    The flag is a file under JOB_SIGNALS_DIR, so a check is one stat() instead of a
+    database session and query, and the answer is cached per process for
+    JOB_SIGNAL_TTL_SECONDS so most calls don't touch the filesystem at all.
+    """
+    now = time.monotonic()
+    checked = _cancel_checks.get(job_id)
+    if checked is not None and now - checked[0] < JOB_SIGNAL_TTL_SECONDS:
+        return checked[1]
+
+    if len(_cancel_checks) > 1000:
+        _cancel_checks.clear()
+    cancelled = _job_signal_path(job_id).exists()
+    _cancel_checks[job_id] = (now, cancelled)
+    return cancelled
+
+
 def load_assign_faces_task_data(person_id: int, face_ids: list[int]) -> tuple[Person, list[Face]]:
     """Load person and faces data for face assignment tasks."""
     session = SessionFactory()
@@ -39,23 +93,119 @@ def load_assign_faces_task_data(person_id: int, face_ids: list[int]) -> tuple[Pe
         SessionFactory.remove()
 
 
-def schedule_job_completion(job_id: str, delay_seconds: int = 2, max_wait_seconds: int = 30):
+def complete_job_if_finished(session: Session, job_id: str) -> bool:
+    """
+    Mark the job COMPLETED if every task has reported, in a single conditional UPDATE.
+
+    Only a PENDING or RUNNING job whose finished count reached task_count matches, so
+    when several batches finish together exactly one of them completes the job.
     """
-    Schedule a job completion task.
+    completed = session.query(Job).filter(
+        Job.id == job_id,
+        Job.status.in_([JOB_STATUS_PENDING, JOB_STATUS_RUNNING]),
+        Job.completed_count + Job.error_count + Job.cancelled_count >= Job.task_count
+    ).update({
+        'status': JOB_STATUS_COMPLETED,
+        'completed_at': datetime.utcnow()
+    }, synchronize_session=False)
+    return completed > 0
 
-    This should be called after enqueuing all other tasks for a job.
-    The completion task will wait for all tasks to finish, then mark the job complete.
 
-    Args:
-        job_id: The job ID to schedule completion for
-        delay_seconds: Delay before starting completion check (default: 2)
-        max_wait_seconds: Maximum time to wait for completion (default: 30)
+def record_job_progress(
+    session: Session,
+    job_id: str,
+    completed: int = 0,
+    errors: int = 0,
+    cancelled: int = 0,
+    **fields
+) -> bool:
+    """
+    Add a batch's counts to its job and complete the job if this was the last batch.
+
+    Both statements run in the caller's transaction, so nothing else can update the
+    counters in between. Extra keyword arguments are written to the job row as well.
+    Returns True when this call completed the job.
+    """
+    session.query(Job).filter(Job.id == job_id).update({
+        'completed_count': Job.completed_count + completed,
+        'error_count': Job.error_count + errors,
+        'cancelled_count': Job.cancelled_count + cancelled,
+        **fields
+    }, synchronize_session=False)
+    return complete_job_if_finished(session, job_id)
+
+
+def requeue_job(
+    session: Session,
+    job_id: str,
+    running_before: Optional[datetime] = None,
+    retry_failed: bool = False
+) -> int:
+    """
+    Reset a batched job to continue from its job items.
+
+    Unfinished items go back to PENDING (see requeue_job_items), the counters are
+    recomputed from the items so work finished before a crash or cancel still counts,
+    and the job is RUNNING again. Returns the number of pending items; the caller
+    commits and then queues fan_out_job_task for the job.
+    """
+    pending_count = requeue_job_items(session, job_id, running_before=running_before, retry_failed=retry_failed)
+    counts = count_job_items_by_status(session, job_id)
+    session.query(Job).filter(Job.id == job_id).update({
+        'status': JOB_STATUS_RUNNING,
+        'completed_count': counts.get(JOB_ITEM_STATUS_DONE, 0),
+        'error_count': counts.get(JOB_ITEM_STATUS_FAILED, 0),
+        'cancelled_count': counts.get(JOB_ITEM_STATUS_CANCELLED, 0),
+        'error': None,
+        'completed_at': None,
+    }, synchronize_session=False)
+    clear_job_signal(job_id)
+    if pending_count == 0:
+        complete_job_if_finished(session, job_id)
+    return pending_count
+
+
+def record_task_timing(session: Session, task_name: str, item_count: int, seconds: float):
+    """
+    Fold a finished batch's per-item cost into the moving average for its job type.
+
+    The first few batches are averaged evenly so one cold-start batch doesn't dominate,
+    after that each batch moves the average by TASK_STATS_SMOOTHING. Runs in the caller's
+    transaction, next to the batch's record_job_progress.
+    """
+    if item_count <= 0:
+        return
+    seconds_per_item = seconds / item_count
+    stmt = insert(TaskStat).values(
+        task_name=task_name,
+        seconds_per_item=seconds_per_item,
+        sample_count=1,
+        updated_at=datetime.utcnow()
+    )
+    weight = func.max(TASK_STATS_SMOOTHING, 1.0 / (TaskStat.sample_count + 1))
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=[TaskStat.task_name],
+        set_={
+            'seconds_per_item': TaskStat.seconds_per_item
+                                + weight * (stmt.excluded.seconds_per_item - TaskStat.seconds_per_item),
+            'sample_count': TaskStat.sample_count + 1,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    ))
+
+
+def batch_size_for(session: Session, task_name: str, item_count: int, default: int) -> int:
+    """
+    Items per batch for a job of item_count items, from the measured cost of its job type.
 
-    Returns:
-        The Huey Result object for the completion task
+    Aims for batches of TARGET_BATCH_SECONDS, falls back to `default` until the job type
+    has been timed, and never makes fewer than MIN_BATCH_COUNT batches when there are
+    enough items for them.
     """
-    from yaffo.background_tasks.tasks.complete_job import complete_job_task
-    return complete_job_task.schedule(
-        args=(job_id, max_wait_seconds),
-        delay=delay_seconds
-    )
\ No newline at end of file
+    stat = session.get(TaskStat, task_name)
+    if stat is None or stat.seconds_per_item <= 0:
+        size = default
+    else:
+        size = int(TARGET_BATCH_SECONDS / stat.seconds_per_item)
+    size = min(size, MAX_BATCH_SIZE, -(-item_count // MIN_BATCH_COUNT))
+    return max(size, 1)
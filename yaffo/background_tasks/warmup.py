@@ -0,0 +1,98 @@
+import gc
+import os
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from yaffo.logging_config import get_logger
+from yaffo.utils.exiftool import get_exiftool_session
+from yaffo.background_tasks.config import huey, cpu_huey
+
+logger = get_logger(__name__, 'background_tasks')
+
+# Set for the cpu consumer by `inv start-tasks`: load the face models in the consumer
+# process before it starts its workers (see fork_after_load)
+PRELOAD_MODELS_ENV = "YAFFO_PRELOAD_MODELS"
+
+_models_loaded = False
+
+
+def preload_face_models():
+    """
+    Load dlib's HOG detector, shape predictor and ResNet encoder, and run each once.
+
+    face_recognition builds all three when it is imported; the dummy pass over a blank
+    image pays for the remaining first-call setup, so the first real batch doesn't.
+    """
+    global _models_loaded
+    if _models_loaded:
+        return
+
+    import face_recognition
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    face_recognition.face_locations(blank)
+    face_recognition.face_encodings(blank, [(8, 56, 56, 8)])
+    _models_loaded = True
+
+
+def preload_image_plugins():
+    """
+    Import every PIL format plugin, libheif and imagehash up front instead of on the
+    first photo that needs them. The app imports the latter two lazily (see lazy_import).
+    """
+    import imagehash
+    import pillow_heif
+
+    Image.init()
+    pillow_heif.libheif_version()
+    imagehash.phash  # noqa: B018 - attribute access runs the lazily imported module
+
+
+def fork_after_load():
+    """
+    Load the face models in the consumer process, before it starts its workers.
+
+    Process workers are forked from the consumer, so they inherit the loaded models
+    and share those pages copy-on-write instead of each holding its own copy.
+    gc.freeze() keeps the collector from touching (and so copying) the objects
+    created up to here. Where workers are spawned instead of forked (macOS, Windows)
+    this only warms the consumer, and each worker loads the models in its startup hook.
+    """
+    started = time.perf_counter()
+    preload_face_models()
+    preload_image_plugins()
+    gc.freeze()
+    logger.info(f"Preloaded face models in consumer {os.getpid()} in {time.perf_counter() - started:.2f}s")
+
+
+def _log_warm_up(queue_name: str, started: float):
+    logger.info(
+        f"{queue_name} worker {os.getpid()}/{threading.current_thread().name} "
+        f"warmed up in {time.perf_counter() - started:.2f}s"
+    )
+
+
+@cpu_huey.on_startup('warm_up')
+def warm_up_cpu_worker():
+    """Runs in each cpu worker before it takes its first task. A no-op for models inherited from the consumer."""
+    started = time.perf_counter()
+    preload_face_models()
+    preload_image_plugins()
+    _log_warm_up('cpu', started)
+
+
+@huey.on_startup('warm_up')
+def warm_up_io_worker():
+    """
+    Runs in each io worker before it takes its first task.
+
+    The persistent exiftool session is per thread and holds a child process, so it
+    can't be inherited and is started here, in the thread that will use it for syncs.
+    """
+    started = time.perf_counter()
+    import sklearn.metrics.pairwise  # noqa: F401 - auto-assign similarity
+    preload_image_plugins()
+    get_exiftool_session()
+    _log_warm_up('io', started)
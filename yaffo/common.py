@@ -23,5 +23,8 @@ MEDIA_DIRS = [
     ROOT_DIR / "organized"
 ]
 THUMBNAIL_DIR = ROOT_DIR / "thumbnails"
+PREVIEW_CACHE_DIR = TEMP_DIR / "previews"
+JOB_SIGNALS_DIR = ROOT_DIR / "job_signals"
+JOB_EVENTS_PORT = int(os.environ.get("YAFFO_JOB_EVENTS_PORT", "47431"))
 DB_PATH = ROOT_DIR / f"{app_name}.db"
 HUEY_DB_PATH = ROOT_DIR / f"{app_name}-huey.db"
\ No newline at end of file
@@ -0,0 +1,117 @@
+import random
+import time
+from typing import Callable, TypeVar
+
+from flask import Flask
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from yaffo.common import DB_PATH
+from yaffo.db import db
+from yaffo.domain.geo import haversine_miles
+from yaffo.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+DATABASE_URI = f"sqlite:///{DB_PATH}"
+
+# The web app, both worker pools and the scripts all open the same file
+SQLITE_PRAGMAS = (
+    # Readers keep reading while a worker writes, and a writer doesn't wait for readers
+    ("journal_mode", "WAL"),
+    # Milliseconds a connection waits for the write lock before raising "database is locked"
+    ("busy_timeout", 10000),
+    # Still crash safe in WAL mode, the fsync moves from every commit to checkpoints
+    ("synchronous", "NORMAL"),
+    # Negative means KiB rather than pages: 64 MB of page cache per connection
+    ("cache_size", -65536),
+    ("mmap_size", 256 * 1024 * 1024),
+    ("foreign_keys", "ON"),
+)
+
+# Keyword arguments for create_engine, also handed to Flask-SQLAlchemy as SQLALCHEMY_ENGINE_OPTIONS
+ENGINE_OPTIONS = {
+    # Huey thread workers and the job event listener share pooled connections across threads
+    "connect_args": {"check_same_thread": False},
+    "pool_pre_ping": True,
+}
+
+# Python functions queries can call, as (name, number of arguments, function)
+SQLITE_FUNCTIONS = (
+    # Proximity search refines the photo_locations R*Tree candidates to the true radius
+    ("haversine_miles", 4, haversine_miles),
+)
+
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_BASE_DELAY = 0.1
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+    for name, arguments, function in SQLITE_FUNCTIONS:
+        dbapi_connection.create_function(name, arguments, function, deterministic=True)
+
+
+def configure_engine(engine: Engine) -> Engine:
+    """Apply SQLITE_PRAGMAS and SQLITE_FUNCTIONS to every new connection of an engine created elsewhere."""
+    if engine.dialect.name == "sqlite" and not event.contains(engine, "connect", _configure_sqlite_connection):
+        event.listen(engine, "connect", _configure_sqlite_connection)
+    return engine
+
+
+def create_db_engine(uri: str = DATABASE_URI, **options) -> Engine:
+    """The engine every entry point uses: ENGINE_OPTIONS plus the connection pragmas."""
+    return configure_engine(create_engine(uri, **{**ENGINE_OPTIONS, **options}))
+
+
+def init_flask_db(app: Flask, uri: str = DATABASE_URI):
+    """Bind Flask-SQLAlchemy's db to the app with the same engine options and pragmas as the workers."""
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = ENGINE_OPTIONS
+    db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine)
+
+
+def is_database_locked(error: Exception) -> bool:
+    return isinstance(error, OperationalError) and any(
+        message in str(error.orig) for message in ("database is locked", "database is busy")
+    )
+
+
+def write_with_retry(
+    session: Session,
+    write: Callable[[], T],
+    attempts: int = WRITE_RETRY_ATTEMPTS,
+    base_delay: float = WRITE_RETRY_BASE_DELAY
+) -> T:
+    """
+    Run write() and commit, retrying while SQLite reports the database locked.
+
+    busy_timeout already makes a writer wait for the lock; this covers what it can't,
+    such as a lock held past the timeout by a long checkpoint. Each retry rolls back
+    and runs write() again from the start, after an exponential, jittered backoff, so
+    write must only touch the database. Other errors, and the last locked error, are
+    raised with the session rolled back.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            result = write()
+            session.commit()
+            return result
+        except OperationalError as e:
+            session.rollback()
+            if attempt == attempts or not is_database_locked(e):
+                raise
+            delay = base_delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            logger.warning(f"Database locked, retrying write in {delay:.2f}s (attempt {attempt}/{attempts})")
+            time.sleep(delay)
@@ -1,15 +1,153 @@
-from sqlalchemy import PrimaryKeyConstraint
+import os
+from collections import defaultdict
+from itertools import chain
+
+from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint, DDL, and_, or_, select, false, event, text, table, column, \
+    case, func
+from sqlalchemy.ext.hybrid import hybrid_property, Comparator
+from sqlalchemy.orm import declared_attr, Session
+from sqlalchemy.orm.attributes import flag_modified
 from yaffo.db import db
 from datetime import datetime
 
+
+class Directory(db.Model):
+    """A folder that photos or face thumbnails live in, so moving a folder updates a single row."""
+    __tablename__ = "directories"
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String, unique=True, nullable=False)
+
+    @classmethod
+    def subtree_filter(cls, path: str):
+        """Match path and every directory below it as an index range scan instead of LIKE."""
+        prefix = path.rstrip(os.sep) + os.sep
+        return or_(
+            cls.path == path,
+            and_(cls.path >= prefix, cls.path < prefix[:-1] + chr(ord(os.sep) + 1))
+        )
+
+
+def _directory_id_for(path: str):
+    return select(Directory.id).where(Directory.path == path).scalar_subquery()
+
+
+class FilePathComparator(Comparator):
+    """
+    Lets queries keep using full_file_path while hitting the (directory_id, filename) index.
+
+    Equality and IN are rewritten into directory/filename lookups; selecting the
+    attribute returns the joined path.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        # Only the directory lookup is a subquery; concatenating filename outside of it keeps
+        # the owning table in FROM when full_file_path is selected on its own. Like os.path.join,
+        # no separator is added after a directory that already ends in one, such as the root
+        directory_path = select(
+            case((func.substr(Directory.path, -1) == os.sep, Directory.path), else_=Directory.path + os.sep)
+        ).where(Directory.id == cls.directory_id).scalar_subquery()
+        super().__init__((directory_path + cls.filename).label("full_file_path"))
+
+    def __eq__(self, other):
+        directory, filename = os.path.split(other)
+        return and_(self.cls.directory_id == _directory_id_for(directory), self.cls.filename == filename)
+
+    def in_(self, other):
+        filenames_by_directory = defaultdict(list)
+        for path in other:
+            directory, filename = os.path.split(path)
+            filenames_by_directory[directory].append(filename)
+        if not filenames_by_directory:
+            return false()
+        return or_(*(
+            and_(self.cls.directory_id == _directory_id_for(directory), self.cls.filename.in_(filenames))
+            for directory, filenames in filenames_by_directory.items()
+        ))
+
+
+class FilePathMixin:
+    """
+    Stores a file location as directory_id + filename, exposed as full_file_path.
+
+    Assigning full_file_path only records the directory; the Directory row is looked up
+    or created when the session flushes (see _resolve_pending_directories).
+    """
+    _pending_directory = None
+    # The model's other indexes, it can't declare __table_args__ next to the one below
+    table_indexes: tuple = ()
+
+    @declared_attr.directive
+    def __table_args__(cls):
+        return (
+            UniqueConstraint("directory_id", "filename", name=f"uq_{cls.__tablename__}_directory_filename"),
+            *cls.table_indexes,
+        )
+
+    @declared_attr
+    def directory_id(cls):
+        return db.Column(db.Integer, db.ForeignKey("directories.id"), nullable=False, index=True)
+
+    @declared_attr
+    def filename(cls):
+        return db.Column(db.String, nullable=False)
+
+    @declared_attr
+    def directory(cls):
+        return db.relationship("Directory", lazy="joined", innerjoin=True)
+
+    @hybrid_property
+    def full_file_path(self) -> str | None:
+        if self._pending_directory is not None:
+            return os.path.join(self._pending_directory, self.filename)
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory.path, self.filename)
+
+    @full_file_path.inplace.setter
+    def _full_file_path_setter(self, value: str):
+        directory, filename = os.path.split(value)
+        self._pending_directory = directory
+        self.filename = filename
+        flag_modified(self, "filename")
+
+    @full_file_path.inplace.comparator
+    @classmethod
+    def _full_file_path_comparator(cls):
+        return FilePathComparator(cls)
+
+
+@event.listens_for(Session, "before_flush")
+def _resolve_pending_directories(session, flush_context, instances):
+    pending = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, FilePathMixin) and obj._pending_directory is not None
+    ]
+    if not pending:
+        return
+
+    paths = {obj._pending_directory for obj in pending}
+    directories = {d.path: d for d in session.new if isinstance(d, Directory)}
+    with session.no_autoflush:
+        directories.update(
+            (d.path, d) for d in session.query(Directory).filter(Directory.path.in_(paths - directories.keys()))
+        )
+    for path in paths - directories.keys():
+        directories[path] = Directory(path=path)
+        session.add(directories[path])
+
+    for obj in pending:
+        obj.directory = directories[obj._pending_directory]
+        obj._pending_directory = None
+
+
 PHOTO_STATUS_IMPORTED = "IMPORTED"
 PHOTO_STATUS_INDEXED = "INDEXED"
 PHOTO_STATUS_SYNCED = "SYNCED"
 
-class Photo(db.Model):
+class Photo(FilePathMixin, db.Model):
     __tablename__ = "photos"
     id = db.Column(db.Integer, primary_key=True)
-    full_file_path = db.Column(db.String, unique=True)
     date_taken = db.Column(db.String, nullable=True)
     year = db.Column(db.Integer, nullable=True)
     month = db.Column(db.Integer, nullable=True)
@@ -17,6 +155,9 @@ class Photo(db.Model):
     longitude = db.Column(db.Float)
     location_name = db.Column(db.String)
     status = db.Column(db.String, default=PHOTO_STATUS_IMPORTED)
+    # Digest of the metadata last written by a sync and the file's size:mtime right after that write
+    metadata_digest = db.Column(db.String)
+    file_fingerprint = db.Column(db.String)
     faces = db.relationship(
         "Face",
         back_populates="photo"
@@ -26,6 +167,14 @@ class Photo(db.Model):
         back_populates="photo",
         cascade="all, delete-orphan"
     )
+    table_indexes = (
+        db.Index("idx_photos_date_taken", "date_taken"),
+        db.Index("idx_photos_location_name", "location_name"),
+        # Gallery and faces year/month filters, newest first within a month
+        db.Index("ix_photos_year_month_date_taken", "year", "month", "date_taken"),
+        # A location cluster replacing the photo it shows searches by latitude, only geotagged photos are worth indexing
+        db.Index("ix_photos_latitude_longitude", "latitude", "longitude", sqlite_where=text("latitude IS NOT NULL")),
+    )
 
 class Tag(db.Model):
     __tablename__ = "tags"
@@ -34,16 +183,26 @@ class Tag(db.Model):
     tag_name = db.Column(db.String, nullable=False)
     tag_value = db.Column(db.String)
     photo = db.relationship("Photo", back_populates="tags")
+    __table_args__ = (
+        db.Index("idx_tags_photo_id", "photo_id"),
+        # Covers the gallery's tag filter and the tag name and value pickers without reading rows
+        db.Index("ix_tags_tag_name_tag_value", "tag_name", "tag_value", "photo_id"),
+    )
+
+class PhotoMetadataChange(db.Model):
+    """A photo whose location or people changed in the database since its file metadata was last synced."""
+    __tablename__ = "photo_metadata_changes"
+    photo_id = db.Column(db.Integer, db.ForeignKey("photos.id", ondelete="CASCADE"), primary_key=True)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
 
 FACE_STATUS_UNASSIGNED = "UNASSIGNED"
 FACE_STATUS_ASSIGNED = "ASSIGNED"
 FACE_STATUS_IGNORED = "IGNORED"
 
-class Face(db.Model):
+class Face(FilePathMixin, db.Model):
     __tablename__ = "faces"
     id = db.Column(db.Integer, primary_key=True)
     embedding = db.Column(db.LargeBinary)
-    full_file_path = db.Column(db.String, unique=True)
     photo_id = db.Column(db.Integer, db.ForeignKey("photos.id"))
     status = db.Column(db.String)
     # Face bounding box coordinates (from face_recognition)
@@ -65,6 +224,11 @@ class Face(db.Model):
         secondary="people_face",
         back_populates="faces"
     )
+    table_indexes = (
+        db.Index("idx_face_photo_id", "photo_id"),
+        # Unassigned faces, joined to their photos for the date order
+        db.Index("ix_faces_status_photo_id", "status", "photo_id"),
+    )
 
 class Person(db.Model):
     __tablename__ = "people"
@@ -109,6 +273,338 @@ class PersonFace(db.Model):
 
     face = db.relationship("Face", back_populates="person_face", uselist=False, overlaps="people")
     person = db.relationship("Person", back_populates="person_faces", overlaps="faces,people")
+    __table_args__ = (
+        # A person's faces come back in similarity order straight from the index, face_id for keyset pagination
+        db.Index("ix_people_face_person_id_similarity_face_id", "person_id", "similarity", "face_id"),
+    )
+
+
+class PhotoPerson(db.Model):
+    """
+    The people in each photo and how many of its faces are theirs: people_face joined to faces, kept up to
+    date by the PHOTO_PEOPLE_TRIGGERS so people filters and counts don't have to repeat that join.
+    """
+    __tablename__ = "photo_people"
+    # The primary key doubles as the covering index for "photos of these people"
+    person_id = db.Column(db.Integer, db.ForeignKey("people.id", ondelete="CASCADE"), primary_key=True)
+    photo_id = db.Column(db.Integer, db.ForeignKey("photos.id", ondelete="CASCADE"), primary_key=True)
+    face_count = db.Column(db.Integer, nullable=False, default=1)
+    __table_args__ = (
+        db.Index("ix_photo_people_photo_id_person_id", "photo_id", "person_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+
+# Every write to people_face, and deleting faces, goes through these, including bulk query deletes and the scripts.
+# Deleting a face runs before its people_face row cascades away; by then the face is gone and that trigger does nothing
+_PHOTO_PEOPLE_ADD = """
+    INSERT INTO photo_people (person_id, photo_id, face_count)
+    SELECT NEW.person_id, faces.photo_id, 1 FROM faces
+    WHERE faces.id = NEW.face_id AND faces.photo_id IS NOT NULL AND NEW.person_id IS NOT NULL
+    ON CONFLICT (person_id, photo_id) DO UPDATE SET face_count = face_count + 1;
+"""
+_PHOTO_PEOPLE_REMOVE = """
+    UPDATE photo_people SET face_count = face_count - 1
+    WHERE person_id = OLD.person_id AND photo_id = (SELECT photo_id FROM faces WHERE id = OLD.face_id);
+    DELETE FROM photo_people
+    WHERE person_id = OLD.person_id AND photo_id = (SELECT photo_id FROM faces WHERE id = OLD.face_id)
+        AND face_count <= 0;
+"""
+PHOTO_PEOPLE_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_people_face_insert_photo_people AFTER INSERT ON people_face
+    BEGIN {_PHOTO_PEOPLE_ADD} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_people_face_delete_photo_people AFTER DELETE ON people_face
+    BEGIN {_PHOTO_PEOPLE_REMOVE} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_people_face_update_photo_people AFTER UPDATE OF person_id, face_id ON people_face
+    BEGIN {_PHOTO_PEOPLE_REMOVE} {_PHOTO_PEOPLE_ADD} END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tr_faces_delete_photo_people BEFORE DELETE ON faces
+    BEGIN
+        UPDATE photo_people SET face_count = face_count - 1
+        WHERE photo_id = OLD.photo_id AND person_id = (SELECT person_id FROM people_face WHERE face_id = OLD.id);
+        DELETE FROM photo_people
+        WHERE photo_id = OLD.photo_id AND person_id = (SELECT person_id FROM people_face WHERE face_id = OLD.id)
+            AND face_count <= 0;
+    END
+    """,
+)
+
+FACET_TAG = "tag"
+FACET_YEAR = "year"
+FACET_LOCATION = "location"
+FACET_PERSON = "person"
+
+
+class FacetCount(db.Model):
+    """
+    How many photos have each value of the gallery filters: tag values (by tag name), years, locations and people.
+    Kept up to date by the FACET_TRIGGERS as photos are indexed, tagged and assigned faces.
+    """
+    __tablename__ = "facet_counts"
+    facet = db.Column(db.String, primary_key=True)
+    # The tag name for tag values, '' for the other facets
+    name = db.Column(db.String, primary_key=True, default="")
+    value = db.Column(db.String, primary_key=True)
+    photo_count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+
+DATA_VERSION_FACETS = "facets"
+
+
+class DataVersion(db.Model):
+    """A counter bumped by triggers whenever the data behind a cache changes, so the cache knows to reload."""
+    __tablename__ = "data_versions"
+    name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _facet_add(facet: str, name: str, value: str, condition: str) -> str:
+    return f"""
+    INSERT INTO facet_counts (facet, name, value, photo_count)
+    SELECT '{facet}', {name}, CAST({value} AS TEXT), 1 WHERE {condition}
+    ON CONFLICT (facet, name, value) DO UPDATE SET photo_count = photo_count + 1;
+"""
+
+
+def _facet_remove(facet: str, name: str, value: str) -> str:
+    return f"""
+    UPDATE facet_counts SET photo_count = photo_count - 1
+    WHERE facet = '{facet}' AND name = {name} AND value = CAST({value} AS TEXT);
+    DELETE FROM facet_counts
+    WHERE facet = '{facet}' AND name = {name} AND value = CAST({value} AS TEXT) AND photo_count <= 0;
+"""
+
+
+_BUMP_FACETS_VERSION = f"""
+    INSERT INTO data_versions (name, version) VALUES ('{DATA_VERSION_FACETS}', 1)
+    ON CONFLICT (name) DO UPDATE SET version = version + 1;
+"""
+
+# Each trigger moves one photo in or out of a facet value, so indexing a batch of photos updates the counts as it goes.
+# Removing from a value no row holds finds nothing to update, which is how NULL years, tag names and locations are skipped
+FACET_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_tags_insert_facets AFTER INSERT ON tags
+    BEGIN {_facet_add(FACET_TAG, "NEW.tag_name", "COALESCE(NEW.tag_value, '')", "NEW.tag_name IS NOT NULL")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_tags_delete_facets AFTER DELETE ON tags
+    BEGIN {_facet_remove(FACET_TAG, "OLD.tag_name", "COALESCE(OLD.tag_value, '')")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_tags_update_facets AFTER UPDATE OF tag_name, tag_value ON tags
+    BEGIN
+        {_facet_remove(FACET_TAG, "OLD.tag_name", "COALESCE(OLD.tag_value, '')")}
+        {_facet_add(FACET_TAG, "NEW.tag_name", "COALESCE(NEW.tag_value, '')", "NEW.tag_name IS NOT NULL")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_insert_facets AFTER INSERT ON photos
+    BEGIN
+        {_facet_add(FACET_YEAR, "''", "NEW.year", "NEW.year IS NOT NULL")}
+        {_facet_add(FACET_LOCATION, "''", "NEW.location_name", "NEW.location_name <> ''")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_delete_facets AFTER DELETE ON photos
+    BEGIN
+        {_facet_remove(FACET_YEAR, "''", "OLD.year")}
+        {_facet_remove(FACET_LOCATION, "''", "OLD.location_name")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_update_year_facets AFTER UPDATE OF year ON photos
+    WHEN OLD.year IS NOT NEW.year
+    BEGIN
+        {_facet_remove(FACET_YEAR, "''", "OLD.year")}
+        {_facet_add(FACET_YEAR, "''", "NEW.year", "NEW.year IS NOT NULL")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_update_location_facets AFTER UPDATE OF location_name ON photos
+    WHEN OLD.location_name IS NOT NEW.location_name
+    BEGIN
+        {_facet_remove(FACET_LOCATION, "''", "OLD.location_name")}
+        {_facet_add(FACET_LOCATION, "''", "NEW.location_name", "NEW.location_name <> ''")}
+    END
+    """,
+    # photo_people has one row per person per photo, so its rows are the person facet's photos
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photo_people_insert_facets AFTER INSERT ON photo_people
+    BEGIN {_facet_add(FACET_PERSON, "''", "NEW.person_id", "1")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photo_people_delete_facets AFTER DELETE ON photo_people
+    BEGIN {_facet_remove(FACET_PERSON, "''", "OLD.person_id")} END
+    """,
+    # Every change to the counts, and to the people names shown beside them, invalidates the cached facets
+    *(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tr_{table}_{operation.split()[0].lower()}_facets_version AFTER {operation} ON {table}
+        BEGIN {_BUMP_FACETS_VERSION} END
+        """
+        for table, operations in (
+            ("facet_counts", ("INSERT", "UPDATE", "DELETE")),
+            ("people", ("INSERT", "UPDATE OF name", "DELETE")),
+        )
+        for operation in operations
+    ),
+)
+
+# An R*Tree of the geotagged photos, id is the photo id. A point is a box with equal min and max, stored as 32-bit
+# floats rounded outwards, so the tree finds candidates and Photo.latitude/longitude decide exact distances
+PHOTO_LOCATIONS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS photo_locations USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+"""
+# Virtual tables can't be created by metadata.create_all, this is enough to query it
+photo_locations = table(
+    "photo_locations",
+    column("id", db.Integer),
+    column("min_lat", db.Float),
+    column("max_lat", db.Float),
+    column("min_lon", db.Float),
+    column("max_lon", db.Float),
+)
+
+_PHOTO_LOCATION_ADD = """
+    INSERT OR REPLACE INTO photo_locations (id, min_lat, max_lat, min_lon, max_lon)
+    SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+    WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+"""
+PHOTO_LOCATIONS_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_insert_photo_locations AFTER INSERT ON photos
+    BEGIN {_PHOTO_LOCATION_ADD} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_update_photo_locations AFTER UPDATE OF latitude, longitude ON photos
+    BEGIN
+        DELETE FROM photo_locations WHERE id = OLD.id;
+        {_PHOTO_LOCATION_ADD}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tr_photos_delete_photo_locations AFTER DELETE ON photos
+    BEGIN
+        DELETE FROM photo_locations WHERE id = OLD.id;
+    END
+    """,
+)
+
+# Map zoom levels with precomputed clusters, above it the map is sent the photos themselves
+MAX_CLUSTER_ZOOM = 12
+
+
+class ClusterZoomLevel(db.Model):
+    """The zoom levels location_clusters is kept for, one row each, so the triggers can add a photo to all of them."""
+    __tablename__ = "cluster_zoom_levels"
+    zoom = db.Column(db.Integer, primary_key=True)
+
+
+CLUSTER_ZOOM_LEVELS_SEED = (
+    "INSERT OR IGNORE INTO cluster_zoom_levels (zoom) VALUES "
+    + ", ".join(f"({zoom})" for zoom in range(MAX_CLUSTER_ZOOM + 1))
+)
+event.listen(ClusterZoomLevel.__table__, "after_create", DDL(CLUSTER_ZOOM_LEVELS_SEED))
+
+
+class LocationCluster(db.Model):
+    """
+    The geotagged photos in one cell of a zoom level's grid: how many, the sums their centroid
+    is computed from and one photo to show for them. Cells are 90 / 2^zoom degrees square,
+    about 64 pixels on a map at that zoom. Kept up to date by the LOCATION_CLUSTERS_TRIGGERS.
+    """
+    __tablename__ = "location_clusters"
+    zoom = db.Column(db.Integer, primary_key=True)
+    cell_x = db.Column(db.Integer, primary_key=True)
+    cell_y = db.Column(db.Integer, primary_key=True)
+    photo_count = db.Column(db.Integer, nullable=False, default=0)
+    # Photos without a location name, for the map's "only unnamed" filter
+    unnamed_count = db.Column(db.Integer, nullable=False, default=0)
+    lat_sum = db.Column(db.Float, nullable=False, default=0)
+    lon_sum = db.Column(db.Float, nullable=False, default=0)
+    photo_id = db.Column(db.Integer)
+    __table_args__ = ({"sqlite_with_rowid": False},)
+
+
+def _cluster_cell(coordinate: str, offset: int, zoom: str = "zoom") -> str:
+    """SQL for a coordinate's cell at zoom, as location_repository.cluster_cell computes it."""
+    return f"CAST(({coordinate} + {offset}) * (1 << {zoom}) / 90.0 AS INTEGER)"
+
+
+def _location_cluster_add(photo: str) -> str:
+    return f"""
+    INSERT INTO location_clusters (zoom, cell_x, cell_y, photo_count, unnamed_count, lat_sum, lon_sum, photo_id)
+    SELECT zoom, {_cluster_cell(f"{photo}.longitude", 180)}, {_cluster_cell(f"{photo}.latitude", 90)}, 1,
+        COALESCE({photo}.location_name, '') = '', {photo}.latitude, {photo}.longitude, {photo}.id
+    FROM cluster_zoom_levels WHERE {photo}.latitude IS NOT NULL AND {photo}.longitude IS NOT NULL
+    ON CONFLICT (zoom, cell_x, cell_y) DO UPDATE SET
+        photo_count = photo_count + 1,
+        unnamed_count = unnamed_count + excluded.unnamed_count,
+        lat_sum = lat_sum + excluded.lat_sum,
+        lon_sum = lon_sum + excluded.lon_sum;
+"""
+
+
+def _location_cluster_remove(photo: str) -> str:
+    cells = (
+        f"(zoom, cell_x, cell_y) IN (SELECT zoom, {_cluster_cell(f'{photo}.longitude', 180)}, "
+        f"{_cluster_cell(f'{photo}.latitude', 90)} FROM cluster_zoom_levels)"
+    )
+    # A cell losing the photo it shows picks another of its photos, the latitude range keeps that on an index
+    cell_degrees = "90.0 / (1 << location_clusters.zoom)"
+    return f"""
+    UPDATE location_clusters SET
+        photo_count = photo_count - 1,
+        unnamed_count = unnamed_count - (COALESCE({photo}.location_name, '') = ''),
+        lat_sum = lat_sum - {photo}.latitude,
+        lon_sum = lon_sum - {photo}.longitude,
+        photo_id = CASE WHEN photo_id IS NOT {photo}.id THEN photo_id ELSE (
+            SELECT photos.id FROM photos
+            WHERE photos.latitude IS NOT NULL AND photos.id <> {photo}.id
+                AND photos.latitude >= location_clusters.cell_y * {cell_degrees} - 90
+                AND photos.latitude < (location_clusters.cell_y + 1) * {cell_degrees} - 90
+                AND {_cluster_cell("photos.longitude", 180, "location_clusters.zoom")} = location_clusters.cell_x
+                AND {_cluster_cell("photos.latitude", 90, "location_clusters.zoom")} = location_clusters.cell_y
+            LIMIT 1
+        ) END
+    WHERE {cells};
+    DELETE FROM location_clusters WHERE {cells} AND photo_count <= 0;
+"""
+
+
+LOCATION_CLUSTERS_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_insert_location_clusters AFTER INSERT ON photos
+    BEGIN {_location_cluster_add("NEW")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_delete_location_clusters AFTER DELETE ON photos
+    BEGIN {_location_cluster_remove("OLD")} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tr_photos_update_location_clusters
+    AFTER UPDATE OF latitude, longitude, location_name ON photos
+    WHEN OLD.latitude IS NOT NEW.latitude OR OLD.longitude IS NOT NEW.longitude
+        OR (COALESCE(OLD.location_name, '') = '') <> (COALESCE(NEW.location_name, '') = '')
+    BEGIN
+        {_location_cluster_remove("OLD")}
+        {_location_cluster_add("NEW")}
+    END
+    """,
+)
+
+# Triggers and the R*Tree aren't tables the metadata knows, they are created once every table exists
+for _trigger in (*PHOTO_PEOPLE_TRIGGERS, *FACET_TRIGGERS, PHOTO_LOCATIONS_TABLE, *PHOTO_LOCATIONS_TRIGGERS,
+                 *LOCATION_CLUSTERS_TRIGGERS):
+    event.listen(db.metadata, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
 
 
 JOB_STATUS_PENDING = "PENDING"
@@ -180,6 +676,57 @@ class JobResult(db.Model):
 
     job = db.relationship("Job", back_populates="results")
 
+class TaskStat(db.Model):
+    """Moving average of how long one item of a job type takes, used to size that job's batches."""
+    __tablename__ = "task_stats"
+
+    task_name = db.Column(db.String, primary_key=True)
+    seconds_per_item = db.Column(db.Float, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+FILE_OPERATION_STATUS_PENDING = "PENDING"
+FILE_OPERATION_STATUS_DONE = "DONE"
+FILE_OPERATION_STATUS_FAILED = "FAILED"
+FILE_OPERATION_STATUS_ROLLED_BACK = "ROLLED_BACK"
+
+class FileOperation(db.Model):
+    """Journal entry for a single file move/copy/trash/delete made by a job."""
+    __tablename__ = "file_operations"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String, nullable=False, index=True)
+    operation_type = db.Column(db.String, nullable=False)
+    source_path = db.Column(db.String, nullable=False)
+    destination_path = db.Column(db.String)
+    status = db.Column(db.String, nullable=False, default=FILE_OPERATION_STATUS_PENDING)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+JOB_ITEM_STATUS_PENDING = "PENDING"
+JOB_ITEM_STATUS_RUNNING = "RUNNING"
+JOB_ITEM_STATUS_DONE = "DONE"
+JOB_ITEM_STATUS_FAILED = "FAILED"
+JOB_ITEM_STATUS_CANCELLED = "CANCELLED"
+
+class JobItem(db.Model):
+    """One input of a batched job (a file path, photo id or face id) and how processing it went."""
+    __tablename__ = "job_items"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String, nullable=False)
+    item_key = db.Column(db.String, nullable=False)
+    status = db.Column(db.String, nullable=False, default=JOB_ITEM_STATUS_PENDING)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_job_items_job_id_status", "job_id", "status"),
+    )
+
 class ApplicationSettings(db.Model):
     __tablename__ = "application_settings"
 
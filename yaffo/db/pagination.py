@@ -0,0 +1,216 @@
+import base64
+import binascii
+import json
+import operator
+import threading
+import time
+from dataclasses import dataclass
+from typing import Sequence
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+# Page indexes are reused for this long, so totals and page jumps can lag behind new photos by up to a minute
+PAGE_INDEX_TTL_SECONDS = 60
+PAGE_INDEX_CACHE_SIZE = 32
+
+CURSOR_AFTER = "after"
+CURSOR_BEFORE = "before"
+
+
+@dataclass
+class PageIndex:
+    """How many rows a filtered query returns and the sort key of the first row on each of its pages."""
+    total_items: int
+    page_starts: list[tuple]
+
+    @property
+    def total_pages(self) -> int:
+        return max(len(self.page_starts), 1)
+
+
+@dataclass
+class Page:
+    items: list
+    page_number: int
+    page_size: int
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    # Only known up front when the page index is cached, otherwise the page count endpoints fill it in
+    total_items: int | None = None
+
+    @property
+    def first_item(self) -> int:
+        return (self.page_number - 1) * self.page_size + 1 if self.items else 0
+
+    @property
+    def last_item(self) -> int:
+        return (self.page_number - 1) * self.page_size + len(self.items)
+
+    @property
+    def total_pages(self) -> int | None:
+        if self.total_items is None:
+            return None
+        return max((self.total_items - 1) // self.page_size + 1, 1)
+
+
+_page_indexes: dict[tuple, tuple[float, PageIndex]] = {}
+_page_indexes_lock = threading.Lock()
+
+
+def encode_cursor(direction: str, key: Sequence) -> str:
+    payload = json.dumps([direction, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, tuple] | None:
+    """The direction and sort key of a cursor made by encode_cursor, or None if it isn't one."""
+    try:
+        direction, *key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in (CURSOR_AFTER, CURSOR_BEFORE) or not key:
+        return None
+    return direction, tuple(key)
+
+
+def clear_page_indexes():
+    with _page_indexes_lock:
+        _page_indexes.clear()
+
+
+def _ordering(keys: Sequence[ColumnElement], descending: bool) -> list:
+    return [key.desc() if descending else key.asc() for key in keys]
+
+
+def _fetch_from(query: Query, keys: Sequence[ColumnElement], descending: bool, start: tuple | None,
+                inclusive: bool, limit: int) -> list:
+    """
+    Up to limit rows of query in keys order, starting after (or at) start.
+
+    Row value comparisons such as (date_taken, id) < (?, ?) let SQLite seek straight to the
+    start in an index instead of reading and discarding the rows in front of it, but never
+    match NULLs. So the NULL and non-NULL runs of the first key are read one after the other,
+    in the order SQLite sorts them: NULLs first ascending, last descending. The remaining
+    keys must not be NULL, the last one should be unique.
+    """
+    first = keys[0]
+    runs = [first.isnot(None), first.is_(None)] if descending else [first.is_(None), first.isnot(None)]
+    if descending:
+        compare = operator.le if inclusive else operator.lt
+    else:
+        compare = operator.ge if inclusive else operator.gt
+
+    rows = []
+    start_run = 0 if start is None else int((start[0] is None) == descending)
+    for run_index in range(start_run, len(runs)):
+        run_filter = runs[run_index]
+        if start is not None and run_index == start_run:
+            if start[0] is None:
+                run_filter = run_filter & compare(tuple_(*keys[1:]), tuple_(*start[1:]))
+            else:
+                run_filter = compare(tuple_(*keys), tuple_(*start))
+        rows.extend(
+            query.filter(run_filter).order_by(*_ordering(keys, descending)).limit(limit - len(rows)).all()
+        )
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def _page_index_cache_key(query: Query, keys: Sequence[ColumnElement], page_size: int, descending: bool) -> tuple:
+    compiled = query.with_entities(*keys).statement.compile()
+    return str(compiled), repr(sorted(compiled.params.items())), page_size, descending
+
+
+def cached_page_index(query: Query, keys: Sequence[ColumnElement], page_size: int,
+                      descending: bool = False) -> PageIndex | None:
+    cache_key = _page_index_cache_key(query, keys, page_size, descending)
+    with _page_indexes_lock:
+        expires_at, page_index = _page_indexes.get(cache_key, (0, None))
+    return page_index if expires_at > time.monotonic() else None
+
+
+def get_page_index(query: Query, keys: Sequence[ColumnElement], page_size: int,
+                   descending: bool = False) -> PageIndex:
+    """
+    The page index of query in keys order, from the cache or built with one pass over the keys.
+
+    Only the sort keys are read, so the pass can usually be answered from an index alone,
+    and it replaces both the COUNT and the OFFSET of page numbered pagination: jumping to
+    page n starts from the key recorded for it.
+    """
+    cache_key = _page_index_cache_key(query, keys, page_size, descending)
+    with _page_indexes_lock:
+        expires_at, page_index = _page_indexes.get(cache_key, (0, None))
+    if expires_at > time.monotonic():
+        return page_index
+
+    ordering = _ordering(keys, descending)
+    numbered = query.with_entities(
+        *(key.label(f"key_{index}") for index, key in enumerate(keys)),
+        func.row_number().over(order_by=ordering).label("row_number"),
+        func.count().over().label("total_items"),
+    ).order_by(None).subquery()
+    rows = (
+        query.session.query(*(numbered.c[f"key_{index}"] for index in range(len(keys))), numbered.c.total_items)
+        .filter((numbered.c.row_number - 1) % page_size == 0)
+        .order_by(numbered.c.row_number)
+        .all()
+    )
+    page_index = PageIndex(total_items=rows[0][-1] if rows else 0, page_starts=[tuple(row[:-1]) for row in rows])
+
+    with _page_indexes_lock:
+        if cache_key not in _page_indexes and len(_page_indexes) >= PAGE_INDEX_CACHE_SIZE:
+            del _page_indexes[next(iter(_page_indexes))]
+        _page_indexes[cache_key] = (time.monotonic() + PAGE_INDEX_TTL_SECONDS, page_index)
+    return page_index
+
+
+def paginate(query: Query, keys: Sequence[ColumnElement], page_size: int, descending: bool = False,
+             cursor: str | None = None, page_number: int = 1, options: Sequence = ()) -> Page:
+    """
+    One page of query ordered by keys, located by cursor rather than OFFSET.
+
+    query holds the filters only; the order comes from keys, whose last column must be unique,
+    and options (eager loads) only apply to the page itself. A cursor from a previous page
+    continues after or before it, and a page_number without a cursor jumps through the page
+    index. Either way the page is read starting at its first row, so page 500 costs the same
+    as page 1.
+    """
+    page_size = max(page_size, 1)
+    position = decode_cursor(cursor) if cursor else None
+    page_query = query.options(*options).add_columns(*keys)
+    page_number = max(page_number, 1)
+
+    if position is not None and position[0] == CURSOR_BEFORE:
+        rows = _fetch_from(page_query, keys, not descending, position[1], False, page_size + 1)
+        has_previous, has_next = len(rows) > page_size, True
+        rows = rows[:page_size][::-1]
+    elif position is not None:
+        rows = _fetch_from(page_query, keys, descending, position[1], False, page_size + 1)
+        has_previous, has_next = True, len(rows) > page_size
+        rows = rows[:page_size]
+    else:
+        start = None
+        if page_number > 1:
+            page_index = get_page_index(query, keys, page_size, descending)
+            page_number = min(page_number, page_index.total_pages)
+            start = page_index.page_starts[page_number - 1] if page_index.page_starts else None
+        rows = _fetch_from(page_query, keys, descending, start, True, page_size + 1)
+        has_previous, has_next = start is not None and page_number > 1, len(rows) > page_size
+        rows = rows[:page_size]
+
+    if not has_previous:
+        page_number = 1
+    key_size = len(keys)
+    page_index = cached_page_index(query, keys, page_size, descending)
+    return Page(
+        items=[row[0] for row in rows],
+        page_number=page_number,
+        page_size=page_size,
+        next_cursor=encode_cursor(CURSOR_AFTER, rows[-1][-key_size:]) if rows and has_next else None,
+        previous_cursor=encode_cursor(CURSOR_BEFORE, rows[0][-key_size:]) if rows and has_previous else None,
+        total_items=page_index.total_items if page_index else None,
+    )
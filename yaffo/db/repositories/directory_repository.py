@@ -0,0 +1,82 @@
+import os
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from yaffo.db.models import Directory, Photo, Face
+
+
+def _strip_separators(path: str) -> str:
+    """path without trailing separators, except for a root ('/' or 'C:\\'), as os.path.split leaves it."""
+    drive, rest = os.path.splitdrive(path)
+    return drive + (rest.rstrip(os.sep) or os.sep)
+
+
+def _plan_move(session: Session, old_path: str, new_path: str) -> list[tuple[Directory, str, Directory | None]]:
+    """(directory, its new path, the known directory it merges into) for old_path and every directory below it."""
+    old_path, new_path = _strip_separators(old_path), _strip_separators(new_path)
+    directories = session.query(Directory).filter(Directory.subtree_filter(old_path)).all()
+    target_paths = {d.id: new_path + d.path[len(old_path):] for d in directories}
+    existing = {
+        d.path: d for d in session.query(Directory).filter(Directory.path.in_(list(target_paths.values())))
+        if d.id not in target_paths
+    }
+    return [(d, target_paths[d.id], existing.get(target_paths[d.id])) for d in directories]
+
+
+def find_move_clashes(session: Session, old_path: str, new_path: str) -> list[str]:
+    """Paths of files moving old_path to new_path would put where a photo or face already is."""
+    clashes = []
+    for directory, target_path, merge_into in _plan_move(session, old_path, new_path):
+        if merge_into is None:
+            continue
+        for model in (Photo, Face):
+            taken = select(model.filename).where(model.directory_id == merge_into.id)
+            clashes.extend(
+                os.path.join(target_path, filename) for (filename,) in
+                session.query(model.filename).filter(model.directory_id == directory.id, model.filename.in_(taken))
+            )
+    return clashes
+
+
+def move_directory(session: Session, old_path: str, new_path: str) -> int:
+    """
+    Point old_path and every directory below it at new_path.
+
+    Photos and faces reference their directory by id, so this touches one row per
+    directory rather than one per file. When a target directory is already known the
+    two are merged; raises ValueError without changing anything if that would give two
+    files the same path (see find_move_clashes). Returns the number of directories
+    moved; the caller commits.
+    """
+    clashes = find_move_clashes(session, old_path, new_path)
+    if clashes:
+        raise ValueError(f"{len(clashes)} file(s) already exist at the new location, such as {clashes[0]}")
+
+    moves = _plan_move(session, old_path, new_path)
+    for directory, target_path, merge_into in moves:
+        if merge_into is None:
+            directory.path = target_path
+            continue
+        for model in (Photo, Face):
+            session.query(model).filter(model.directory_id == directory.id) \
+                .update({model.directory_id: merge_into.id}, synchronize_session=False)
+        session.delete(directory)
+    session.flush()
+    return len(moves)
+
+
+def count_files_in_directory(session: Session, model, path: str) -> int:
+    """Count photos or faces stored in path or any directory below it."""
+    return session.query(model).join(Directory, model.directory_id == Directory.id) \
+        .filter(Directory.subtree_filter(path)).count()
+
+
+def get_or_create_directory_ids(session: Session, paths: Iterable[str]) -> dict[str, int]:
+    """Directory id for each path, inserting the ones not seen yet. Runs in the caller's transaction."""
+    paths = set(paths)
+    if not paths:
+        return {}
+    session.execute(insert(Directory).on_conflict_do_nothing(index_elements=["path"]), [{"path": p} for p in paths])
+    return dict(session.execute(select(Directory.path, Directory.id).where(Directory.path.in_(paths))).all())
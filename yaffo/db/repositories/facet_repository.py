@@ -0,0 +1,83 @@
+import threading
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session
+
+from yaffo.db.models import FacetCount, DataVersion, Person, DATA_VERSION_FACETS, FACET_TAG, FACET_YEAR, \
+    FACET_LOCATION, FACET_PERSON
+
+
+@dataclass(frozen=True)
+class FacetValue:
+    value: str | int
+    photo_count: int
+    # What to show for the value when it's an id, such as a person's name
+    label: str | None = None
+
+
+@dataclass
+class Facets:
+    """Every value the gallery can be filtered on and how many photos have it, as of a data version."""
+    version: int
+    tag_names: list[FacetValue] = field(default_factory=list)
+    tag_values: dict[str, list[FacetValue]] = field(default_factory=dict)
+    years: list[FacetValue] = field(default_factory=list)
+    locations: list[FacetValue] = field(default_factory=list)
+    people: list[FacetValue] = field(default_factory=list)
+
+
+# One per engine, the tests and scripts open more than one database
+_facets: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_facets_lock = threading.Lock()
+
+
+def get_facets_version(session: Session) -> int:
+    return session.query(DataVersion.version).filter(DataVersion.name == DATA_VERSION_FACETS).scalar() or 0
+
+
+def load_facets(session: Session, version: int) -> Facets:
+    """Build the facets from facet_counts, which holds a row per value rather than per photo."""
+    facets = Facets(version=version)
+    values = defaultdict(list)
+    for row in session.query(FacetCount).order_by(FacetCount.facet, FacetCount.name, FacetCount.value):
+        values[(row.facet, row.name)].append(FacetValue(row.value, row.photo_count))
+
+    tag_values = {name: rows for (facet, name), rows in values.items() if facet == FACET_TAG and name}
+    facets.tag_names = [FacetValue(name, sum(value.photo_count for value in rows)) for name, rows in tag_values.items()]
+    facets.tag_values = {name: [value for value in rows if value.value] for name, rows in tag_values.items()}
+    facets.years = sorted(
+        (FacetValue(int(value.value), value.photo_count) for value in values[(FACET_YEAR, "")]),
+        key=lambda year: year.value
+    )
+    facets.locations = values[(FACET_LOCATION, "")]
+
+    # Everyone is listed, people without assigned faces yet have no photos
+    person_counts = {int(value.value): value.photo_count for value in values[(FACET_PERSON, "")]}
+    facets.people = [
+        FacetValue(person_id, person_counts.get(person_id, 0), name)
+        for person_id, name in session.query(Person.id, Person.name).order_by(Person.name)
+    ]
+    return facets
+
+
+def get_facets(session: Session) -> Facets:
+    """
+    The gallery facets, cached until the data version moves.
+
+    Triggers keep facet_counts current and bump the version on every change, so a request
+    only reads the version row unless something was indexed, tagged or renamed since the
+    last one. The cached lists are shared between requests and must not be modified.
+    """
+    version = get_facets_version(session)
+    engine = session.get_bind()
+    with _facets_lock:
+        facets = _facets.get(engine)
+    if facets is not None and facets.version == version:
+        return facets
+
+    facets = load_facets(session, version)
+    with _facets_lock:
+        _facets[engine] = facets
+    return facets
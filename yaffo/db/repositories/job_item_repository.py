@@ -0,0 +1,159 @@
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import Row, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from yaffo.db.models import JobItem, JOB_ITEM_STATUS_PENDING, JOB_ITEM_STATUS_RUNNING, JOB_ITEM_STATUS_FAILED, \
+    JOB_ITEM_STATUS_CANCELLED
+
+# An item whose batch died this many times with it in hand is failed rather than resumed again
+MAX_JOB_ITEM_ATTEMPTS = 2
+
+
+def add_job_items(session: Session, job_id: str, item_keys: Iterable) -> int:
+    """Store a job's inputs, one pending row per key. Runs in the caller's transaction."""
+    rows = [{'job_id': job_id, 'item_key': str(key)} for key in item_keys]
+    if rows:
+        session.execute(insert(JobItem), rows)
+    return len(rows)
+
+
+def next_job_item_range(session: Session, job_id: str, after_item_id: int, limit: int) -> Optional[tuple[int, int]]:
+    """
+    First and last id of the next `limit` pending items after after_item_id.
+
+    Batches are handed to tasks as id ranges, so a queued task carries two integers
+    instead of its item list. Returns None when no pending item is left.
+    """
+    next_ids = (
+        select(JobItem.id)
+        .where(JobItem.job_id == job_id, JobItem.id > after_item_id, JobItem.status == JOB_ITEM_STATUS_PENDING)
+        .order_by(JobItem.id)
+        .limit(limit)
+        .subquery()
+    )
+    first_id, last_id = session.execute(select(func.min(next_ids.c.id), func.max(next_ids.c.id))).one()
+    if first_id is None:
+        return None
+    return first_id, last_id
+
+
+def claim_job_items(session: Session, job_id: str, first_item_id: int, last_item_id: int) -> list[Row]:
+    """
+    Mark a batch's pending items RUNNING and return their (id, item_key) rows.
+
+    The UPDATE is atomic, so when a range was queued twice (a resume while an old
+    batch was still in the queue) only one task gets each item. The caller commits
+    straight away: that commit is the checkpoint crash recovery works from.
+    """
+    claimed = session.execute(
+        update(JobItem)
+        .where(
+            JobItem.job_id == job_id,
+            JobItem.id.between(first_item_id, last_item_id),
+            JobItem.status == JOB_ITEM_STATUS_PENDING
+        )
+        .values(status=JOB_ITEM_STATUS_RUNNING, started_at=datetime.utcnow(), attempts=JobItem.attempts + 1)
+        .returning(JobItem.id, JobItem.item_key)
+    ).all()
+    return sorted(claimed, key=lambda item: item.id)
+
+
+def job_item_outcome(item: Row, status: str, started_at: datetime, error: Optional[str] = None) -> dict:
+    return {
+        'id': item.id,
+        'status': status,
+        'error': error,
+        'started_at': started_at,
+        'finished_at': datetime.utcnow(),
+    }
+
+
+def finish_job_items(session: Session, outcomes: list[dict]) -> None:
+    """Write a batch's item outcomes (see job_item_outcome) with one executemany UPDATE."""
+    if outcomes:
+        session.execute(update(JobItem), outcomes)
+
+
+def fail_job_items(session: Session, job_id: str, first_item_id: int, last_item_id: int, error: str) -> int:
+    """Mark whatever a batch left unfinished as failed, returns how many items that was."""
+    return session.query(JobItem).filter(
+        JobItem.job_id == job_id,
+        JobItem.id.between(first_item_id, last_item_id),
+        JobItem.status.in_([JOB_ITEM_STATUS_PENDING, JOB_ITEM_STATUS_RUNNING])
+    ).update({
+        'status': JOB_ITEM_STATUS_FAILED,
+        'error': error,
+        'finished_at': datetime.utcnow()
+    }, synchronize_session=False)
+
+
+def count_pending_job_items(session: Session, job_id: str, through_item_id: Optional[int] = None) -> int:
+    query = session.query(func.count(JobItem.id)).filter(
+        JobItem.job_id == job_id,
+        JobItem.status == JOB_ITEM_STATUS_PENDING
+    )
+    if through_item_id is not None:
+        query = query.filter(JobItem.id <= through_item_id)
+    return query.scalar()
+
+
+def count_job_items_by_status(session: Session, job_id: str) -> dict[str, int]:
+    return dict(
+        session.query(JobItem.status, func.count(JobItem.id))
+        .filter(JobItem.job_id == job_id)
+        .group_by(JobItem.status)
+        .all()
+    )
+
+
+def requeue_job_items(
+    session: Session,
+    job_id: str,
+    running_before: Optional[datetime] = None,
+    retry_failed: bool = False
+) -> int:
+    """
+    Put a job's unfinished items back to PENDING so a new fan-out picks them up.
+
+    Cancelled items always go back. RUNNING items only when they were claimed before
+    running_before, i.e. by a batch known to be dead; an item that already used up
+    MAX_JOB_ITEM_ATTEMPTS is failed instead, it is the likely reason its batches died.
+    Failed items are retried on request. Returns the number of pending items.
+    """
+    now = datetime.utcnow()
+    statuses = [JOB_ITEM_STATUS_CANCELLED] + ([JOB_ITEM_STATUS_FAILED] if retry_failed else [])
+    session.query(JobItem).filter(JobItem.job_id == job_id, JobItem.status.in_(statuses)).update({
+        'status': JOB_ITEM_STATUS_PENDING,
+        'error': None,
+        'finished_at': None,
+    }, synchronize_session=False)
+
+    if running_before is not None:
+        orphaned = session.query(JobItem).filter(
+            JobItem.job_id == job_id,
+            JobItem.status == JOB_ITEM_STATUS_RUNNING,
+            JobItem.started_at < running_before
+        )
+        orphaned.filter(JobItem.attempts >= MAX_JOB_ITEM_ATTEMPTS).update({
+            'status': JOB_ITEM_STATUS_FAILED,
+            'error': "Worker stopped while processing this item",
+            'finished_at': now,
+        }, synchronize_session=False)
+        orphaned.update({'status': JOB_ITEM_STATUS_PENDING}, synchronize_session=False)
+
+    return count_pending_job_items(session, job_id)
+
+
+def get_failed_job_items(session: Session, job_id: str) -> list[JobItem]:
+    return (
+        session.query(JobItem)
+        .filter(JobItem.job_id == job_id, JobItem.status == JOB_ITEM_STATUS_FAILED)
+        .order_by(JobItem.id)
+        .all()
+    )
+
+
+def delete_job_items(session: Session, job_id: str) -> int:
+    return session.query(JobItem).filter(JobItem.job_id == job_id).delete(synchronize_session=False)
@@ -0,0 +1,148 @@
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from yaffo.db.models import Photo, LocationCluster, photo_locations, MAX_CLUSTER_ZOOM
+from yaffo.domain.geo import BoundingBox, bounding_boxes
+
+# Most photos the map is sent for one viewport
+VIEWPORT_PHOTO_LIMIT = 5000
+# Zoom whose clusters the map's initial extent is fitted to, cells of about 0.35 degrees
+EXTENT_ZOOM = 8
+
+
+def _in_boxes(boxes: list[BoundingBox]) -> ColumnElement:
+    """photo_locations rows overlapping any of boxes, answered by the R*Tree."""
+    return or_(*(
+        and_(
+            photo_locations.c.max_lat >= min_lat,
+            photo_locations.c.min_lat <= max_lat,
+            photo_locations.c.max_lon >= min_lon,
+            photo_locations.c.min_lon <= max_lon,
+        )
+        for min_lat, max_lat, min_lon, max_lon in boxes
+    ))
+
+
+def viewport_boxes(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> list[BoundingBox]:
+    """A map viewport as boxes, split in two when it spans the antimeridian (min_lon > max_lon)."""
+    if min_lon > max_lon:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def within_distance(lat: float, lon: float, distance_miles: float) -> ColumnElement:
+    """
+    Filter for photos within distance_miles of (lat, lon).
+
+    The R*Tree narrows the library to the photos in the circle's bounding boxes, then
+    haversine_miles keeps those truly within the radius, so the box corners are left out.
+    """
+    candidates = select(photo_locations.c.id).where(_in_boxes(bounding_boxes(lat, lon, distance_miles)))
+    return and_(
+        Photo.id.in_(candidates),
+        func.haversine_miles(Photo.latitude, Photo.longitude, lat, lon) <= distance_miles,
+    )
+
+
+def within_viewport(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> ColumnElement:
+    """Filter for photos inside a map viewport."""
+    candidates = select(photo_locations.c.id).where(_in_boxes(viewport_boxes(min_lon, min_lat, max_lon, max_lat)))
+    return Photo.id.in_(candidates)
+
+
+def _unnamed(location_name) -> ColumnElement:
+    return func.coalesce(location_name, "") == ""
+
+
+def get_photos_in_viewport(session: Session, min_lon: float, min_lat: float, max_lon: float, max_lat: float,
+                           unnamed_only: bool = False, limit: int = VIEWPORT_PHOTO_LIMIT) -> list[dict]:
+    query = (
+        session.query(Photo.id, Photo.location_name, Photo.latitude, Photo.longitude, Photo.filename)
+        .filter(within_viewport(min_lon, min_lat, max_lon, max_lat))
+    )
+    if unnamed_only:
+        query = query.filter(_unnamed(Photo.location_name))
+    rows = query.limit(limit).all()
+    return [
+        {
+            'id': row.id,
+            'name': row.location_name,
+            'lat': row.latitude,
+            'lon': row.longitude,
+            'filename': row.filename,
+        }
+        for row in rows
+    ]
+
+
+def cell_degrees(zoom: int) -> float:
+    return 90.0 / (1 << zoom)
+
+
+def cluster_cell(coordinate: float, offset: int, zoom: int) -> int:
+    """The grid cell of a longitude (offset 180) or latitude (offset 90), as the location_clusters triggers do."""
+    return int((coordinate + offset) * (1 << zoom) / 90.0)
+
+
+def get_location_clusters(session: Session, zoom: int, min_lon: float, min_lat: float, max_lon: float,
+                          max_lat: float, unnamed_only: bool = False) -> list[dict]:
+    """
+    The precomputed clusters of the grid cells a viewport overlaps at zoom, at most MAX_CLUSTER_ZOOM.
+
+    Each is read from its location_clusters row, so the cost follows the number of cells on
+    screen rather than the photos in them. bbox is the cell's extent, for listing its photos.
+    """
+    zoom = min(max(zoom, 0), MAX_CLUSTER_ZOOM)
+    count = LocationCluster.unnamed_count if unnamed_only else LocationCluster.photo_count
+    min_y, max_y = cluster_cell(min_lat, 90, zoom), cluster_cell(max_lat, 90, zoom)
+    x_ranges = [
+        (cluster_cell(box_min_lon, 180, zoom), cluster_cell(box_max_lon, 180, zoom))
+        for _, _, box_min_lon, box_max_lon in viewport_boxes(min_lon, min_lat, max_lon, max_lat)
+    ]
+    rows = (
+        session.query(LocationCluster)
+        .filter(
+            LocationCluster.zoom == zoom,
+            or_(*(LocationCluster.cell_x.between(min_x, max_x) for min_x, max_x in x_ranges)),
+            LocationCluster.cell_y.between(min_y, max_y),
+            count > 0,
+        )
+        .all()
+    )
+
+    degrees = cell_degrees(zoom)
+    return [
+        {
+            'count': row.unnamed_count if unnamed_only else row.photo_count,
+            'lat': row.lat_sum / row.photo_count,
+            'lon': row.lon_sum / row.photo_count,
+            'photo_id': row.photo_id,
+            'bbox': [
+                row.cell_x * degrees - 180,
+                row.cell_y * degrees - 90,
+                (row.cell_x + 1) * degrees - 180,
+                (row.cell_y + 1) * degrees - 90,
+            ],
+        }
+        for row in rows
+    ]
+
+
+def get_locations_extent(session: Session, unnamed_only: bool = False) -> list[float] | None:
+    """[min_lon, min_lat, max_lon, max_lat] around every geotagged photo, from the EXTENT_ZOOM cells."""
+    count = LocationCluster.unnamed_count if unnamed_only else LocationCluster.photo_count
+    min_x, min_y, max_x, max_y = (
+        session.query(
+            func.min(LocationCluster.cell_x),
+            func.min(LocationCluster.cell_y),
+            func.max(LocationCluster.cell_x),
+            func.max(LocationCluster.cell_y),
+        )
+        .filter(LocationCluster.zoom == EXTENT_ZOOM, count > 0)
+        .one()
+    )
+    if min_x is None:
+        return None
+    degrees = cell_degrees(EXTENT_ZOOM)
+    return [min_x * degrees - 180, min_y * degrees - 90, (max_x + 1) * degrees - 180, (max_y + 1) * degrees - 90]
@@ -0,0 +1,109 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from yaffo.db.models import Face, Person, PhotoPerson, Photo, PhotoMetadataChange, PHOTO_STATUS_INDEXED, \
+    PHOTO_STATUS_SYNCED
+
+
+def mark_photos_dirty(session: Session, photo_ids: Iterable[int]) -> None:
+    """
+    Record that the database metadata of these photos changed and their files need a sync.
+
+    Runs inside the caller's transaction, so the change set commits together with the
+    edit that caused it. Photos already marked get a newer changed_at.
+    """
+    photo_ids = {photo_id for photo_id in photo_ids if photo_id is not None}
+    if not photo_ids:
+        return
+
+    now = datetime.utcnow()
+    stmt = insert(PhotoMetadataChange).values([
+        {'photo_id': photo_id, 'changed_at': now} for photo_id in photo_ids
+    ])
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=[PhotoMetadataChange.photo_id],
+        set_={'changed_at': stmt.excluded.changed_at}
+    ))
+    session.query(Photo).filter(Photo.id.in_(photo_ids), Photo.status == PHOTO_STATUS_SYNCED).update(
+        {Photo.status: PHOTO_STATUS_INDEXED}, synchronize_session=False
+    )
+
+
+def mark_face_photos_dirty(session: Session, face_ids: Iterable[int]) -> None:
+    photo_ids = session.query(Face.photo_id).filter(Face.id.in_(list(face_ids))).distinct()
+    mark_photos_dirty(session, [photo_id for (photo_id,) in photo_ids])
+
+
+def mark_person_photos_dirty(session: Session, person_id: int) -> None:
+    photo_ids = session.query(PhotoPerson.photo_id).filter(PhotoPerson.person_id == person_id)
+    mark_photos_dirty(session, [photo_id for (photo_id,) in photo_ids])
+
+
+def count_dirty_photos(session: Session) -> int:
+    return (
+        session.query(func.count(PhotoMetadataChange.photo_id))
+        .join(Photo, Photo.id == PhotoMetadataChange.photo_id)
+        .scalar()
+    )
+
+
+def get_dirty_photo_ids(session: Session) -> list[int]:
+    return [
+        photo_id for (photo_id,) in
+        session.query(PhotoMetadataChange.photo_id)
+        .join(Photo, Photo.id == PhotoMetadataChange.photo_id)
+        .order_by(PhotoMetadataChange.photo_id)
+    ]
+
+
+def load_dirty_photos_page(session: Session, page: int, page_size: int) -> list[dict]:
+    """One page of the change set, most recent first, with the people named in each photo."""
+    photos = (
+        session.query(Photo)
+        .join(PhotoMetadataChange, PhotoMetadataChange.photo_id == Photo.id)
+        .order_by(PhotoMetadataChange.changed_at.desc(), Photo.id)
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+        .all()
+    )
+
+    people_by_photo_id = defaultdict(set)
+    if photos:
+        rows = (
+            session.query(PhotoPerson.photo_id, Person.name)
+            .join(Person, Person.id == PhotoPerson.person_id)
+            .filter(PhotoPerson.photo_id.in_([photo.id for photo in photos]), Person.name.isnot(None))
+        )
+        for photo_id, name in rows:
+            people_by_photo_id[photo_id].add(name)
+
+    return [
+        {
+            'photo_id': photo.id,
+            'filename': photo.filename,
+            'full_path': photo.full_file_path,
+            'location_name': photo.location_name,
+            'people_names': sorted(people_by_photo_id[photo.id])
+        }
+        for photo in photos
+    ]
+
+
+def clear_dirty_photos(session: Session, photo_ids: list[int], synced_at: datetime) -> None:
+    """
+    Drop synced photos from the change set.
+
+    Rows changed after synced_at are kept: the file was written from data read before
+    that edit, so it still needs another sync.
+    """
+    if not photo_ids:
+        return
+    session.query(PhotoMetadataChange).filter(
+        PhotoMetadataChange.photo_id.in_(photo_ids),
+        PhotoMetadataChange.changed_at <= synced_at
+    ).delete(synchronize_session=False)
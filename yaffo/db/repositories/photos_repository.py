@@ -1,21 +1,46 @@
 import calendar
+import os
+from typing import Iterable
 
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
-from yaffo.db.models import Photo
+from yaffo.db.models import Photo, PHOTO_STATUS_IMPORTED
+from yaffo.db.repositories.directory_repository import get_or_create_directory_ids
+from yaffo.db.repositories.facet_repository import get_facets
 
 
 def get_distinct_years(session: Session) -> list[int]:
-    return [row[0] for row in
-            (session
-                .query(Photo.year)
-                .filter(Photo.year.isnot(None))
-                .distinct()
-                .order_by(Photo.year)
-                .all())
-            ]
+    return [year.value for year in get_facets(session).years]
 
 def get_distinct_months():
     return [
         {'value': i, 'name': calendar.month_name[i]}
         for i in range(1, 13)
-    ]
\ No newline at end of file
+    ]
+
+def insert_photos(session: Session, file_paths: Iterable[str]) -> dict[str, int]:
+    """
+    Add a photo row for each path that doesn't have one yet.
+
+    One executemany INSERT ... ON CONFLICT DO NOTHING, so paths already in the
+    library are skipped instead of failing the whole batch on the unique constraint.
+    Returns {path: id} for the rows created; the caller commits.
+    """
+    split_paths = {path: os.path.split(path) for path in file_paths}
+    if not split_paths:
+        return {}
+
+    directory_ids = get_or_create_directory_ids(session, (directory for directory, _ in split_paths.values()))
+    paths_by_key = {
+        (directory_ids[directory], filename): path for path, (directory, filename) in split_paths.items()
+    }
+    created = session.execute(
+        insert(Photo)
+        .on_conflict_do_nothing(index_elements=["directory_id", "filename"])
+        .returning(Photo.id, Photo.directory_id, Photo.filename),
+        [
+            {"directory_id": directory_id, "filename": filename, "status": PHOTO_STATUS_IMPORTED}
+            for directory_id, filename in paths_by_key
+        ]
+    ).all()
+    return {paths_by_key[(row.directory_id, row.filename)]: row.id for row in created}
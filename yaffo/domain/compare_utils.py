@@ -1,6 +1,11 @@
 import numpy as np
 from yaffo.db.models import Face, Person
-from sklearn.metrics.pairwise import cosine_similarity
+
+
+def cosine_similarity(x, y):
+    # sklearn pulls in scipy, import it on first use rather than with the web app
+    from sklearn.metrics.pairwise import cosine_similarity
+    return cosine_similarity(x, y)
 
 def load_embedding(blob: bytes) -> np.ndarray:
     arr = np.frombuffer(blob, dtype=np.float64)
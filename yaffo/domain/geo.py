@@ -0,0 +1,42 @@
+import math
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LATITUDE = EARTH_RADIUS_MILES * math.pi / 180
+
+# (min_lat, max_lat, min_lon, max_lon)
+BoundingBox = tuple[float, float, float, float]
+
+
+def haversine_miles(lat1: float | None, lon1: float | None, lat2: float | None, lon2: float | None) -> float | None:
+    """Great circle distance between two points, None if either is missing. Registered with SQLite by the engine."""
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    half_chord = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(math.sqrt(half_chord), 1.0))
+
+
+def bounding_boxes(lat: float, lon: float, distance_miles: float) -> list[BoundingBox]:
+    """
+    Boxes that together contain every point within distance_miles of (lat, lon).
+
+    Only a prefilter for haversine_miles: the corners are further away than the radius. A degree
+    of longitude is narrowest on the box's poleward edge, so that edge sets its width, a circle
+    reaching a pole covers every longitude, and one crossing the antimeridian becomes two boxes.
+    """
+    lat_offset = distance_miles / MILES_PER_DEGREE_LATITUDE
+    min_lat, max_lat = max(lat - lat_offset, -90.0), min(lat + lat_offset, 90.0)
+    poleward_cos = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if poleward_cos <= 0 or distance_miles / (MILES_PER_DEGREE_LATITUDE * poleward_cos) >= 180:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+
+    lon_offset = distance_miles / (MILES_PER_DEGREE_LATITUDE * poleward_cos)
+    min_lon, max_lon = lon - lon_offset, lon + lon_offset
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
@@ -8,6 +8,22 @@ DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 HUEY_LOG_FILE = ROOT_DIR / "background_tasks.log"
 WEB_LOG_FILE = ROOT_DIR / "yaffo.log"
 
+# One handler per log file, shared by every module logger that writes to it
+_file_handlers: dict[str, logging.FileHandler] = {}
+
+
+def _get_file_handler(log_file: str, formatter: logging.Formatter) -> logging.FileHandler:
+    """
+    The shared handler for log_file. delay=True defers opening the file to the first
+    record, so importing a module costs no file descriptor and no disk access.
+    """
+    key = str(log_file)
+    if key not in _file_handlers:
+        file_handler = logging.FileHandler(log_file, delay=True)
+        file_handler.setFormatter(formatter)
+        _file_handlers[key] = file_handler
+    return _file_handlers[key]
+
 
 def setup_logger(name: str, log_file: str, level=logging.INFO):
     """
@@ -30,11 +46,8 @@ def setup_logger(name: str, log_file: str, level=logging.INFO):
 
     formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
 
-    # File handler
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(level)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    # File handler, levels are filtered on the logger since the handler is shared
+    logger.addHandler(_get_file_handler(log_file, formatter))
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -89,8 +102,10 @@ def set_log_level(logger, level_name):
     """
     level = getattr(logging, level_name.upper(), logging.INFO)
     logger.setLevel(level)
+    shared_handlers = list(_file_handlers.values())
     for handler in logger.handlers:
-        handler.setLevel(level)
+        if handler not in shared_handlers:
+            handler.setLevel(level)
 
 
 # Initialize default loggers
@@ -3,16 +3,16 @@ from dataclasses import dataclass
 from typing import Optional, Tuple, List
 import numpy as np
 from flask import Flask, render_template, request, jsonify
-from sklearn.cluster import DBSCAN
 
 from yaffo.logging_config import get_logger
 from sqlalchemy.dialects.sqlite import insert
 import pydash as _
 from sqlalchemy.orm import joinedload
 from yaffo.db.models import db, Face, Person, PersonFace, FACE_STATUS_UNASSIGNED, FACE_STATUS_IGNORED, \
-    FACE_STATUS_ASSIGNED, Photo, PHOTO_STATUS_INDEXED
-from sklearn.metrics.pairwise import cosine_similarity
+    FACE_STATUS_ASSIGNED, Photo
 
+from yaffo.db.pagination import paginate, get_page_index
+from yaffo.db.repositories.metadata_change_repository import mark_photos_dirty
 from yaffo.db.repositories.person_repository import update_person_embedding
 from yaffo.db.repositories.photos_repository import get_distinct_years, get_distinct_months
 from yaffo.domain.compare_utils import load_embedding, calculate_similarity
@@ -22,6 +22,9 @@ DEFAULT_THRESHOLD = 10  # configurable similarity threshold
 DEFAULT_PAGE_SIZE = 2000
 DEFAULT_MIN_SAMPLE_SIZE = 3
 DEFAULT_GROUP_BY = 'similarity'
+FACE_PAGE_SIZES = [50, 100, 250, 500, 1000, 2000, 5000, 10000]
+# Oldest photo first, id keeps the faces of one photo together and in a stable order
+UNASSIGNED_FACES_PAGE_KEYS = (Photo.date_taken, Face.id)
 
 
 @dataclass
@@ -45,6 +48,9 @@ logger = get_logger(__name__, 'webapp')
 
 
 def make_suggestions_by_similarity(unassigned_faces: list[Face], threshold: int) -> list[FaceSuggestion]:
+    # sklearn pulls in scipy, import it on first use rather than with the web app
+    from sklearn.cluster import DBSCAN
+
     embeddings = []
     face_ids = []
     face_dict = {face.id: face for face in unassigned_faces}
@@ -82,6 +88,8 @@ def make_suggestions_by_similarity(unassigned_faces: list[Face], threshold: int)
 
 def make_suggestions_for_people(unassigned_faces: list[Face], people: list[Person], threshold: int, person_id) -> list[
     FaceSuggestion]:
+    from sklearn.metrics.pairwise import cosine_similarity
+
     face_suggestions = []
     default_suggestion = FaceSuggestion(
         person_ids=[],
@@ -138,37 +146,43 @@ def make_suggestions_for_people(unassigned_faces: list[Face], people: list[Perso
     return face_suggestions
 
 
+def unassigned_faces_query(year: int | None, month: int | None):
+    query = (
+        db.session.query(Face)
+        .join(Face.photo)
+        .filter(Face.status == FACE_STATUS_UNASSIGNED)
+    )
+    if year:
+        query = query.filter(Photo.year == year)
+    if month:
+        query = query.filter(Photo.month == month)
+    return query
+
+
 @context("yaffo-face_assignment")
 def init_faces_routes(app: Flask):
     @app.route("/faces", methods=["GET"])
     def faces_index():
-        query = (
-            db.session.query(Face)
-            .join(Face.photo)
-            .options(joinedload(Face.photo))
-            .outerjoin(Face.people)
-        )
         year = request.args.get("year", type=int)
         month = request.args.get("month", type=int)
         threshold = request.args.get("threshold", default=DEFAULT_THRESHOLD, type=int)
-        page = request.args.get("page", default=1, type=int)
+        page_number = request.args.get("page", default=1, type=int)
         page_size = request.args.get("page_size", default=DEFAULT_PAGE_SIZE, type=int)
         person_id = request.args.get("person", type=int)
         assign_person_id = request.args.get("assign_person", type=int)
         group_by = request.args.get("group_by", type=str, default=DEFAULT_GROUP_BY)
 
-        if year:
-            query = query.filter(Photo.year == year)
-        if month:
-            query = query.filter(Photo.month == month)
-        query = query.filter(Face.status == FACE_STATUS_UNASSIGNED).order_by(Photo.date_taken)
-
-        # Get total count before pagination
-        unassigned_face_count = query.count()
-
-        # Apply pagination
-        offset = (page - 1) * page_size
-        unassigned_faces: List[Face] = query.limit(page_size).offset(offset).all()
+        page = paginate(
+            unassigned_faces_query(year, month),
+            UNASSIGNED_FACES_PAGE_KEYS,
+            page_size,
+            cursor=request.args.get("cursor"),
+            page_number=page_number,
+            # Inner, like the photo join it duplicates: an outer join around the photo's directory join
+            # makes SQLite materialize every photo
+            options=[joinedload(Face.photo, innerjoin=True)],
+        )
+        unassigned_faces: List[Face] = page.items
 
         # Get people sorted by face count (descending) for keyboard shortcuts
         from sqlalchemy import func
@@ -202,16 +216,22 @@ def init_faces_routes(app: Flask):
             "selected_group_by": group_by,
         }
 
-        pagination = {
-            "current_page": page,
-            "total_items": unassigned_face_count,
-            "page_size": page_size,
-            "page_sizes": [50, 100, 250, 500, 1000, 2000, 5000, 10000],
-        }
-
         return render_template(
             "faces/index.html", faces=unassigned_faces, people=people, face_suggestions=face_suggestions,
-            filters=filters, unassigned_face_count=unassigned_face_count, pagination=pagination
+            filters=filters, page=page, page_sizes=FACE_PAGE_SIZES
+        )
+
+    @app.route("/api/faces/page-count", methods=["GET"])
+    def faces_page_count():
+        """Total unassigned faces and pages for the faces filters, loaded by the pagination after the page is shown."""
+        page_index = get_page_index(
+            unassigned_faces_query(request.args.get("year", type=int), request.args.get("month", type=int)),
+            UNASSIGNED_FACES_PAGE_KEYS,
+            request.args.get("page_size", default=DEFAULT_PAGE_SIZE, type=int),
+        )
+        return render_template(
+            "components/page_count.html", page_index=page_index, page_endpoint="faces_index",
+            page_number=request.args.get("page", default=1, type=int)
         )
 
     @app.route("/api/faces/assign", methods=["POST"])
@@ -256,11 +276,8 @@ def init_faces_routes(app: Flask):
                     {Face.status: face_status}, synchronize_session=False
                 )
 
-                # Set photo status back to INDEXED when faces are assigned
-                photo_ids = [face.photo_id for face in faces]
-                db.session.query(Photo).filter(Photo.id.in_(photo_ids)).update(
-                    {Photo.status: PHOTO_STATUS_INDEXED}, synchronize_session=False
-                )
+                # The people written to these files changed, queue them for metadata sync
+                mark_photos_dirty(db.session, [face.photo_id for face in faces])
 
                 db.session.commit()
                 update_person_embedding(person_id, db.session)
@@ -1,32 +1,82 @@
-import math
 import requests
 from flask import Flask, render_template, request, jsonify
 from sqlalchemy import distinct, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
+from werkzeug.datastructures import MultiDict
 import pydash as _
 from yaffo.db import db
-from yaffo.db.models import Photo, Face, Person, PersonFace, Tag
-from yaffo.db.repositories.photos_repository import get_distinct_years, get_distinct_months
+from yaffo.db.models import Photo, Face, PhotoPerson, Tag
+from yaffo.db.pagination import paginate, get_page_index
+from yaffo.db.repositories.facet_repository import get_facets
+from yaffo.db.repositories.location_repository import within_distance
+from yaffo.db.repositories.photos_repository import get_distinct_months
 from yaffo.utils.context import context
 
+# Newest first, id breaks ties between photos taken in the same second
+GALLERY_PAGE_KEYS = (Photo.date_taken, Photo.id)
+GALLERY_PAGE_SIZES = [50, 100, 250, 500, 1000]
+DEFAULT_GALLERY_PAGE_SIZE = 100
+
+def gallery_query(args: MultiDict):
+    """Photos matching the gallery filters in args, unordered: the gallery pages through it with GALLERY_PAGE_KEYS."""
+    person_ids = args.getlist("person", type=int)
+    person_match_type = args.get("person-match-type", default='any', type=str)
+    tag_name = args.get("tag-name", type=str)
+    tag_value = args.get("tag-value", type=str)
+    location_names = args.getlist("location", type=str)
+    location_match_type = args.get("location-match-type", default='any', type=str)
+    proximity_lat = args.get("proximity-lat", type=float)
+    proximity_lon = args.get("proximity-lon", type=float)
+    proximity_distance = args.get("proximity-distance", type=float)
+    year = args.get("year", type=int)
+    month = args.get("month", type=int)
+    query = db.session.query(Photo)
+
+    # Apply filters
+    if year:
+        query = query.filter(Photo.year == year)
+    if month:
+        query = query.filter(Photo.month == month)
+    if person_ids and person_match_type and len(person_ids) > 0:
+        subquery = db.session.query(PhotoPerson.photo_id).filter(PhotoPerson.person_id.in_(person_ids))
+        if person_match_type == 'all':
+            # AND logic: Photo must contain ALL selected people, photo_people has one row per person in a photo
+            subquery = subquery.group_by(PhotoPerson.photo_id).having(func.count() == len(set(person_ids)))
+        # OR logic: Photo must contain ANY of the selected people
+        query = query.filter(Photo.id.in_(subquery))
+
+    if tag_name and tag_value:
+        # Filter by specific tag name and value
+        subquery = (
+            db.session.query(Photo.id)
+            .join(Photo.tags)
+            .filter(Tag.tag_name == tag_name)
+            .filter(Tag.tag_value == tag_value)
+            .distinct()
+        )
+        query = query.filter(Photo.id.in_(subquery))
+    elif tag_name:
+        # Filter by tag name only (any value)
+        subquery = (
+            db.session.query(Photo.id)
+            .join(Photo.tags)
+            .filter(Tag.tag_name == tag_name)
+            .distinct()
+        )
+        query = query.filter(Photo.id.in_(subquery))
 
-def calculate_bounding_box(lat: float, lon: float, distance_miles: float) -> tuple[float, float, float, float]:
-    """
-    Calculate bounding box coordinates for a given center point and distance.
-    Returns (min_lat, max_lat, min_lon, max_lon)
-    """
-    lat_degree_miles = 69.0
-    lon_degree_miles = abs(math.cos(math.radians(lat)) * 69.0)
-
-    lat_offset = distance_miles / lat_degree_miles
-    lon_offset = distance_miles / lon_degree_miles
-
-    min_lat = lat - lat_offset
-    max_lat = lat + lat_offset
-    min_lon = lon - lon_offset
-    max_lon = lon + lon_offset
+    if location_names and location_match_type and len(location_names) > 0:
+        if location_match_type == 'all':
+            # For locations, 'all' doesn't make sense (a photo can only have one location)
+            # So we treat it as 'any'
+            query = query.filter(Photo.location_name.in_(location_names))
+        else:
+            # OR logic: Photo location must match ANY of the selected locations
+            query = query.filter(Photo.location_name.in_(location_names))
 
-    return (min_lat, max_lat, min_lon, max_lon)
+    if proximity_lat is not None and proximity_lon is not None and proximity_distance:
+        query = query.filter(within_distance(proximity_lat, proximity_lon, proximity_distance))
+    return query
 
 
 @context("yaffo-gallery")
@@ -46,92 +96,21 @@ def init_home_routes(app: Flask):
         proximity_location = request.args.get("proximity-location", type=str)
         year = request.args.get("year", type=int)
         month = request.args.get("month", type=int)
-        page = request.args.get("page", default=1, type=int)
+        page_number = request.args.get("page", default=1, type=int)
         page_size = request.args.get("page-size", type=int)
-        filter_page_size = page_size if page_size else 100
-        # Build query with eager loading
-        query = (
-            db.session.query(Photo)
-            .options(joinedload(Photo.faces).joinedload(Face.people))
-            .order_by(Photo.date_taken.desc())
+        filter_page_size = page_size if page_size else DEFAULT_GALLERY_PAGE_SIZE
+        page = paginate(
+            gallery_query(request.args),
+            GALLERY_PAGE_KEYS,
+            filter_page_size,
+            descending=True,
+            cursor=request.args.get("cursor"),
+            page_number=page_number,
+            # A joined load of the faces would nest their directory join inside an outer join, which SQLite
+            # answers by materializing every face. Loading them for the page's photo ids stays on the indexes
+            options=[selectinload(Photo.faces).selectinload(Face.people)],
         )
-
-        # Apply filters
-        if year:
-            query = query.filter(Photo.year == year)
-        if month:
-            query = query.filter(Photo.month == month)
-        if person_ids and person_match_type and len(person_ids) > 0:
-            if person_match_type == 'all':
-                # AND logic: Photo must contain ALL selected people
-                for person_id in person_ids:
-                    subquery = (
-                        db.session.query(Photo.id)
-                        .join(Photo.faces)
-                        .join(Face.person_face)
-                        .filter(PersonFace.person_id == person_id)
-                    )
-                    query = query.filter(Photo.id.in_(subquery))
-            else:
-                # OR logic: Photo must contain ANY of the selected people
-                subquery = (
-                    db.session.query(Photo.id)
-                    .join(Photo.faces)
-                    .join(Face.person_face)
-                    .filter(PersonFace.person_id.in_(person_ids))
-                    .distinct()
-                )
-                query = query.filter(Photo.id.in_(subquery))
-
-        if tag_name and tag_value:
-            # Filter by specific tag name and value
-            subquery = (
-                db.session.query(Photo.id)
-                .join(Photo.tags)
-                .filter(Tag.tag_name == tag_name)
-                .filter(Tag.tag_value == tag_value)
-                .distinct()
-            )
-            query = query.filter(Photo.id.in_(subquery))
-        elif tag_name:
-            # Filter by tag name only (any value)
-            subquery = (
-                db.session.query(Photo.id)
-                .join(Photo.tags)
-                .filter(Tag.tag_name == tag_name)
-                .distinct()
-            )
-            query = query.filter(Photo.id.in_(subquery))
-
-        if location_names and location_match_type and len(location_names) > 0:
-            if location_match_type == 'all':
-                # For locations, 'all' doesn't make sense (a photo can only have one location)
-                # So we treat it as 'any'
-                query = query.filter(Photo.location_name.in_(location_names))
-            else:
-                # OR logic: Photo location must match ANY of the selected locations
-                query = query.filter(Photo.location_name.in_(location_names))
-
-        if proximity_lat is not None and proximity_lon is not None and proximity_distance:
-            min_lat, max_lat, min_lon, max_lon = calculate_bounding_box(
-                proximity_lat, proximity_lon, proximity_distance
-            )
-            query = query.filter(
-                Photo.latitude.isnot(None),
-                Photo.longitude.isnot(None),
-                Photo.latitude >= min_lat,
-                Photo.latitude <= max_lat,
-                Photo.longitude >= min_lon,
-                Photo.longitude <= max_lon
-            )
-
-        # Get total count of filtered results
-        photo_count = query.count()
-
-        # Apply pagination
-        offset = (page - 1) * filter_page_size
-        photos = query.limit(filter_page_size).offset(offset).all()
-
+        photos = page.items
 
         # Get unique people from photos (for display in cards)
         for photo in photos:
@@ -142,31 +121,14 @@ def init_home_routes(app: Flask):
                 for person in face.people
             })
 
-        # Get distinct tag names and location names
-        distinct_tag_names = (
-            db.session.query(Tag.tag_name)
-            .distinct()
-            .order_by(Tag.tag_name)
-            .all()
-        )
-        tag_names_list = [tag[0] for tag in distinct_tag_names if tag[0]]
-
-        distinct_locations = (
-            db.session.query(Photo.location_name)
-            .filter(Photo.location_name.isnot(None))
-            .distinct()
-            .order_by(Photo.location_name)
-            .all()
-        )
-        location_names_list = [loc[0] for loc in distinct_locations if loc[0]]
-
-        # Prepare filter options
+        # Filter options with their photo counts, cached until photos are indexed or people change
+        facets = get_facets(db.session)
         filters = {
-            'people': Person.query.order_by(Person.name).all(),
-            'years': get_distinct_years(db.session),
+            'people': facets.people,
+            'years': [year.value for year in facets.years],
             'months': get_distinct_months(),
-            'tag_names': tag_names_list,
-            'location_names': location_names_list,
+            'tag_names': facets.tag_names,
+            'location_names': facets.locations,
             'selected_person_ids': person_ids,
             'selected_person_match_type': person_match_type,
             'selected_tag_name': tag_name,
@@ -179,18 +141,21 @@ def init_home_routes(app: Flask):
             'selected_proximity_location': proximity_location,
             'selected_year': year,
             'selected_month': month,
-            "page_sizes": [50, 100, 250, 500, 1000],
+            "page_sizes": GALLERY_PAGE_SIZES,
             "page_size": filter_page_size
         }
 
-        pagination = {
-            "current_page": page,
-            "total_items": photo_count,
-            "page_size": filter_page_size,
-            "page_sizes": [50, 100, 250, 500, 1000],
-        }
+        return render_template("index.html", photos=photos, filters=filters, page=page)
 
-        return render_template("index.html", photos=photos, filters=filters, photo_count=photo_count, pagination=pagination)
+    @app.route("/api/photos/page-count", methods=["GET"])
+    def photos_page_count():
+        """Total photos and pages for the gallery's filters, loaded by its pagination after the page is shown."""
+        page_size = request.args.get("page-size", default=DEFAULT_GALLERY_PAGE_SIZE, type=int)
+        page_index = get_page_index(gallery_query(request.args), GALLERY_PAGE_KEYS, page_size, descending=True)
+        return render_template(
+            "components/page_count.html", page_index=page_index, page_endpoint="index",
+            page_number=request.args.get("page", default=1, type=int)
+        )
 
     @app.route("/api/tag-values", methods=["GET"])
     def get_tag_values():
@@ -202,17 +167,12 @@ def init_home_routes(app: Flask):
         if not tag_name:
             return jsonify({"error": "tag_name parameter is required"}), 400
 
-        distinct_values = (
-            db.session.query(Tag.tag_value)
-            .filter(Tag.tag_name == tag_name)
-            .filter(Tag.tag_value.isnot(None))
-            .distinct()
-            .order_by(Tag.tag_value)
-            .all()
-        )
-
-        values = [val[0] for val in distinct_values if val[0]]
-        return jsonify({"tag_name": tag_name, "values": values})
+        tag_values = get_facets(db.session).tag_values.get(tag_name, [])
+        return jsonify({
+            "tag_name": tag_name,
+            "values": [tag_value.value for tag_value in tag_values],
+            "counts": {tag_value.value: tag_value.photo_count for tag_value in tag_values},
+        })
 
     @app.route("/api/location-autocomplete", methods=["GET"])
     def location_autocomplete():
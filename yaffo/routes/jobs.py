@@ -1,12 +1,34 @@
-from flask import render_template, Flask, jsonify, request, make_response
+from queue import Empty
+
+from flask import render_template, Flask, jsonify, request, make_response, Response
 from yaffo.db import db
-from yaffo.db.models import Job, JOB_STATUS_COMPLETED, JOB_STATUS_FAILED, JOB_STATUS_CANCELLED, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JobResult
+from yaffo.db.models import Job, JOB_STATUS_COMPLETED, JOB_STATUS_FAILED, JOB_STATUS_CANCELLED, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JobResult, \
+    FileOperation, FILE_OPERATION_STATUS_DONE, FILE_OPERATION_STATUS_FAILED
+from yaffo.background_tasks.tasks import organize_photos_task, remove_duplicates_task, rollback_file_operations_task, \
+    signal_job_cancelled, clear_job_signal, batch_priority, batch_size_for, fan_out_job_task, requeue_job
+from yaffo.background_tasks.tasks.fan_out import FAN_OUT_JOBS
+from yaffo.utils.file_operations import pending_file_operation_ids, FILE_OPERATION_MOVE, FILE_OPERATION_COPY
+from yaffo.utils.job_events import get_job_event_hub
+from yaffo.db.repositories.job_item_repository import delete_job_items, get_failed_job_items
+from itertools import batched
+from datetime import datetime
 import json
+import uuid
 
 from yaffo.utils.request_helpers import parse_boolean_from_form
 
 
+JOB_STREAM_KEEPALIVE_SECONDS = 15
+
+
 def init_jobs_routes(app: Flask):
+    def load_changed_jobs(since: datetime) -> list[dict]:
+        with app.app_context():
+            try:
+                return [job.to_dict() for job in db.session.query(Job).filter(Job.updated_at >= since)]
+            finally:
+                db.session.remove()
+
     @app.route("/jobs/section", methods=["GET"])
     def jobs_section():
         """Generic route to render job section for any job type"""
@@ -34,13 +56,57 @@ def init_jobs_routes(app: Flask):
         job = db.session.query(Job).filter_by(id=job_id).first()
         if not job:
             return jsonify({'error': 'Job not found'}), 404
-        job_completed = job.task_count == (job.completed_count + job.error_count + job.cancelled_count)
-        if job_completed:
-            job.status = JOB_STATUS_COMPLETED
-            db.session.commit()
-
         return jsonify(job.to_dict())
 
+    @app.route("/jobs/<job_id>/failed-items", methods=["GET"])
+    def job_failed_items(job_id: str):
+        """Items of a batched job that failed, with the error each one hit"""
+        return jsonify([
+            {'item_key': item.item_key, 'error': item.error, 'finished_at': item.finished_at}
+            for item in get_failed_job_items(db.session, job_id)
+        ])
+
+    @app.route("/jobs/stream", methods=["GET"])
+    def jobs_stream():
+        """
+        Server-Sent Events stream of job snapshots, one event per job change.
+
+        Starts with the jobs that are still running so a page can't miss a change made
+        between its render and the stream connecting. Answers 204 when this process
+        can't receive job events, which tells EventSource to stop and the page keeps polling.
+        """
+        hub = get_job_event_hub(load_changed_jobs)
+        if hub is None:
+            return "", 204
+
+        queue = hub.subscribe()
+        active_jobs = [
+            job.to_dict() for job in
+            db.session.query(Job).filter(Job.status.in_([JOB_STATUS_PENDING, JOB_STATUS_RUNNING]))
+        ]
+        db.session.remove()
+
+        def generate():
+            try:
+                yield "retry: 5000\n\n"
+                for snapshot in active_jobs:
+                    yield f"event: job\ndata: {json.dumps(snapshot)}\n\n"
+                while True:
+                    try:
+                        snapshot = queue.get(timeout=JOB_STREAM_KEEPALIVE_SECONDS)
+                    except Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: job\ndata: {json.dumps(snapshot)}\n\n"
+            finally:
+                hub.unsubscribe(queue)
+
+        return Response(
+            generate(),
+            mimetype="text/event-stream",
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
     @app.route("/jobs/<job_id>/fragment", methods=["GET"])
     def job_fragment(job_id: str):
         """Returns HTML fragment for a single job card - used by htmx polling"""
@@ -80,6 +146,7 @@ def init_jobs_routes(app: Flask):
         if job.status in [JOB_STATUS_PENDING, JOB_STATUS_RUNNING]:
             job.status = JOB_STATUS_CANCELLED
             db.session.commit()
+            signal_job_cancelled(job_id)
 
             # Return updated fragment
             total_count = job.completed_count + job.error_count + job.cancelled_count
@@ -111,8 +178,13 @@ def init_jobs_routes(app: Flask):
         job_name = job.name
 
         JobResult.query.filter(JobResult.job_id == job_id).delete()
+        # Deleting a job accepts its outcome, its file journal can no longer be resumed or rolled back
+        FileOperation.query.filter(FileOperation.job_id == job_id).delete()
+        delete_job_items(db.session, job_id)
         db.session.delete(job)
         db.session.commit()
+        # Batches of a deleted job that are still running stop at their next check
+        signal_job_cancelled(job_id)
 
         remaining_jobs = db.session.query(Job).filter(
             Job.name == job_name,
@@ -131,4 +203,99 @@ def init_jobs_routes(app: Flask):
                 'type': 'success'
             }
         })
-        return response
\ No newline at end of file
+        return response
+
+    @app.route("/jobs/<job_id>/resume", methods=["POST"])
+    def job_resume(job_id: str):
+        """
+        Re-run the work an interrupted or cancelled job had not finished yet: its
+        journaled file operations, or the pending, cancelled and failed job items
+        """
+        job = db.session.query(Job).filter_by(id=job_id).first()
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        # Its queued tasks would run the same items or file operations a second time
+        if job.status in [JOB_STATUS_PENDING, JOB_STATUS_RUNNING]:
+            return jsonify({'error': 'Job is still running'}), 400
+        if job.name in FAN_OUT_JOBS:
+            return resume_job_items(job)
+        if job.name not in ['organize_photos', 'remove_duplicates']:
+            return jsonify({'error': f'{job.name} jobs cannot be resumed'}), 400
+
+        operation_ids = pending_file_operation_ids(db.session, job_id)
+        if not operation_ids:
+            return jsonify({'error': 'Nothing left to resume'}), 400
+
+        job.completed_count = FileOperation.query.filter_by(job_id=job_id, status=FILE_OPERATION_STATUS_DONE).count()
+        job.error_count = FileOperation.query.filter_by(job_id=job_id, status=FILE_OPERATION_STATUS_FAILED).count()
+        job.cancelled_count = 0
+        job.status = JOB_STATUS_RUNNING
+        db.session.commit()
+        clear_job_signal(job_id)
+
+        if job.name == 'organize_photos':
+            batch_size = batch_size_for(db.session, 'organize_photos', len(operation_ids), default=100)
+            for batch_index, batch in enumerate(batched(operation_ids, batch_size)):
+                organize_photos_task(job_id=job_id, operation_ids=list(batch),
+                                     priority=batch_priority(organize_photos_task, batch_index))
+        else:
+            remove_duplicates_task(job_id=job_id, operation_ids=operation_ids)
+
+        response = jsonify({'job_id': job_id, 'resumed_count': len(operation_ids)})
+        response.headers['HX-Trigger'] = json.dumps({
+            'showNotification': {'message': f'Resumed {len(operation_ids)} file operation(s)', 'type': 'success'}
+        })
+        response.headers['HX-Refresh'] = 'true'
+        return response, 202
+
+    def resume_job_items(job: Job):
+        pending_count = requeue_job(db.session, job.id, retry_failed=True)
+        if not pending_count:
+            db.session.rollback()
+            return jsonify({'error': 'Nothing left to resume'}), 400
+        db.session.commit()
+        fan_out_job_task(job.id)
+
+        response = jsonify({'job_id': job.id, 'resumed_count': pending_count})
+        response.headers['HX-Trigger'] = json.dumps({
+            'showNotification': {'message': f'Resumed {pending_count} item(s)', 'type': 'success'}
+        })
+        response.headers['HX-Refresh'] = 'true'
+        return response, 202
+
+    @app.route("/jobs/<job_id>/rollback", methods=["POST"])
+    def job_rollback(job_id: str):
+        """Undo the moves and copies a job has made, using its file journal"""
+        done_count = FileOperation.query.filter(
+            FileOperation.job_id == job_id,
+            FileOperation.status == FILE_OPERATION_STATUS_DONE,
+            FileOperation.operation_type.in_([FILE_OPERATION_MOVE, FILE_OPERATION_COPY])
+        ).count()
+        if done_count == 0:
+            return jsonify({'error': 'Nothing to roll back'}), 400
+
+        job = db.session.query(Job).filter_by(id=job_id).first()
+        if job and job.status in [JOB_STATUS_PENDING, JOB_STATUS_RUNNING]:
+            return jsonify({'error': 'Cancel the job before rolling it back'}), 400
+
+        rollback_job_id = str(uuid.uuid4())
+        db.session.add(Job(
+            id=rollback_job_id,
+            name='rollback_file_operations',
+            status=JOB_STATUS_PENDING,
+            task_count=done_count,
+            message='Rolled back {totalCount}/{taskCount} files',
+            completed_count=0,
+            error_count=0,
+            cancelled_count=0,
+            job_data=json.dumps({'source_job_id': job_id})
+        ))
+        db.session.commit()
+
+        rollback_file_operations_task(job_id=rollback_job_id, source_job_id=job_id)
+
+        response = jsonify({'job_id': rollback_job_id})
+        response.headers['HX-Trigger'] = json.dumps({
+            'showNotification': {'message': f'Rolling back {done_count} file operation(s)', 'type': 'success'}
+        })
+        return response, 202
@@ -1,41 +1,61 @@
-import os
 import requests
 from flask import Flask, render_template, jsonify, request
 from sqlalchemy import func
 
 from yaffo.db import db
-from yaffo.db.models import Photo, PHOTO_STATUS_INDEXED
+from yaffo.db.models import Photo, MAX_CLUSTER_ZOOM
+from yaffo.db.repositories.location_repository import get_photos_in_viewport, get_location_clusters, \
+    get_locations_extent
+from yaffo.db.repositories.metadata_change_repository import mark_photos_dirty
+from yaffo.utils.request_helpers import parse_bbox, boolean_map
 
 def init_locations_routes(app: Flask):
     @app.route("/locations", methods=["GET"])
     def locations_list():
-        """List all locations"""
-        locations = (
-            db.session.query(
-                Photo.id,
-                Photo.location_name,
-                Photo.latitude,
-                Photo.longitude,
-                Photo.full_file_path
-            )
-            .filter(Photo.latitude.isnot(None))
-            .filter(Photo.longitude.isnot(None))
-            .all()
-        )
-
-        locations_data = [
-            {
-                'id': loc.id,
-                'name': loc.location_name,
-                'lat': float(loc.latitude),
-                'lon': float(loc.longitude),
-                'photo_path': loc.full_file_path,
-                'filename': os.path.basename(loc.full_file_path)
-            }
-            for loc in locations
-        ]
-
-        return render_template("locations/list.html", locations=locations_data)
+        """The locations map, which loads its clusters for the viewport from /api/locations/clusters"""
+        return render_template("locations/list.html", extent=get_locations_extent(db.session))
+
+    @app.route("/api/locations/extent", methods=["GET"])
+    def locations_extent():
+        """The extent around every geotagged photo, or only those without a location name. Query params: unnamed"""
+        unnamed_only = boolean_map.get(request.args.get("unnamed", "false"), False)
+        return jsonify({'extent': get_locations_extent(db.session, unnamed_only)})
+
+    @app.route("/api/locations/photos", methods=["GET"])
+    def locations_in_viewport():
+        """
+        Geotagged photos inside the map viewport, found through the photo_locations R*Tree.
+        Query params: bbox=min_lon,min_lat,max_lon,max_lat, min_lon > max_lon when it spans the antimeridian; unnamed
+        """
+        bbox = parse_bbox(request.args.get("bbox"))
+        if bbox is None:
+            return jsonify({'error': 'bbox must be min_lon,min_lat,max_lon,max_lat'}), 400
+        unnamed_only = boolean_map.get(request.args.get("unnamed", "false"), False)
+        return jsonify({'photos': get_photos_in_viewport(db.session, *bbox, unnamed_only=unnamed_only)})
+
+    @app.route("/api/locations/clusters", methods=["GET"])
+    def location_clusters():
+        """
+        What the map shows for a viewport: the precomputed grid clusters up to MAX_CLUSTER_ZOOM,
+        the photos themselves when zoomed in further.
+        Query params: bbox (as for /api/locations/photos), zoom, unnamed
+        """
+        bbox = parse_bbox(request.args.get("bbox"))
+        zoom = request.args.get("zoom", type=float)
+        if bbox is None or zoom is None:
+            return jsonify({'error': 'bbox and zoom are required'}), 400
+        unnamed_only = boolean_map.get(request.args.get("unnamed", "false"), False)
+
+        zoom = int(zoom)
+        if zoom > MAX_CLUSTER_ZOOM:
+            return jsonify({
+                'zoom': zoom,
+                'photos': get_photos_in_viewport(db.session, *bbox, unnamed_only=unnamed_only)
+            })
+        return jsonify({
+            'zoom': zoom,
+            'clusters': get_location_clusters(db.session, zoom, *bbox, unnamed_only=unnamed_only)
+        })
 
     @app.route("/locations/bulk-update", methods=["POST"])
     def locations_bulk_update():
@@ -52,10 +72,10 @@ def init_locations_routes(app: Flask):
                 db.session.query(Photo)
                 .filter(Photo.id.in_(photo_ids))
                 .update({
-                    'location_name': location_name,
-                    'status': PHOTO_STATUS_INDEXED
+                    'location_name': location_name
                 }, synchronize_session=False)
             )
+            mark_photos_dirty(db.session, photo_ids)
             db.session.commit()
 
             return jsonify({
@@ -3,13 +3,40 @@ from sqlalchemy import func
 from sqlalchemy.orm import joinedload, aliased
 
 from yaffo.db import db
-from yaffo.db.models import Person, PersonFace, Face, FACE_STATUS_UNASSIGNED, Photo
+from yaffo.db.models import Person, PersonFace, Face, FACE_STATUS_UNASSIGNED, Photo, PhotoPerson
+from yaffo.db.pagination import paginate, get_page_index
+from yaffo.db.repositories.metadata_change_repository import mark_person_photos_dirty, mark_face_photos_dirty
 from yaffo.db.repositories.person_repository import update_person_embedding
 from yaffo.db.repositories.photos_repository import get_distinct_months, get_distinct_years
 from yaffo.utils.context import context
 
 DEFAULT_THRESHOLD = 0.95  # configurable similarity threshold
 FACE_LOAD_LIMIT = 250
+PERSON_FACES_PAGE_SIZES = [50, 100, 250, 500, 1000]
+# Least similar first, so faces assigned by mistake come up on the first pages
+PERSON_FACES_PAGE_KEYS = (PersonFace.similarity, PersonFace.face_id)
+
+
+def person_faces_query(person_id: int, year: int | None, month: int | None,
+                       min_similarity: float | None, max_similarity: float | None):
+    photo_alias = aliased(Photo)
+    query = (
+        db.session.query(Face)
+        .join(PersonFace)
+        .join(photo_alias, Face.photo)
+        .filter(PersonFace.person_id == person_id)
+    )
+    if year:
+        query = query.filter(photo_alias.year == year)
+    if month:
+        query = query.filter(photo_alias.month == month)
+    if min_similarity and min_similarity > 0:
+        query = query.filter(PersonFace.similarity > min_similarity)
+    if max_similarity and max_similarity > 0:
+        query = query.filter(PersonFace.similarity < max_similarity)
+    return query
+
+
 @context("yaffo-face_assignment")
 def init_people_routes(app: Flask):
     @app.route("/people", methods=["GET"])
@@ -19,11 +46,10 @@ def init_people_routes(app: Flask):
         people = (
             db.session.query(
                 Person,
-                func.count(func.distinct(PersonFace.face_id)).label('num_faces'),
-                func.count(func.distinct(Face.photo_id)).label('num_photos')
+                func.sum(PhotoPerson.face_count).label('num_faces'),
+                func.count(PhotoPerson.photo_id).label('num_photos')
             )
-            .outerjoin(PersonFace, Person.id == PersonFace.person_id)
-            .outerjoin(Face, PersonFace.face_id == Face.id)
+            .outerjoin(PhotoPerson, Person.id == PhotoPerson.person_id)
             .group_by(Person.id)
             .order_by(Person.name)
             .all()
@@ -106,6 +132,8 @@ def init_people_routes(app: Flask):
 
         old_name = person.name
         person.name = name
+        if name != old_name:
+            mark_person_photos_dirty(db.session, person_id)
         db.session.commit()
 
         flash(f"Renamed '{old_name}' to '{name}'", "success")
@@ -133,6 +161,9 @@ def init_people_routes(app: Flask):
                 synchronize_session=False
             )
 
+        # Their photos lose this person's name, read them before photo_people drops the rows
+        mark_person_photos_dirty(db.session, person_id)
+
         # Delete all PersonFace associations
         PersonFace.query.filter(PersonFace.person_id == person_id).delete()
 
@@ -153,7 +184,7 @@ def init_people_routes(app: Flask):
         month = request.args.get("month", type=int)
         min_similarity = request.args.get("min_similarity", type=float)
         max_similarity = request.args.get("max_similarity", type=float)
-        page = request.args.get("page", default=1, type=int)
+        page_number = request.args.get("page", default=1, type=int)
         page_size = request.args.get("page-size", type=int)
         filter_face_page_size = page_size if page_size else FACE_LOAD_LIMIT
 
@@ -161,48 +192,25 @@ def init_people_routes(app: Flask):
             flash("Person not found", "error")
             return redirect(url_for("people_list"))
 
-        photo_alias = aliased(Photo)
-
-        # Build base query for this person
-        query = (
-            db.session.query(Face)
-            .join(PersonFace)
-            .join(photo_alias, Face.photo)
-            .filter(PersonFace.person_id == person_id)
-            .options(
-                joinedload(Face.photo),  # eager load photo
+        page = paginate(
+            person_faces_query(person_id, year, month, min_similarity, max_similarity),
+            PERSON_FACES_PAGE_KEYS,
+            filter_face_page_size,
+            cursor=request.args.get("cursor"),
+            page_number=page_number,
+            options=[
+                joinedload(Face.photo, innerjoin=True),  # eager load photo, inner so it needn't materialize photos
                 joinedload(Face.person_face)  # eager load person_face
-            )
-        )
-
-        if year:
-            query = query.filter(photo_alias.year == year)
-        if month:
-            query = query.filter(photo_alias.month == month)
-        if min_similarity and min_similarity > 0:
-            query = query.filter(PersonFace.similarity > min_similarity)
-        if max_similarity and max_similarity > 0:
-            query = query.filter(PersonFace.similarity < max_similarity)
-
-        # Get total count for pagination
-        total_faces = query.count()
-
-        # Apply pagination
-        offset = (page - 1) * filter_face_page_size
-        faces = (
-            query
-            .order_by(PersonFace.similarity)
-            .limit(filter_face_page_size)
-            .offset(offset)
-            .all()
+            ],
         )
+        faces = page.items
 
         filters = {
             "years": get_distinct_years(db.session),
             "selected_year": year,
             "months": get_distinct_months(),
             "selected_month": month,
-            "page_sizes": [50, 100, 250, 500, 1000],
+            "page_sizes": PERSON_FACES_PAGE_SIZES,
             "page_size": filter_face_page_size,
             "min_similarity": min_similarity,
             "max_similarity": max_similarity,
@@ -213,14 +221,24 @@ def init_people_routes(app: Flask):
             for face in faces
         ]
 
-        pagination = {
-            "current_page": page,
-            "total_items": total_faces,
-            "page_size": filter_face_page_size,
-            "page_sizes": [50, 100, 250, 500, 1000],
-        }
-
-        return render_template("people/faces.html", person=person, faces=face_data, filters=filters, pagination=pagination)
+        return render_template("people/faces.html", person=person, faces=face_data, filters=filters, page=page)
+
+    @app.route("/api/people/<int:person_id>/faces/page-count", methods=["GET"])
+    def person_faces_page_count(person_id):
+        """Total faces and pages for a person's face filters, loaded by the pagination after the page is shown."""
+        query = person_faces_query(
+            person_id,
+            request.args.get("year", type=int),
+            request.args.get("month", type=int),
+            request.args.get("min_similarity", type=float),
+            request.args.get("max_similarity", type=float),
+        )
+        page_size = request.args.get("page-size", default=FACE_LOAD_LIMIT, type=int)
+        page_index = get_page_index(query, PERSON_FACES_PAGE_KEYS, page_size)
+        return render_template(
+            "components/page_count.html", page_index=page_index, page_endpoint="person_faces",
+            page_number=request.args.get("page", default=1, type=int)
+        )
 
     @app.route("/people/<int:person_id>/faces/remove", methods=["POST"])
     def person_faces_remove(person_id):
@@ -245,6 +263,7 @@ def init_people_routes(app: Flask):
                 {Face.status: FACE_STATUS_UNASSIGNED},
                 synchronize_session=False
             )
+            mark_face_photos_dirty(db.session, face_ids)
             db.session.commit()
         flash("Person updated", "success")
         update_person_embedding(person_id, db.session)
@@ -1,6 +1,6 @@
-from yaffo.utils.image import convert_heif
+from yaffo.utils.image import convert_heif, get_cached_preview
 from flask import Flask, send_from_directory, send_file, render_template, request, jsonify
-from yaffo.common import ROOT_DIR
+from yaffo.common import ROOT_DIR, PREVIEW_CACHE_DIR
 from yaffo.db.models import db, Photo, Person, Tag
 from sqlalchemy.orm import joinedload
 from yaffo.db.models import Face
@@ -45,6 +45,10 @@ def init_photos_routes(app: Flask):
         if not file_path.exists():
             return "File not found", 404
 
+        size = request.args.get("size", type=int)
+        if size:
+            return send_file(get_cached_preview(file_path, size, PREVIEW_CACHE_DIR), mimetype="image/jpeg")
+
         if file_path.suffix.lower() == ".heic":
             img = convert_heif(file_path)
             buffer = io.BytesIO()
@@ -64,6 +68,10 @@ def init_photos_routes(app: Flask):
         if not file_path.exists():
             return "File not found", 404
 
+        size = request.args.get("size", type=int)
+        if size:
+            return send_file(get_cached_preview(file_path, size, PREVIEW_CACHE_DIR), mimetype="image/jpeg")
+
         if file_path.suffix.lower() == ".heic":
             img = convert_heif(file_path)
             buffer = io.BytesIO()
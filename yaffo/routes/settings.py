@@ -1,6 +1,7 @@
 from flask import Flask, render_template, request, jsonify
 from yaffo.db import db
 from yaffo.db.models import ApplicationSettings, Face
+from yaffo.db.repositories.directory_repository import move_directory, count_files_in_directory, find_move_clashes
 from yaffo.common import DB_PATH, HUEY_DB_PATH
 import json
 import subprocess
@@ -202,6 +203,14 @@ def init_settings_routes(app: Flask):
         if current_dir and new_dir_path.resolve() == current_dir.resolve():
             return jsonify({"error": "New directory is the same as current directory"}), 400
 
+        # Merging into a folder that already holds thumbnails with the same names would overwrite them
+        if current_dir:
+            clashes = find_move_clashes(db.session, str(current_dir), str(new_dir_path))
+            if clashes:
+                return jsonify({
+                    "error": f"{len(clashes)} thumbnail(s) already exist in the new directory, such as {clashes[0]}"
+                }), 400
+
         try:
             # Create new directory if it doesn't exist
             new_dir_path.mkdir(parents=True, exist_ok=True)
@@ -209,9 +218,6 @@ def init_settings_routes(app: Flask):
             # Get stats before moving
             file_count, total_size = get_thumbnail_stats(current_dir)
 
-            # Track path mappings for database update
-            path_mappings = {}
-
             # Move files
             if current_dir and current_dir.exists() and file_count > 0:
                 for file_path in current_dir.rglob("*"):
@@ -219,20 +225,13 @@ def init_settings_routes(app: Flask):
                         relative_path = file_path.relative_to(current_dir)
                         dest_path = new_dir_path / relative_path
                         dest_path.parent.mkdir(parents=True, exist_ok=True)
-
-                        # Track the mapping of old path to new path
-                        path_mappings[str(file_path)] = str(dest_path)
-
                         shutil.move(str(file_path), str(dest_path))
 
-            # Update Face table with new thumbnail paths
+            # Faces reference their directory, so repointing the directory rows updates every thumbnail path
             faces_updated = 0
-            if path_mappings:
-                faces = db.session.query(Face).filter(Face.full_file_path.in_(path_mappings.keys())).all()
-                for face in faces:
-                    if face.full_file_path in path_mappings:
-                        face.full_file_path = path_mappings[face.full_file_path]
-                        faces_updated += 1
+            if current_dir:
+                faces_updated = count_files_in_directory(db.session, Face, str(current_dir))
+                move_directory(db.session, str(current_dir), str(new_dir_path))
 
             # Update or create setting
             if thumbnail_setting:
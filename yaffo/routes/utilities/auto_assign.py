@@ -1,8 +1,8 @@
 from flask import render_template, Flask, redirect, url_for, request, jsonify
 from yaffo.db import db
 from yaffo.db.models import Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED, Person, Face, FACE_STATUS_UNASSIGNED
-from yaffo.background_tasks.tasks import auto_assign_faces_task, schedule_job_completion
-from itertools import batched
+from yaffo.db.repositories.job_item_repository import add_job_items
+from yaffo.background_tasks.tasks import fan_out_job_task
 import uuid
 import json
 
@@ -59,18 +59,15 @@ def init_auto_assign_routes(app: Flask):
             job_data=json.dumps({
                 'person_id': person_id,
                 'person_name': person.name,
-                'similarity_threshold': similarity_threshold,
-                'unassigned_face_ids': unassigned_face_ids
+                'similarity_threshold': similarity_threshold
             })
         )
         db.session.add(job)
+        add_job_items(db.session, job_id, unassigned_face_ids)
         db.session.commit()
 
-        for batch in batched(unassigned_face_ids, 100):
-            auto_assign_faces_task(job_id=job_id, face_id_batch=list(batch), person_id=person_id,
-                                   similarity_threshold=similarity_threshold)
+        fan_out_job_task(job_id)
 
-        schedule_job_completion(job_id)
 
         return jsonify({'job_id': job_id}), 202
 
@@ -2,11 +2,10 @@ from flask import render_template, Flask, request, jsonify
 from yaffo.db import db
 from yaffo.db.models import Photo, Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, PHOTO_STATUS_INDEXED, PHOTO_STATUS_SYNCED
 from yaffo.common import PHOTO_EXTENSIONS
-from yaffo.background_tasks.tasks import index_photo_task, import_photo_task, schedule_job_completion
+from yaffo.db.repositories.job_item_repository import add_job_items
+from yaffo.background_tasks.tasks import fan_out_job_task, complete_job_if_finished
 from pathlib import Path
-from itertools import batched
 import uuid
-import json
 
 from yaffo.utils.index_photos import delete_orphaned_photos, delete_orphaned_thumbnails
 from yaffo.routes.utilities.common import is_system_file, get_media_dirs, get_thumbnail_dir
@@ -85,7 +84,7 @@ def init_index_photos_routes(app: Flask):
 
         active_jobs = db.session.query(Job).filter(
             Job.status.in_([JOB_STATUS_PENDING, JOB_STATUS_RUNNING]),
-            Job.name.in_(['index_photos', 'import_photos']),
+            Job.name == 'index_photos',
         ).all()
 
         return render_template(
@@ -125,25 +124,10 @@ def init_index_photos_routes(app: Flask):
         db_photos = db.session.query(Photo.id, Photo.full_file_path, Photo.status).all()
         db_photos_dict = {photo[1]: photo for photo in db_photos}
 
-        files_to_import = [file_path for file_path in files_to_index if not file_path in db_photos_dict.keys()]
-
-        import_job_id = str(uuid.uuid4())
-        import_job = Job(
-            id=import_job_id,
-            name='import_photos',
-            status=JOB_STATUS_PENDING,
-            task_count=len(files_to_import),
-            message='Imported {totalCount}/{taskCount} photos',
-            completed_count=0,
-            error_count=0,
-            cancelled_count=0,
-            job_data=json.dumps({
-                'files_to_import': files_to_import
-            })
-        )
         files_needing_indexing = [file_path for file_path in files_to_index if
                                   not file_path in db_photos_dict.keys() or
                                   db_photos_dict[file_path][2] != PHOTO_STATUS_INDEXED]
+        # Index batches insert the rows for new photos themselves, no separate import job
         index_job_id = str(uuid.uuid4())
         index_job = Job(
             id=index_job_id,
@@ -153,24 +137,20 @@ def init_index_photos_routes(app: Flask):
             message='Indexed {totalCount}/{taskCount} photos',
             completed_count=0,
             error_count=0,
-            cancelled_count=0,
-            job_data=json.dumps({
-                'files_to_index': files_needing_indexing
-            })
+            cancelled_count=0
         )
-        db.session.add(import_job)
         db.session.add(index_job)
+        add_job_items(db.session, index_job_id, files_needing_indexing)
+        db.session.flush()
+        # A job with nothing to do has no batch that would complete it
+        complete_job_if_finished(db.session, index_job_id)
         db.session.commit()
 
         delete_orphaned_photos(db.session, files_to_delete)
         delete_orphaned_thumbnails(db.session, thumbnail_dir)
 
-        for batch in batched(files_to_import, 250):
-            import_photo_task(import_job_id, list(batch))
-        schedule_job_completion(import_job_id)
-
-        for batch in batched(files_needing_indexing, 10):
-            index_photo_task(index_job_id, list(batch))
+        # Batches are enqueued in the background, a few at a time
+        if files_needing_indexing:
+            fan_out_job_task(index_job_id)
 
-        schedule_job_completion(index_job_id)
-        return jsonify({'job_id': import_job_id}), 202
\ No newline at end of file
+        return jsonify({'job_id': index_job_id}), 202
\ No newline at end of file
@@ -1,14 +1,48 @@
 from flask import render_template, Flask, request, jsonify
 from yaffo.db import db
-from yaffo.db.models import Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING
+from yaffo.db.models import Job, JobResult, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED, \
+    JOB_STATUS_CANCELLED
 from yaffo.common import PHOTO_EXTENSIONS
-from yaffo.background_tasks.tasks import organize_photos_task, schedule_job_completion
+from yaffo.background_tasks.tasks import organize_photos_task, plan_organize_task, signal_job_cancelled, \
+    batch_priority, batch_size_for
+from yaffo.background_tasks.tasks.plan_organize import PLAN_CHUNK_SIZE
 from pathlib import Path
 from itertools import batched
 import uuid
 import json
 
 from yaffo.routes.utilities.common import is_system_file, get_thumbnail_dir
+from yaffo.utils.file_operations import journal_file_operations
+
+
+def collect_organize_photo_files(source_path: Path) -> list[str]:
+    thumbnail_dir = get_thumbnail_dir()
+
+    photo_files = []
+    for p in source_path.rglob("*"):
+        if not (p.suffix.lower() in PHOTO_EXTENSIONS and not p.name.startswith(".") and p.is_file()):
+            continue
+
+        if thumbnail_dir and p.is_relative_to(thumbnail_dir):
+            continue
+
+        if is_system_file(p.name):
+            continue
+
+        photo_files.append(str(p))
+    return photo_files
+
+
+def load_plan_page(job_id: str, offset: int, limit: int) -> list[dict]:
+    """Read planned operations [offset, offset + limit) from the fixed size JobResult chunks."""
+    first_chunk = offset // PLAN_CHUNK_SIZE
+    last_chunk = (offset + limit - 1) // PLAN_CHUNK_SIZE
+    results = db.session.query(JobResult).filter_by(job_id=job_id).order_by(JobResult.id) \
+        .offset(first_chunk).limit(last_chunk - first_chunk + 1).all()
+
+    operations = [operation for result in results for operation in json.loads(result.result_data)]
+    start = offset - first_chunk * PLAN_CHUNK_SIZE
+    return operations[start:start + limit]
 
 
 def init_organize_photos_routes(app: Flask):
@@ -26,9 +60,6 @@ def init_organize_photos_routes(app: Flask):
 
     @app.route("/utilities/organize-photos/preview", methods=["POST"])
     def utilities_organize_photos_preview():
-        from yaffo.utils.photo_dates import get_photo_date
-        from calendar import month_name
-
         data = request.get_json()
         source_directory = data.get('source_directory')
         destination_directory = data.get('destination_directory')
@@ -54,137 +85,115 @@ def init_organize_photos_routes(app: Flask):
         else:
             target_path = source_path
 
-        thumbnail_dir = get_thumbnail_dir()
+        photo_files = collect_organize_photo_files(source_path)
+        if not photo_files:
+            return jsonify({'error': 'No photo files found in source directory'}), 400
 
-        photo_files = []
-        for p in source_path.rglob("*"):
-            if not (p.suffix.lower() in PHOTO_EXTENSIONS and not p.name.startswith(".") and p.is_file()):
-                continue
-
-            if thumbnail_dir and p.is_relative_to(thumbnail_dir):
-                continue
-
-            if is_system_file(p.name):
-                continue
-
-            photo_files.append(p)
-
-        total_files = len(photo_files)
-        files_to_move = 0
-        files_staying = 0
-        file_list = []
-
-        for photo_file in photo_files:
-            date_taken = get_photo_date(str(photo_file), exif_data)
-
-            if date_taken:
-                if pattern == 'year_month':
-                    dest_folder = target_path / str(date_taken.year) / month_name[date_taken.month]
-                elif pattern == 'year_month_day':
-                    dest_folder = target_path / str(date_taken.year) / month_name[date_taken.month] / f"{date_taken.day:02d}"
-                elif pattern == 'year':
-                    dest_folder = target_path / str(date_taken.year)
-                else:
-                    dest_folder = target_path / "unknown"
-            else:
-                dest_folder = target_path / "unknown"
-
-            dest_file = dest_folder / photo_file.name
+        operation_type = 'copy' if keep_original else 'move'
 
-            if photo_file.resolve() != dest_file.resolve():
-                files_to_move += 1
-                file_list.append({
-                    'source': str(photo_file.relative_to(source_path)),
-                    'destination': str(dest_file.relative_to(target_path))
-                })
+        # Only the most recent plan is ever used, drop older ones and their stored results. A plan
+        # still being worked on is only cancelled, its task may yet store a chunk, and is dropped
+        # by the next preview once it has stopped
+        for previous_job in db.session.query(Job).filter_by(name='organize_preview').all():
+            if previous_job.status in (JOB_STATUS_PENDING, JOB_STATUS_RUNNING):
+                signal_job_cancelled(previous_job.id)
+                previous_job.status = JOB_STATUS_CANCELLED
             else:
-                files_staying += 1
+                db.session.delete(previous_job)
 
-        operation = 'copy' if keep_original else 'move'
+        job_id = str(uuid.uuid4())
+        job = Job(
+            id=job_id,
+            name='organize_preview',
+            status=JOB_STATUS_PENDING,
+            task_count=len(photo_files),
+            message='Planned {totalCount}/{taskCount} photos',
+            completed_count=0,
+            error_count=0,
+            cancelled_count=0,
+            job_data=json.dumps({
+                'source_directory': source_directory,
+                'destination_directory': destination_directory,
+                'target_directory': str(target_path),
+                'pattern': pattern,
+                'keep_original': keep_original,
+                'operation_type': operation_type
+            })
+        )
+        db.session.add(job)
+        db.session.commit()
 
-        return jsonify({
-            'total_files': total_files,
-            'files_to_move': files_to_move,
-            'files_staying': files_staying,
+        plan_organize_task(
+            job_id=job_id,
+            file_paths=photo_files,
+            target_directory=str(target_path),
+            pattern=pattern,
+            operation_type=operation_type
+        )
+        return jsonify({'job_id': job_id}), 202
+
+    @app.route("/utilities/organize-photos/preview/<job_id>", methods=["GET"])
+    def utilities_organize_photos_preview_results(job_id: str):
+        page = request.args.get('page', 0, type=int)
+        page_size = request.args.get('page_size', 100, type=int)
+
+        job = db.session.query(Job).filter_by(id=job_id, name='organize_preview').first()
+        if not job:
+            return jsonify({'error': 'Preview not found'}), 404
+
+        job_data = json.loads(job.job_data) if job.job_data else {}
+        response = {
+            'job_id': job.id,
+            'status': job.status,
+            'completed_count': job.completed_count,
+            'task_count': job.task_count,
+            'error': job.error,
+            'operation': job_data.get('operation_type'),
+        }
+        if job.status != JOB_STATUS_COMPLETED:
+            return jsonify(response)
+
+        source_path = Path(job_data['source_directory'])
+        target_path = Path(job_data['target_directory'])
+        file_list = [
+            {
+                'source': str(Path(operation['source']).relative_to(source_path)),
+                'destination': str(Path(operation['destination']).relative_to(target_path))
+            }
+            for operation in load_plan_page(job_id, page * page_size, page_size)
+        ]
+        response.update({
+            'total_files': job_data.get('total_files', 0),
+            'files_to_move': job_data.get('files_to_move', 0),
+            'files_staying': job_data.get('files_staying', 0),
+            'page': page,
+            'page_size': page_size,
             'file_list': file_list,
-            'operation': operation
         })
+        return jsonify(response)
 
     @app.route("/utilities/organize-photos/start", methods=["POST"])
     def utilities_organize_photos_start():
-        from yaffo.utils.photo_dates import get_photo_date
-        from calendar import month_name
-
         data = request.get_json()
-        source_directory = data.get('source_directory')
-        destination_directory = data.get('destination_directory')
-        pattern = data.get('pattern')
-        keep_original = data.get('keep_original', False)
-
-        if not source_directory:
-            return jsonify({'error': 'Source directory is required'}), 400
-
-        source_path = Path(source_directory)
-        if not source_path.exists():
-            return jsonify({'error': 'Source directory does not exist'}), 400
-
-        if not source_path.is_dir():
-            return jsonify({'error': 'Source path is not a directory'}), 400
-
-        if destination_directory:
-            target_path = Path(destination_directory)
-            if not target_path.exists():
-                return jsonify({'error': 'Destination directory does not exist'}), 400
-            if not target_path.is_dir():
-                return jsonify({'error': 'Destination path is not a directory'}), 400
-        else:
-            target_path = source_path
-
-        thumbnail_dir = get_thumbnail_dir()
-
-        photo_files = []
-        for p in source_path.rglob("*"):
-            if not (p.suffix.lower() in PHOTO_EXTENSIONS and not p.name.startswith(".") and p.is_file()):
-                continue
-
-            if thumbnail_dir and p.is_relative_to(thumbnail_dir):
-                continue
+        preview_job_id = data.get('preview_job_id')
 
-            if is_system_file(p.name):
-                continue
+        if not preview_job_id:
+            return jsonify({'error': 'Generate a preview before organizing'}), 400
 
-            photo_files.append(p)
+        preview_job = db.session.query(Job).filter_by(id=preview_job_id, name='organize_preview').first()
+        if not preview_job:
+            return jsonify({'error': 'Preview not found, generate it again'}), 404
+        if preview_job.status != JOB_STATUS_COMPLETED:
+            return jsonify({'error': 'Preview is not finished yet'}), 400
 
-        file_operations = []
-        operation_type = 'copy' if keep_original else 'move'
-
-        for photo_file in photo_files:
-            date_taken = get_photo_date(str(photo_file), None)
-
-            if date_taken:
-                if pattern == 'year_month':
-                    dest_folder = target_path / str(date_taken.year) / month_name[date_taken.month]
-                elif pattern == 'year_month_day':
-                    dest_folder = target_path / str(date_taken.year) / month_name[date_taken.month] / f"{date_taken.day:02d}"
-                elif pattern == 'year':
-                    dest_folder = target_path / str(date_taken.year)
-                else:
-                    dest_folder = target_path / "unknown"
-            else:
-                dest_folder = target_path / "unknown"
-
-            dest_file = dest_folder / photo_file.name
-
-            if photo_file.resolve() != dest_file.resolve():
-                file_operations.append({
-                    'source': str(photo_file),
-                    'destination': str(dest_file),
-                    'type': operation_type
-                })
+        preview_data = json.loads(preview_job.job_data)
+        results = db.session.query(JobResult).filter_by(job_id=preview_job_id).order_by(JobResult.id).all()
+        file_operations = [operation for result in results for operation in json.loads(result.result_data)]
 
         if not file_operations:
             return jsonify({'error': 'No files to organize'}), 400
 
+        keep_original = preview_data.get('keep_original', False)
         job_id = str(uuid.uuid4())
         job = Job(
             id=job_id,
@@ -196,17 +205,22 @@ def init_organize_photos_routes(app: Flask):
             error_count=0,
             cancelled_count=0,
             job_data=json.dumps({
-                'source_directory': source_directory,
-                'destination_directory': destination_directory,
-                'pattern': pattern,
+                'source_directory': preview_data.get('source_directory'),
+                'destination_directory': preview_data.get('destination_directory'),
+                'pattern': preview_data.get('pattern'),
                 'keep_original': keep_original,
-                'operation_type': operation_type
+                'operation_type': preview_data.get('operation_type'),
+                'preview_job_id': preview_job_id
             })
         )
         db.session.add(job)
+        db.session.delete(preview_job)
+        operation_ids = journal_file_operations(db.session, job_id, file_operations)
+        job.task_count = len(operation_ids)
         db.session.commit()
 
-        for batch in batched(file_operations, 100):
-            organize_photos_task(job_id=job_id, file_operations=list(batch))
-        schedule_job_completion(job_id)
-        return jsonify({'job_id': job_id}), 202
\ No newline at end of file
+        batch_size = batch_size_for(db.session, 'organize_photos', len(operation_ids), default=100)
+        for batch_index, batch in enumerate(batched(operation_ids, batch_size)):
+            organize_photos_task(job_id=job_id, operation_ids=list(batch),
+                                 priority=batch_priority(organize_photos_task, batch_index))
+        return jsonify({'job_id': job_id}), 202
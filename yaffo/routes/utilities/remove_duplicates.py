@@ -4,19 +4,24 @@ from flask import render_template, Flask, request, jsonify, redirect, url_for
 from yaffo.db import db
 from yaffo.db.models import Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_COMPLETED
 from yaffo.common import PHOTO_EXTENSIONS
-from yaffo.background_tasks.tasks import find_duplicates_task, remove_duplicates_task, schedule_job_completion
+from yaffo.background_tasks.tasks import find_duplicates_task, remove_duplicates_task
 from pathlib import Path
 from sqlalchemy.orm import joinedload
 from sqlalchemy import or_, and_
 import uuid
 import json
-import send2trash
-import os
-import shutil
 
 from yaffo.routes.utilities.common import is_system_file, get_thumbnail_dir
+from yaffo.utils.file_operations import journal_file_operations, FILE_OPERATION_TRASH, FILE_OPERATION_DELETE, \
+    FILE_OPERATION_MOVE
 from yaffo.utils.file_system import show_file_dialog
 
+DUPLICATE_ACTION_OPERATIONS = {
+    'trash': FILE_OPERATION_TRASH,
+    'delete': FILE_OPERATION_DELETE,
+    'moveFolder': FILE_OPERATION_MOVE,
+}
+
 
 def collect_photo_paths(directory_paths: list[str]) -> list[str]:
     found_paths = set()
@@ -331,6 +336,9 @@ def init_remove_duplicates_routes(app: Flask):
             })
             return response
 
+        if action_type not in DUPLICATE_ACTION_OPERATIONS:
+            return jsonify({'error': f'Unknown action {action_type}'}), 400
+
         if action_type == 'moveFolder' and not destination_folder:
             response = jsonify({'error': 'Destination folder is required'})
             response.status_code = 400
@@ -387,15 +395,19 @@ def init_remove_duplicates_routes(app: Flask):
         if find_job:
             db.session.delete(find_job)
 
+        operation_ids = journal_file_operations(db.session, execution_job_id, [
+            {
+                'source': file_path,
+                'destination': str(Path(destination_folder) / Path(file_path).name) if action_type == 'moveFolder' else None,
+                'type': DUPLICATE_ACTION_OPERATIONS[action_type]
+            }
+            for file_path in selected_files
+        ])
+        execution_job.task_count = len(operation_ids)
         db.session.commit()
 
         # Start background task
-        remove_duplicates_task(
-            job_id=execution_job_id,
-            file_paths=selected_files,
-            action_type=action_type,
-            destination_folder=destination_folder
-        )
+        remove_duplicates_task(job_id=execution_job_id, operation_ids=operation_ids)
 
         response = jsonify({'success': True, 'job_id': execution_job_id})
         response.headers['HX-Trigger'] = json.dumps({
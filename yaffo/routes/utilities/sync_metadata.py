@@ -1,42 +1,25 @@
 from flask import render_template, Flask, request, jsonify
 from yaffo.db import db
-from yaffo.db.models import Photo, Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, PHOTO_STATUS_INDEXED, PHOTO_STATUS_SYNCED
-from yaffo.background_tasks.tasks import sync_metadata_task, schedule_job_completion
-from pathlib import Path
-from itertools import batched
+from yaffo.db.models import Photo, Job, JOB_STATUS_PENDING, JOB_STATUS_RUNNING, PHOTO_STATUS_SYNCED
+from yaffo.db.repositories.metadata_change_repository import count_dirty_photos, get_dirty_photo_ids, \
+    load_dirty_photos_page
+from yaffo.db.repositories.job_item_repository import add_job_items
+from yaffo.background_tasks.tasks import fan_out_job_task
 import uuid
 import json
 
 
+SYNC_METADATA_PAGE_SIZES = [50, 100, 250, 500]
+
+
 def init_sync_metadata_routes(app: Flask):
     @app.route("/utilities/sync-metadata", methods=["GET"])
     def utilities_sync_metadata():
-        photos_with_metadata = db.session.query(Photo).filter(
-            (Photo.status == PHOTO_STATUS_INDEXED) | (Photo.status == PHOTO_STATUS_SYNCED)
-        ).filter(
-            (Photo.location_name.isnot(None)) | (Photo.faces.any())
-        ).all()
-
-        photos_to_sync = []
-        for photo in photos_with_metadata:
-            photo_path = Path(photo.full_file_path)
-            if not photo_path.exists() or photo.status == PHOTO_STATUS_SYNCED:
-                continue
-
-            people_names = set()
-            for face in photo.faces:
-                for person in face.people:
-                    if person.name:
-                        people_names.add(person.name)
+        page = request.args.get("page", default=1, type=int)
+        page_size = request.args.get("page_size", default=SYNC_METADATA_PAGE_SIZES[0], type=int)
 
-            if photo.location_name or people_names:
-                photos_to_sync.append({
-                    'photo_id': photo.id,
-                    'filename': photo_path.name,
-                    'full_path': str(photo_path),
-                    'location_name': photo.location_name,
-                    'people_names': sorted(list(people_names))
-                })
+        dirty_count = count_dirty_photos(db.session)
+        photos_to_sync = load_dirty_photos_page(db.session, page, page_size)
 
         total_photos = db.session.query(Photo).count()
         synced_photos = db.session.query(Photo).filter(Photo.status == PHOTO_STATUS_SYNCED).count()
@@ -49,15 +32,26 @@ def init_sync_metadata_routes(app: Flask):
         return render_template(
             "utilities/sync_metadata.html",
             total_photos=total_photos,
-            photos_with_metadata=len(photos_with_metadata),
+            synced_photos=synced_photos,
+            dirty_count=dirty_count,
             photos_to_sync=photos_to_sync,
+            pagination={
+                "current_page": page,
+                "total_items": dirty_count,
+                "page_size": page_size,
+                "page_sizes": SYNC_METADATA_PAGE_SIZES,
+            },
             active_jobs=[job.to_dict_with_view_props() for job in active_jobs]
         )
 
     @app.route("/utilities/sync-metadata/start", methods=["POST"])
     def utilities_sync_metadata_start():
         data = request.get_json()
-        photo_ids = data.get('photo_ids', [])
+        sync_all_dirty = bool(data.get('sync_all_dirty'))
+        if sync_all_dirty:
+            photo_ids = get_dirty_photo_ids(db.session)
+        else:
+            photo_ids = data.get('photo_ids', [])
 
         if not photo_ids:
             return jsonify({'error': 'No photos specified'}), 400
@@ -72,14 +66,11 @@ def init_sync_metadata_routes(app: Flask):
             completed_count=0,
             error_count=0,
             cancelled_count=0,
-            job_data=json.dumps({
-                'photo_ids': photo_ids
-            })
+            job_data=json.dumps({'sync_all_dirty': sync_all_dirty})
         )
         db.session.add(job)
+        add_job_items(db.session, job_id, photo_ids)
         db.session.commit()
 
-        for batch in batched(photo_ids, 50):
-            sync_metadata_task(job_id=job_id, photo_id_batch=list(batch))
-        schedule_job_completion(job_id)
+        fan_out_job_task(job_id)
         return jsonify({'job_id': job_id}), 202
\ No newline at end of file
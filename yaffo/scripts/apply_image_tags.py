@@ -2,15 +2,14 @@ import platform
 import subprocess
 from pathlib import Path
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from yaffo.common import DB_PATH
+from yaffo.db.engine import create_db_engine
 from yaffo.db.models import Photo, Face, Person
 from PIL import Image, PngImagePlugin
 import piexif
 import shutil
 
-engine = create_engine(f"sqlite:///{DB_PATH}")
+engine = create_db_engine()
 session = sessionmaker(bind=engine)()
 
 def is_exiftool_available():
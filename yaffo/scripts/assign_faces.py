@@ -1,10 +1,10 @@
 from pathlib import Path
 
 import face_recognition
-from sqlalchemy import create_engine, insert
+from sqlalchemy import insert
 from sqlalchemy.orm import sessionmaker, joinedload
 from tqdm import tqdm
-from yaffo.common import DB_PATH
+from yaffo.db.engine import create_db_engine
 from yaffo.db.models import Face, Person, PersonFace, FACE_STATUS_UNASSIGNED, FACE_STATUS_IGNORED, \
     FACE_STATUS_ASSIGNED
 from yaffo.db.repositories.person_repository import update_person_embedding
@@ -13,7 +13,7 @@ from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from yaffo.scripts.index_photos import load_image_file
 
-engine = create_engine(f"sqlite:///{DB_PATH}")
+engine = create_db_engine()
 session = sessionmaker(bind=engine)()
 THRESHOLD = 0.96  # configurable similarity threshold
 IGNORE_THRESHOLD = 0.92  # configurable similarity threshold
@@ -0,0 +1,70 @@
+import argparse
+import time
+from glob import glob
+from pathlib import Path
+
+import imagehash
+
+from yaffo.utils.image import image_from_path, image_from_path_reduced, PHASH_DECODE_SIZE
+
+TEST_DATA_DIR = Path("./yaffo/scripts/test_data/samples")
+
+
+def collect_photo_paths(source_dir: Path, limit: int) -> list[Path]:
+    paths = []
+    for pattern in ("**/*.jpg", "**/*.jpeg", "**/*.heic", "**/*.JPG", "**/*.HEIC"):
+        paths.extend(Path(p) for p in glob(str(source_dir / pattern), recursive=True))
+    return sorted(set(paths))[:limit]
+
+
+def time_hashes(paths: list[Path], reduced: bool) -> tuple[float, dict[Path, imagehash.ImageHash]]:
+    hashes = {}
+    start_time = time.time()
+    for path in paths:
+        try:
+            if reduced:
+                image = image_from_path_reduced(path, PHASH_DECODE_SIZE)
+            else:
+                image = image_from_path(path)
+            hashes[path] = imagehash.phash(image)
+        except Exception as e:
+            print(f"Failed to hash {path}: {e}")
+    return time.time() - start_time, hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare full and reduced-size decoding for perceptual hashing"
+    )
+    parser.add_argument("--source", type=Path, default=TEST_DATA_DIR, help="Directory of sample photos")
+    parser.add_argument("--photos", type=int, default=100, help="Maximum number of photos to hash")
+    args = parser.parse_args()
+
+    paths = collect_photo_paths(args.source, args.photos)
+    if not paths:
+        print(f"No photos found in {args.source}")
+        return
+
+    print(f"\n{'=' * 80}")
+    print(f"Reduced decode benchmark: {len(paths)} photos from {args.source}")
+    print(f"{'=' * 80}")
+
+    full_time, full_hashes = time_hashes(paths, reduced=False)
+    reduced_time, reduced_hashes = time_hashes(paths, reduced=True)
+
+    compared = [p for p in paths if p in full_hashes and p in reduced_hashes]
+    distances = [full_hashes[p] - reduced_hashes[p] for p in compared]
+    changed = sum(1 for d in distances if d > 0)
+
+    print(f"Full decode:    {full_time:.2f}s ({full_time / len(paths) * 1000:.1f} ms/photo)")
+    print(f"Reduced decode: {reduced_time:.2f}s ({reduced_time / len(paths) * 1000:.1f} ms/photo)")
+    if reduced_time > 0:
+        print(f"Speedup:        {full_time / reduced_time:.2f}x")
+    if compared:
+        print(f"Hashes changed: {changed}/{len(compared)} ({changed / len(compared) * 100:.1f}%)")
+        print(f"Max hamming distance: {max(distances)}")
+        print(f"Mean hamming distance: {sum(distances) / len(distances):.2f}")
+
+
+if __name__ == "__main__":
+    main()
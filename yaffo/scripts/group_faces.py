@@ -1,10 +1,9 @@
 import numpy as np
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sklearn.cluster import DBSCAN
 import pickle
 
-from yaffo.common import DB_PATH
+from yaffo.db.engine import create_db_engine
 from yaffo.db import db
 from yaffo.db.models import Face, Person, PersonFace  # adjust imports to your project
 
@@ -12,7 +11,7 @@ from yaffo.db.models import Face, Person, PersonFace  # adjust imports to your p
 EPS = 0.45  # distance threshold (tune this!)
 MIN_SAMPLES = 1  # how many faces needed to form a cluster
 
-engine = create_engine(f"sqlite:///{DB_PATH}")
+engine = create_db_engine()
 session = sessionmaker(bind=engine)()
 
 def load_embedding(blob: bytes) -> np.ndarray:
@@ -1,15 +1,15 @@
 import sqlite3
 from tqdm import tqdm
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 
-from yaffo.common import DB_PATH, MEDIA_DIRS
+from yaffo.common import MEDIA_DIRS
+from yaffo.db.engine import create_db_engine
 from yaffo.utils.index_photos import get_photo_files, index_photos_batch
 from yaffo.db.models import Photo
 
 
 def index_photos():
-    engine = create_engine(f"sqlite:///{DB_PATH}")
+    engine = create_db_engine()
     Session = sessionmaker(bind=engine)
     session = Session()
 
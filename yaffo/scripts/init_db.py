@@ -1,44 +1,66 @@
 import sqlite3
 from yaffo.common import DB_PATH
+from yaffo.db.models import PHOTO_PEOPLE_TRIGGERS, FACET_TRIGGERS, PHOTO_LOCATIONS_TABLE, \
+    PHOTO_LOCATIONS_TRIGGERS, CLUSTER_ZOOM_LEVELS_SEED, LOCATION_CLUSTERS_TRIGGERS
 
 
 # @formatter:off
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
+def init_db(db_path: str = DB_PATH):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    cursor.execute("""
+            CREATE TABLE IF NOT EXISTS directories (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL
+            )
+        """)
+
     cursor.execute("""
             CREATE TABLE IF NOT EXISTS photos (
                 id INTEGER PRIMARY KEY,
-                full_file_path TEXT UNIQUE,
+                directory_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
                 date_taken TEXT,
                 year INTEGER,
                 month INTEGER,
                 status TEXT DEFAULT 'IMPORTED',
                 latitude REAL,
                 longitude REAL,
-                location_name TEXT
+                location_name TEXT,
+                metadata_digest TEXT,
+                file_fingerprint TEXT,
+                CONSTRAINT uq_photos_directory_filename UNIQUE (directory_id, filename),
+                FOREIGN KEY(directory_id) REFERENCES directories(id)
             )
         """)
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_full_file_path ON photos(full_file_path)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_photos_directory_id ON photos(directory_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_date_taken ON photos(date_taken)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_location_name ON photos(location_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_photos_year_month_date_taken ON photos(year, month, date_taken)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_photos_latitude_longitude ON photos(latitude, longitude) WHERE latitude IS NOT NULL"
+    )
 
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS faces (
             id INTEGER PRIMARY KEY,
             embedding BLOB,
-            full_file_path TEXT UNIQUE,
+            directory_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
             photo_id INTEGER,
             status TEXT,
             location_top INTEGER,
             location_bottom INTEGER,
             location_left INTEGER,
             location_right INTEGER,
-            FOREIGN KEY(photo_id) REFERENCES photos(id) ON DELETE CASCADE
+            CONSTRAINT uq_faces_directory_filename UNIQUE (directory_id, filename),
+            FOREIGN KEY(photo_id) REFERENCES photos(id) ON DELETE CASCADE,
+            FOREIGN KEY(directory_id) REFERENCES directories(id)
         )
     """)
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_face_photo_id ON faces(photo_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_face_status ON faces(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_faces_directory_id ON faces(directory_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_faces_status_photo_id ON faces(status, photo_id)")
 
     cursor.execute("""
            CREATE TABLE IF NOT EXISTS people (
@@ -60,7 +82,26 @@ def init_db():
                )
            """)
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_people_face_face_id ON people_face(face_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_people_face_person_id ON people_face(person_id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_people_face_person_id_similarity_face_id "
+        "ON people_face(person_id, similarity, face_id)"
+    )
+
+    cursor.execute("""
+               CREATE TABLE IF NOT EXISTS photo_people (
+                   person_id INTEGER NOT NULL,
+                   photo_id INTEGER NOT NULL,
+                   face_count INTEGER NOT NULL DEFAULT 1,
+                   PRIMARY KEY (person_id, photo_id),
+                   FOREIGN KEY(person_id) REFERENCES people(id) ON DELETE CASCADE,
+                   FOREIGN KEY(photo_id) REFERENCES photos(id) ON DELETE CASCADE
+               ) WITHOUT ROWID
+           """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_photo_people_photo_id_person_id ON photo_people(photo_id, person_id)"
+    )
+    for trigger in PHOTO_PEOPLE_TRIGGERS:
+        cursor.execute(trigger)
 
     cursor.execute("""
                 CREATE TABLE IF NOT EXISTS people_embeddings (
@@ -100,10 +141,48 @@ def init_db():
                        huey_task_id TEXT NOT NULL,
                        result_data TEXT,                       
                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                       FOREIGN KEY (job_id) REFERENCES job(id) ON DELETE CASCADE
+                       FOREIGN KEY (job_id) REFERENCES jobs(id) ON DELETE CASCADE
                    )
                    """)
 
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS task_stats (
+            task_name TEXT PRIMARY KEY,
+            seconds_per_item REAL NOT NULL,
+            sample_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS file_operations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            operation_type TEXT NOT NULL,
+            source_path TEXT NOT NULL,
+            destination_path TEXT,
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_file_operations_job_id ON file_operations(job_id)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS job_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            item_key TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_job_items_job_id_status ON job_items(job_id, status)")
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS tags (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -114,7 +193,18 @@ def init_db():
         )
     """)
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_photo_id ON tags(photo_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_tag_name ON tags(tag_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_tags_tag_name_tag_value ON tags(tag_name, tag_value, photo_id)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS photo_metadata_changes (
+            photo_id INTEGER PRIMARY KEY,
+            changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(photo_id) REFERENCES photos(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_photo_metadata_changes_changed_at ON photo_metadata_changes(changed_at)"
+    )
 
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS application_settings (
@@ -126,6 +216,47 @@ def init_db():
     """)
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_application_settings_name ON application_settings(name)")
 
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS facet_counts (
+            facet TEXT NOT NULL,
+            name TEXT NOT NULL DEFAULT '',
+            value TEXT NOT NULL,
+            photo_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (facet, name, value)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # The facet triggers watch tags, photos, photo_people and people, so they come after every table
+    for trigger in FACET_TRIGGERS:
+        cursor.execute(trigger)
+
+    cursor.execute(PHOTO_LOCATIONS_TABLE)
+    for trigger in PHOTO_LOCATIONS_TRIGGERS:
+        cursor.execute(trigger)
+
+    cursor.execute("CREATE TABLE IF NOT EXISTS cluster_zoom_levels (zoom INTEGER PRIMARY KEY)")
+    cursor.execute(CLUSTER_ZOOM_LEVELS_SEED)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS location_clusters (
+            zoom INTEGER NOT NULL,
+            cell_x INTEGER NOT NULL,
+            cell_y INTEGER NOT NULL,
+            photo_count INTEGER NOT NULL DEFAULT 0,
+            unnamed_count INTEGER NOT NULL DEFAULT 0,
+            lat_sum REAL NOT NULL DEFAULT 0,
+            lon_sum REAL NOT NULL DEFAULT 0,
+            photo_id INTEGER,
+            PRIMARY KEY (zoom, cell_x, cell_y)
+        ) WITHOUT ROWID
+    """)
+    for trigger in LOCATION_CLUSTERS_TRIGGERS:
+        cursor.execute(trigger)
+
     conn.commit()
 
 
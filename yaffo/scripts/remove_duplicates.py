@@ -7,7 +7,7 @@ from tqdm import tqdm
 import shutil
 
 from yaffo.common import PHOTO_EXTENSIONS, TRASH_DIR
-from yaffo.utils.image import convert_heif, image_from_path
+from yaffo.utils.image import convert_heif, image_from_path_reduced, PHASH_DECODE_SIZE
 
 
 def collect_photo_files(src_dir: Path) -> List[Path]:
@@ -23,7 +23,7 @@ def collect_photo_files(src_dir: Path) -> List[Path]:
 def hash_image(path: Path):
     """Return perceptual hash of an image, supports HEIC."""
     try:
-        image = image_from_path(path)
+        image = image_from_path_reduced(path, PHASH_DECODE_SIZE)
         return imagehash.phash(image)
     except Exception as e:
         print(f"Failed to hash {path}: {e}")
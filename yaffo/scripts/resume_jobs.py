@@ -0,0 +1,24 @@
+import argparse
+
+from yaffo.background_tasks.config import huey, cpu_huey
+from yaffo.background_tasks.tasks.job_recovery import resume_orphaned_jobs
+
+QUEUES = {"io": huey, "cpu": cpu_huey}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resume batched jobs the previous huey consumers stopped in the middle of"
+    )
+    parser.add_argument("--queue", choices=[*QUEUES, "all"], default="all",
+                        help="Queue whose consumer is about to start")
+    args = parser.parse_args()
+
+    queues = QUEUES if args.queue == "all" else [args.queue]
+    for name in queues:
+        resumed_job_ids = resume_orphaned_jobs(QUEUES[name])
+        print(f"Resumed {len(resumed_job_ids)} job(s) on the {name} queue")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+window.PHOTO_ORGANIZER = window.PHOTO_ORGANIZER || {};
+
+// Live job progress over Server-Sent Events. Job cards keep their htmx polling trigger,
+// guarded by `connected`, so they fall back to polling whenever the stream is down.
+window.PHOTO_ORGANIZER.jobStream = (() => {
+    const FINISHED_STATUSES = ['COMPLETED', 'FAILED', 'CANCELLED'];
+    const state = {
+        connected: false,
+        declined: false,
+        source: null,
+    };
+
+    const applyJob = (job) => {
+        const card = document.getElementById(`job-${job.id}`);
+        if (!card) {
+            return;
+        }
+
+        const statusElement = card.querySelector('.job-status');
+        if (FINISHED_STATUSES.includes(job.status) || (statusElement && statusElement.textContent !== job.status)) {
+            // Status changes swap the action buttons, let the server render the whole card once
+            htmx.trigger(card, 'jobChanged');
+            return;
+        }
+
+        const totalCount = job.completed_count + job.error_count + job.cancelled_count;
+        const progress = job.task_count > 0 ? (totalCount / job.task_count * 100) : 0;
+
+        const messageElement = card.querySelector('.job-message');
+        if (messageElement && job.message) {
+            messageElement.textContent = job.message
+                .replace('{totalCount}', totalCount)
+                .replace('{taskCount}', job.task_count);
+        }
+        const progressBar = card.querySelector('.progress-bar');
+        if (progressBar) {
+            progressBar.style.width = `${progress}%`;
+        }
+        const progressText = card.querySelector('.progress-text');
+        if (progressText) {
+            progressText.textContent = `${progress.toFixed(2)}%`;
+        }
+    };
+
+    const connect = () => {
+        if (state.source || state.declined || !window.EventSource || !document.querySelector('.job-card')) {
+            return;
+        }
+
+        const source = new EventSource(window.APP_CONFIG.urls.jobs_stream);
+        state.source = source;
+        source.onopen = () => {
+            state.connected = true;
+        };
+        source.onerror = () => {
+            state.connected = false;
+            if (source.readyState === EventSource.CLOSED) {
+                // The server declined (204) or went away for good, stay on polling
+                state.source = null;
+                state.declined = true;
+            }
+        };
+        source.addEventListener('job', (event) => applyJob(JSON.parse(event.data)));
+    };
+
+    document.addEventListener('DOMContentLoaded', connect);
+    document.addEventListener('htmx:afterSettle', connect);
+
+    return {
+        get connected() {
+            return state.connected;
+        },
+        connect,
+    };
+})();
@@ -45,11 +45,9 @@ async function submitFaces(personId, faceStatus) {
             // Update face count after removal
             setTimeout(() => {
                 const remainingFaces = document.querySelectorAll('.face').length;
-                const subtitle = document.querySelector('.subtitle');
-                const mainContent = document.querySelector('.main-content');
-                const totalUnassigned = mainContent ? mainContent.dataset.unassignedCount : 0;
-                if (subtitle) {
-                    subtitle.textContent = `Showing ${remainingFaces} of ${totalUnassigned} unassigned face${remainingFaces !== 1 ? 's' : ''}`;
+                const shownCount = document.querySelector('.subtitle .shown-count');
+                if (shownCount) {
+                    shownCount.textContent = remainingFaces;
                 }
 
                 // Remove empty suggestion groups
@@ -39,7 +39,7 @@ async function loadTagValues(tagName, selectedValue = null) {
         data.values.forEach(value => {
             const option = document.createElement('option');
             option.value = value;
-            option.textContent = value;
+            option.textContent = `${value} (${data.counts[value]})`;
             tagValueSelect.appendChild(option);
         });
 
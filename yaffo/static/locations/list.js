@@ -1,6 +1,6 @@
 window.PHOTO_ORGANIZER = window.PHOTO_ORGANIZER || {};
 
-window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
+window.PHOTO_ORGANIZER.initLocationsMap = ({ extent }) => {
     const map = new ol.Map({
         target: 'map',
         layers: [
@@ -14,34 +14,84 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         })
     });
 
-    const allFeatures = locations.map(location => {
-        return new ol.Feature({
-            geometry: new ol.geom.Point(
-                ol.proj.fromLonLat([location.lon, location.lat])
-            ),
-            name: location.name,
-            id: location.id,
-            photo_path: location.photo_path,
-            filename: location.filename
-        });
-    });
+    // Clusters come from the server, precomputed per zoom level; zoomed in past them each feature is one photo
+    const vectorSource = new ol.source.Vector();
+    const filterCheckbox = document.getElementById('filter-unnamed');
+    const onlyUnnamed = () => Boolean(filterCheckbox && filterCheckbox.checked);
 
-    const vectorSource = new ol.source.Vector({
-        features: allFeatures
-    });
+    const selectedFeatures = new Set();
+
+    // A map extent as the API's bbox: lon/lat, longitudes wrapped into -180..180, min_lon > max_lon across the antimeridian
+    const toBbox = (mapExtent) => {
+        const [minLon, minLat, maxLon, maxLat] = ol.proj.transformExtent(mapExtent, 'EPSG:3857', 'EPSG:4326');
+        const wrap = (lon) => ((lon + 180) % 360 + 360) % 360 - 180;
+        const clampLat = (lat) => Math.max(-90, Math.min(90, lat));
+        if (maxLon - minLon >= 360) {
+            return [-180, clampLat(minLat), 180, clampLat(maxLat)].join(',');
+        }
+        return [wrap(minLon), clampLat(minLat), wrap(maxLon), clampLat(maxLat)].join(',');
+    };
 
-    const clusterSource = new ol.source.Cluster({
-        distance: 40,
-        source: vectorSource
+    const toFeature = (lon, lat, properties) => new ol.Feature({
+        geometry: new ol.geom.Point(ol.proj.fromLonLat([lon, lat])),
+        ...properties
     });
 
-    const selectedFeatures = new Set();
+    let latestLoad = 0;
+    const loadClusters = async () => {
+        const view = map.getView();
+        const load = ++latestLoad;
+        const params = new URLSearchParams({
+            bbox: toBbox(view.calculateExtent(map.getSize())),
+            zoom: Math.floor(view.getZoom()),
+            unnamed: onlyUnnamed()
+        });
+        try {
+            const response = await fetch(`/api/locations/clusters?${params}`);
+            if (!response.ok) {
+                throw new Error('Failed to load locations');
+            }
+            const data = await response.json();
+            // A later pan or zoom already replaced this one
+            if (load !== latestLoad) {
+                return;
+            }
+            const features = data.clusters
+                ? data.clusters.map(cluster => toFeature(cluster.lon, cluster.lat, {
+                    count: cluster.count,
+                    photo_id: cluster.photo_id,
+                    bbox: cluster.bbox
+                }))
+                : data.photos.map(photo => toFeature(photo.lon, photo.lat, {
+                    count: 1,
+                    photo_id: photo.id,
+                    photos: [photo]
+                }));
+            selectedFeatures.clear();
+            vectorSource.clear();
+            vectorSource.addFeatures(features);
+        } catch (error) {
+            console.error('Error loading locations:', error);
+        }
+    };
+
+    const fetchPhotos = async (bbox) => {
+        const params = new URLSearchParams({ bbox, unnamed: onlyUnnamed() });
+        const response = await fetch(`/api/locations/photos?${params}`);
+        if (!response.ok) {
+            throw new Error('Failed to load photos');
+        }
+        return (await response.json()).photos;
+    };
+
+    // The photos of a cluster are only loaded when it is clicked or selected
+    const photosOf = async (feature) => feature.get('photos') || fetchPhotos(feature.get('bbox').join(','));
 
     const styleCache = {};
     const clusterLayer = new ol.layer.Vector({
-        source: clusterSource,
+        source: vectorSource,
         style: function(feature) {
-            const size = feature.get('features').length;
+            const size = feature.get('count');
             const isSelected = selectedFeatures.has(feature);
             const cacheKey = `${size}-${isSelected}`;
 
@@ -90,12 +140,14 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
 
     map.addInteraction(dragBox);
 
-    dragBox.on('boxend', function() {
-        const extent = dragBox.getGeometry().getExtent();
+    let selectedPhotos = [];
+
+    dragBox.on('boxend', async function() {
+        const boxExtent = dragBox.getGeometry().getExtent();
         const boxFeatures = [];
 
-        clusterSource.getFeatures().forEach(function(feature) {
-            if (ol.extent.intersects(extent, feature.getGeometry().getExtent())) {
+        vectorSource.getFeatures().forEach(function(feature) {
+            if (ol.extent.intersects(boxExtent, feature.getGeometry().getExtent())) {
                 boxFeatures.push(feature);
             }
         });
@@ -103,6 +155,12 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         selectedFeatures.clear();
         boxFeatures.forEach(f => selectedFeatures.add(f));
         clusterLayer.changed();
+        try {
+            selectedPhotos = boxFeatures.length > 0 ? await fetchPhotos(toBbox(boxExtent)) : [];
+        } catch (error) {
+            console.error('Error loading selected photos:', error);
+            selectedPhotos = [];
+        }
         updateSelectionPanel();
     });
 
@@ -111,13 +169,18 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         clusterLayer.changed();
     });
 
-    if (locations.length > 0) {
-        const extent = vectorSource.getExtent();
-        map.getView().fit(extent, {
-            padding: [50, 50, 50, 50],
-            maxZoom: 16
-        });
-    }
+    const fitToExtent = (lonLatExtent) => {
+        if (lonLatExtent) {
+            map.getView().fit(ol.proj.transformExtent(lonLatExtent, 'EPSG:4326', 'EPSG:3857'), {
+                padding: [50, 50, 50, 50],
+                maxZoom: 16
+            });
+        }
+    };
+
+    map.on('moveend', loadClusters);
+    fitToExtent(extent);
+    loadClusters();
 
     const popup = document.getElementById('popup');
     const popupContent = document.getElementById('popup-content');
@@ -141,7 +204,6 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
     };
 
     const showPhotoInPopup = (photoData, coordinate) => {
-        debugger
         const photoUrl = window.APP_CONFIG.buildUrl('photo', { photo_id: photoData.id });
         const photoViewUrl = window.APP_CONFIG.buildUrl('photo_view', { photo_id: photoData.id });
 
@@ -157,22 +219,27 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         overlay.setPosition(coordinate);
     };
 
-    map.on('click', function(evt) {
+    map.on('click', async function(evt) {
         const feature = map.forEachFeatureAtPixel(evt.pixel, function(feature) {
             return feature;
         });
 
         if (feature) {
-            const features = feature.get('features');
             const coordinate = feature.getGeometry().getCoordinates();
+            let photos;
+            try {
+                photos = await photosOf(feature);
+            } catch (error) {
+                console.error('Error loading cluster photos:', error);
+                return;
+            }
+            const photosData = photos.map(photo => ({
+                name: photo.filename,
+                location: photo.name,
+                id: photo.id
+            }));
 
-            if (features && features.length > 1) {
-                const photosData = features.map(f => ({
-                    name: f.get('filename'),
-                    location: f.get('name'),
-                    id: f.get('id'),
-                    photo_path: f.get('photo_path')
-                }));
+            if (photosData.length > 1) {
 
                 const selectId = 'photo-select-' + Date.now();
                 const selectOptions = photosData.map((photo, idx) =>
@@ -215,15 +282,8 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
                 });
 
                 overlay.setPosition(coordinate);
-            } else if (features && features.length === 1) {
-                const singleFeature = features[0];
-                const photoData = {
-                    name: singleFeature.get('filename'),
-                    location: singleFeature.get('name'),
-                    id: singleFeature.get('id'),
-                    photo_path: singleFeature.get('photo_path')
-                };
-                showPhotoInPopup(photoData, coordinate);
+            } else if (photosData.length === 1) {
+                showPhotoInPopup(photosData[0], coordinate);
             }
         } else {
             overlay.setPosition(undefined);
@@ -239,19 +299,18 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         }
     });
 
-    const calculateCentroid = (features) => {
+    const calculateCentroid = (photos) => {
         let totalLat = 0;
         let totalLon = 0;
 
-        features.forEach(f => {
-            const coords = ol.proj.toLonLat(f.getGeometry().getCoordinates());
-            totalLon += coords[0];
-            totalLat += coords[1];
+        photos.forEach(photo => {
+            totalLon += photo.lon;
+            totalLat += photo.lat;
         });
 
         return {
-            lat: totalLat / features.length,
-            lon: totalLon / features.length
+            lat: totalLat / photos.length,
+            lon: totalLon / photos.length
         };
     };
 
@@ -279,49 +338,36 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         const panel = document.getElementById('selection-panel');
         const panelContent = document.getElementById('selection-panel-content');
 
-        if (selectedFeatures.size === 0) {
+        if (selectedPhotos.length === 0) {
             panel.classList.remove('active');
             return;
         }
 
-        const selectedClusters = Array.from(selectedFeatures).map((clusterFeature, idx) => {
-            const features = clusterFeature.get('features');
-            const photoIds = features.map(f => f.get('id'));
-
-            const locationCounts = {};
-            features.forEach(f => {
-                const locationName = f.get('name') || 'Unknown Location';
-                locationCounts[locationName] = (locationCounts[locationName] || 0) + 1;
-            });
+        // The photos under the drag box, loaded when it was drawn
+        const locationCounts = {};
+        selectedPhotos.forEach(photo => {
+            const locationName = photo.name || 'Unknown Location';
+            locationCounts[locationName] = (locationCounts[locationName] || 0) + 1;
+        });
 
-            const locationBreakdown = Object.entries(locationCounts)
+        const selectedClusters = [{
+            photoCount: selectedPhotos.length,
+            locationBreakdown: Object.entries(locationCounts)
                 .sort((a, b) => b[1] - a[1])
                 .map(([name, count]) => `${count} ${name}`)
-                .join(', ');
-
-            const centroid = calculateCentroid(features);
-
-            return {
-                index: idx,
-                photoCount: features.length,
-                photoIds: photoIds,
-                locationBreakdown: locationBreakdown,
-                locationCounts: locationCounts,
-                centroid: centroid,
-                recommendedLocation: null
-            };
-        });
+                .join(', '),
+            centroid: calculateCentroid(selectedPhotos)
+        }];
+        const clusterCount = Math.max(selectedFeatures.size, 1);
 
-        const allPhotoIds = selectedClusters.flatMap(c => c.photoIds);
+        const allPhotoIds = selectedPhotos.map(photo => photo.id);
         const totalPhotos = allPhotoIds.length;
 
         const allLocationCounts = {};
-        selectedClusters.forEach(cluster => {
-            Object.entries(cluster.locationCounts).forEach(([name, count]) => {
-                if (name !== 'Unknown Location') {
-                    allLocationCounts[name] = (allLocationCounts[name] || 0) + count;
-                }
-            });
+        Object.entries(locationCounts).forEach(([name, count]) => {
+            if (name !== 'Unknown Location') {
+                allLocationCounts[name] = count;
+            }
         });
 
         const sortedLocations = Object.entries(allLocationCounts)
@@ -331,7 +377,7 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
             <h3>Mass Assignment</h3>
             <div class="mass-assignment-info">
                 <strong>${totalPhotos} photo${totalPhotos > 1 ? 's' : ''}</strong> in
-                <strong>${selectedClusters.length} cluster${selectedClusters.length > 1 ? 's' : ''}</strong>
+                <strong>${clusterCount} cluster${clusterCount > 1 ? 's' : ''}</strong>
             </div>
 
             ${sortedLocations.length > 0 ? `
@@ -392,23 +438,11 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
                 if (response.ok) {
                     window.notification.success(`Updated ${photoIds.length} photo(s) to "${locationName}"`);
 
-                    allFeatures.forEach(feature => {
-                        const featureId = feature.get('id');
-                        if (photoIds.includes(featureId)) {
-                            feature.set('name', locationName);
-                        }
-                    });
-
-                    const filterCheckbox = document.getElementById('filter-unnamed');
-                    if (filterCheckbox && filterCheckbox.checked) {
-                        applyFilter(true);
-                    } else {
-                        clusterLayer.changed();
-                    }
-
+                    // The server's clusters now count the photos under their new name
+                    selectedPhotos = [];
                     selectedFeatures.clear();
-                    clusterLayer.changed();
                     updateSelectionPanel();
+                    loadClusters();
 
                     return true;
                 } else {
@@ -450,6 +484,7 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         }
 
         document.querySelector('.btn-clear-selection').addEventListener('click', () => {
+            selectedPhotos = [];
             selectedFeatures.clear();
             clusterLayer.changed();
             updateSelectionPanel();
@@ -493,30 +528,23 @@ window.PHOTO_ORGANIZER.initLocationsMap = (locations) => {
         })();
     };
 
-    const applyFilter = (showOnlyUnnamed) => {
-        vectorSource.clear();
-
-        if (showOnlyUnnamed) {
-            const unnamedFeatures = allFeatures.filter(feature => !feature.get('name'));
-            vectorSource.addFeatures(unnamedFeatures);
-        } else {
-            vectorSource.addFeatures(allFeatures);
-        }
-
+    // The checkbox is read by every load, this refits the map to the photos it now shows
+    const applyFilter = async (showOnlyUnnamed) => {
+        selectedPhotos = [];
         selectedFeatures.clear();
-        clusterLayer.changed();
         updateSelectionPanel();
 
-        if (vectorSource.getFeatures().length > 0) {
-            const extent = vectorSource.getExtent();
-            map.getView().fit(extent, {
-                padding: [50, 50, 50, 50],
-                maxZoom: 16
-            });
+        try {
+            const response = await fetch(`/api/locations/extent?unnamed=${showOnlyUnnamed}`);
+            if (response.ok) {
+                fitToExtent((await response.json()).extent);
+            }
+        } catch (error) {
+            console.error('Error loading locations extent:', error);
         }
+        loadClusters();
     };
 
-    const filterCheckbox = document.getElementById('filter-unnamed');
     if (filterCheckbox) {
         filterCheckbox.addEventListener('change', (e) => {
             applyFilter(e.target.checked);
@@ -11,6 +11,12 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
     const startButton = document.getElementById('start-button');
     const previewSection = document.getElementById('preview-section');
     const previewContent = document.getElementById('preview-content');
+    const loadMoreButton = document.getElementById('load-more-button');
+
+    const previewPollIntervalMs = 1000;
+    const previewPageSize = 100;
+    let previewJobId = null;
+    let previewPage = 0;
 
     const toggleDestinationDirectory = () => {
         if (changeDirectoryCheckbox.checked) {
@@ -21,6 +27,13 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
         }
     };
 
+    // The organize job runs the stored plan, so any settings change needs a new preview
+    const invalidatePreview = () => {
+        previewJobId = null;
+        previewSection.style.display = 'none';
+        document.getElementById('preview-stats-section').style.display = 'none';
+    };
+
     const generatePreview = async () => {
         const source = sourceDirectory.value.trim();
         const pattern = organizationPattern.value;
@@ -41,6 +54,8 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
         previewButton.disabled = true;
         previewButton.textContent = 'Generating Preview...';
 
+        previewJobId = null;
+
         try {
             const response = await fetch(config.urls.utilities_organize_photos_preview, {
                 method: 'POST',
@@ -56,9 +71,13 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
             });
 
             if (response.ok) {
-                const data = await response.json();
-                displayPreview(data);
-                previewSection.style.display = 'block';
+                const { job_id } = await response.json();
+                const data = await waitForPreview(job_id);
+                if (data) {
+                    previewJobId = job_id;
+                    displayPreview(data);
+                    previewSection.style.display = 'block';
+                }
             } else {
                 const error = await response.json();
                 notification.error(error.error || 'Failed to generate preview');
@@ -71,6 +90,61 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
         }
     };
 
+    const fetchPreviewPage = async (jobId, page) => {
+        const url = config.buildUrl('utilities_organize_photos_preview_results', { job_id: jobId });
+        const response = await fetch(`${url}?page=${page}&page_size=${previewPageSize}`);
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || 'Failed to load preview');
+        }
+        return data;
+    };
+
+    const waitForPreview = async (jobId) => {
+        while (true) {
+            const data = await fetchPreviewPage(jobId, 0);
+            if (data.status === 'COMPLETED') {
+                return data;
+            }
+            if (data.error || data.status === 'FAILED' || data.status === 'CANCELLED') {
+                notification.error(data.error || 'Preview did not finish');
+                return null;
+            }
+            previewButton.textContent = `Generating Preview... ${data.completed_count}/${data.task_count}`;
+            await new Promise(resolve => setTimeout(resolve, previewPollIntervalMs));
+        }
+    };
+
+    const renderFileItems = (fileList) => fileList.map(file => `
+        <div class="file-item">
+            <div class="file-source">${file.source}</div>
+            <span class="arrow">→</span>
+            <div class="file-destination">${file.destination}</div>
+        </div>
+    `).join('');
+
+    const updateLoadMore = (data) => {
+        const shown = (data.page + 1) * data.page_size;
+        loadMoreButton.style.display = shown < data.files_to_move ? 'block' : 'none';
+    };
+
+    const loadMorePreview = async () => {
+        if (!previewJobId) {
+            return;
+        }
+        loadMoreButton.disabled = true;
+        try {
+            const data = await fetchPreviewPage(previewJobId, previewPage + 1);
+            previewPage = data.page;
+            previewContent.insertAdjacentHTML('beforeend', renderFileItems(data.file_list));
+            updateLoadMore(data);
+        } catch (error) {
+            notification.error('Error loading preview: ' + error.message);
+        } finally {
+            loadMoreButton.disabled = false;
+        }
+    };
+
     const displayPreview = (data) => {
         const { total_files, files_to_move, files_staying, file_list } = data;
         const operationType = data.operation === 'copy' ? 'copy' : 'move';
@@ -96,20 +170,14 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
         // Build file list
         let html = '';
         if (file_list && file_list.length > 0) {
-            file_list.forEach(file => {
-                html += `
-                    <div class="file-item">
-                        <div class="file-source">${file.source}</div>
-                        <span class="arrow">→</span>
-                        <div class="file-destination">${file.destination}</div>
-                    </div>
-                `;
-            });
+            html = renderFileItems(file_list);
         } else {
             html = `<div class="file-item all-organized">All files are already organized correctly!</div>`;
         }
 
         previewContent.innerHTML = html;
+        previewPage = data.page;
+        updateLoadMore(data);
     };
 
     const startOrganizing = async () => {
@@ -129,6 +197,11 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
             return;
         }
 
+        if (!previewJobId) {
+            notification.error('Please generate a preview first');
+            return;
+        }
+
         const operationType = keepOriginal ? 'copy' : 'move';
         const targetDir = changeDirectory ? destination : source;
         const message = changeDirectory
@@ -156,10 +229,7 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    source_directory: source,
-                    destination_directory: changeDirectory ? destination : null,
-                    pattern: pattern,
-                    keep_original: keepOriginal
+                    preview_job_id: previewJobId
                 })
             });
 
@@ -184,6 +254,10 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
         changeDirectoryCheckbox.addEventListener('change', toggleDestinationDirectory);
     }
 
+    [sourceDirectory, destinationDirectory, changeDirectoryCheckbox, keepOriginalCheckbox, organizationPattern]
+        .filter(element => element)
+        .forEach(element => element.addEventListener('change', invalidatePreview));
+
     if (previewButton) {
         previewButton.addEventListener('click', generatePreview);
     }
@@ -192,6 +266,10 @@ window.PHOTO_ORGANIZER.initOrganizePhotos = (config) => {
         startButton.addEventListener('click', startOrganizing);
     }
 
+    if (loadMoreButton) {
+        loadMoreButton.addEventListener('click', loadMorePreview);
+    }
+
     return {
         generatePreview,
         startOrganizing,
@@ -1,16 +1,16 @@
 window.PHOTO_ORGANIZER = window.PHOTO_ORGANIZER || {};
-window.PHOTO_ORGANIZER.initSyncMetadata = (photosToSync, config) => {
+window.PHOTO_ORGANIZER.initSyncMetadata = (dirtyCount, config) => {
     const syncButton = document.getElementById('sync-button');
 
     const startSync = async () => {
-        if (!photosToSync || photosToSync.length === 0) {
+        if (!dirtyCount) {
             notification.warning('No photos to sync');
             return;
         }
 
         const confirmed = await window.PHOTO_ORGANIZER.confirmDialog({
             title: 'Sync Metadata to Files',
-            message: `This will write metadata to ${photosToSync.length} file(s).\n\nThis operation will modify the image files on disk.\n\nAre you sure you want to continue?`,
+            message: `This will write metadata to ${dirtyCount} file(s).\n\nThis operation will modify the image files on disk.\n\nAre you sure you want to continue?`,
             confirmText: 'Yes, Sync Metadata',
             cancelText: 'Cancel',
             confirmClass: 'btn-primary'
@@ -30,7 +30,7 @@ window.PHOTO_ORGANIZER.initSyncMetadata = (photosToSync, config) => {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    photo_ids: photosToSync.map(p => p.photo_id)
+                    sync_all_dirty: true
                 })
             });
 
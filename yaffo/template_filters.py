@@ -2,6 +2,8 @@ from datetime import datetime
 from enum import Enum
 from typing import Union, Optional
 
+from yaffo.utils.request_helpers import page_url
+
 
 class DateFormat(Enum):
     DATE = "%b %d, %Y"
@@ -63,4 +65,6 @@ def init_template_filters(app):
         return format_date(value, fmt)
 
     # Also make DateFormat enum available in templates
-    app.jinja_env.globals['DateFormat'] = DateFormat
\ No newline at end of file
+    app.jinja_env.globals['DateFormat'] = DateFormat
+    # Pagination links keep the page's filters
+    app.jinja_env.globals['page_url'] = page_url
@@ -0,0 +1,213 @@
+import json
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from yaffo.logging_config import get_logger
+from yaffo.utils.exiftool_path import get_exiftool_path
+
+logger = get_logger(__name__, 'background_tasks')
+
+EXIFTOOL_BATCH_SIZE = 200
+EXIFTOOL_MAX_WORKERS = 4
+# How long one command in a stay_open session may take before the process is assumed stuck
+EXIFTOOL_COMMAND_TIMEOUT = 60
+
+
+def _chunks(items: List[Path], size: int) -> Iterable[List[Path]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _read_exif_chunk(exiftool_path: Path, paths: List[Path], tags: List[str], timeout: int) -> Dict[str, Dict]:
+    args = [str(exiftool_path), "-json", "-charset", "filename=utf8"]
+    args.extend(f"-{tag}" for tag in tags)
+    args.extend(["-@", "-"])
+    try:
+        result = subprocess.run(
+            args,
+            input="\n".join(str(path) for path in paths),
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            timeout=timeout
+        )
+        # exiftool exits non-zero when any file in the batch fails, the rest are still in stdout
+        data = json.loads(result.stdout) if result.stdout.strip() else []
+    except (subprocess.TimeoutExpired, json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Failed to read EXIF data for {len(paths)} files with exiftool: {e}")
+        return {}
+
+    return {str(Path(entry["SourceFile"])): entry for entry in data if "SourceFile" in entry}
+
+
+def read_exif_batch(
+        paths: List[Path],
+        tags: List[str],
+        batch_size: int = EXIFTOOL_BATCH_SIZE,
+        max_workers: int = EXIFTOOL_MAX_WORKERS,
+        timeout: int = 120
+) -> Optional[Dict[str, Dict]]:
+    """
+    Read the given tags for many files with as few exiftool processes as possible.
+
+    Paths are split into batches of batch_size, each batch is read by one exiftool
+    process and up to max_workers processes run at once. Returns a dict keyed by
+    str(path); files exiftool could not read are missing from the result. Returns
+    None when exiftool is not installed so callers can fall back to other readers.
+    """
+    exiftool_path = get_exiftool_path()
+    if exiftool_path is None:
+        return None
+
+    results: Dict[str, Dict] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_read_exif_chunk, exiftool_path, chunk, tags, timeout)
+            for chunk in _chunks(paths, batch_size)
+        ]
+        for future in futures:
+            results.update(future.result())
+    return results
+
+
+class ExifToolSession:
+    """
+    A long running `exiftool -stay_open True` process.
+
+    Each execute() call is one `-execute` block, so many commands share a single perl
+    start-up. stdout and stderr of each block are delimited with numbered {ready}
+    markers (-echo4 puts the marker on stderr). Both streams are read by background
+    threads so a command that doesn't answer in time can be abandoned.
+    """
+
+    def __init__(self, exiftool_path: Path, timeout: float = EXIFTOOL_COMMAND_TIMEOUT):
+        self.exiftool_path = exiftool_path
+        self.timeout = timeout
+        self.process: Optional[subprocess.Popen] = None
+        self._sequence = 0
+        self._stdout_lines: Optional[queue.Queue] = None
+        self._stderr_lines: Optional[queue.Queue] = None
+
+    def start(self):
+        # -common_args applies to every command, paths are read as UTF-8 like read_exif_batch does
+        self.process = subprocess.Popen(
+            [str(self.exiftool_path), "-stay_open", "True", "-@", "-", "-common_args", "-charset", "filename=utf8"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        self._stdout_lines = self._pump(self.process.stdout)
+        self._stderr_lines = self._pump(self.process.stderr)
+        return self
+
+    @staticmethod
+    def _pump(stream) -> queue.Queue:
+        """Queue the lines of stream from a daemon thread, None marks the end of the stream."""
+        lines = queue.Queue()
+
+        def read():
+            for line in stream:
+                lines.put(line)
+            lines.put(None)
+
+        threading.Thread(target=read, daemon=True).start()
+        return lines
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def close(self):
+        if not self.running:
+            return
+        try:
+            self.process.stdin.write("-stay_open\nFalse\n")
+            self.process.stdin.flush()
+            self.process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        finally:
+            self.process = None
+
+    def restart(self):
+        """Kill the process without waiting for it and start a new one."""
+        if self.running:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+        self.start()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _read_until(self, lines: queue.Queue, marker: str, deadline: float) -> str:
+        collected = []
+        while True:
+            try:
+                line = lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise TimeoutError(f"exiftool did not answer within {self.timeout} seconds")
+            if line is None:
+                raise RuntimeError("exiftool exited unexpectedly")
+            if line.rstrip("\r\n") == marker:
+                return "".join(collected)
+            collected.append(line)
+
+    def execute(self, args: List[str]) -> tuple[str, str]:
+        """
+        Run one exiftool command in the session and return its (stdout, stderr).
+
+        Raises TimeoutError when the command takes longer than the session's timeout. A
+        command that fails leaves the session restarted, whatever it hadn't printed yet
+        would otherwise be read as the next command's output.
+        """
+        if not self.running:
+            raise RuntimeError("exiftool session is not running")
+
+        self._sequence += 1
+        marker = f"{{ready{self._sequence}}}"
+        command = "\n".join(args) + f"\n-echo4\n{marker}\n-execute{self._sequence}\n"
+        deadline = time.monotonic() + self.timeout
+        try:
+            self.process.stdin.write(command)
+            self.process.stdin.flush()
+            stdout = self._read_until(self._stdout_lines, marker, deadline)
+            stderr = self._read_until(self._stderr_lines, marker, deadline)
+        except Exception:
+            self.restart()
+            raise
+        return stdout, stderr
+
+
+_thread_sessions = threading.local()
+
+
+def get_exiftool_session() -> Optional[ExifToolSession]:
+    """
+    Return this thread's persistent exiftool session, starting it on first use.
+
+    Huey workers call this for every batch, so the exiftool start-up cost is paid once
+    per worker rather than once per file. Returns None when exiftool is not installed.
+    """
+    session = getattr(_thread_sessions, "session", None)
+    if session is not None and session.running:
+        return session
+
+    exiftool_path = get_exiftool_path()
+    if exiftool_path is None:
+        return None
+    _thread_sessions.session = ExifToolSession(exiftool_path).start()
+    return _thread_sessions.session
@@ -0,0 +1,370 @@
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import send2trash
+from sqlalchemy.orm import Session
+
+from yaffo.db.models import FileOperation, Photo, Face, FILE_OPERATION_STATUS_PENDING, FILE_OPERATION_STATUS_DONE, \
+    FILE_OPERATION_STATUS_FAILED, FILE_OPERATION_STATUS_ROLLED_BACK
+from yaffo.logging_config import get_logger
+
+logger = get_logger(__name__, 'background_tasks')
+
+FILE_OPERATION_MOVE = "move"
+FILE_OPERATION_COPY = "copy"
+FILE_OPERATION_TRASH = "trash"
+FILE_OPERATION_DELETE = "delete"
+
+COPY_MAX_WORKERS = 4
+COPY_BUFFER_SIZE = 1024 * 1024
+# Errors that mean copy_file_range can't be used for this pair of files, not that the copy failed
+_COPY_FILE_RANGE_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+# FAT and exFAT volumes only keep modification times to the nearest 2 seconds
+MTIME_TOLERANCE_SECONDS = 2
+
+
+def _unique_name(name: str, taken: set[str]) -> str:
+    stem, suffix = os.path.splitext(name)
+    candidate = name
+    counter = 1
+    while candidate.lower() in taken:
+        candidate = f"{stem}_{counter}{suffix}"
+        counter += 1
+    return candidate
+
+
+def resolve_destinations(operations: List[dict]) -> List[dict]:
+    """
+    Give every planned move/copy a destination that is free, for the whole plan at once.
+
+    Each destination directory is listed once and names claimed by earlier operations
+    in the plan are remembered, so two files with the same name going to the same
+    folder get name, name_1, ... without checking the disk per file. Names compare
+    case-insensitively to stay safe on macOS and Windows volumes. Operations whose
+    destination is the source itself are dropped.
+    """
+    taken_by_dir: Dict[str, set[str]] = {}
+    resolved = []
+    for operation in operations:
+        destination = operation.get('destination')
+        if destination is None:
+            resolved.append(operation)
+            continue
+
+        source_path = Path(operation['source'])
+        dest_path = Path(destination)
+        if source_path.resolve() == dest_path.resolve():
+            continue
+
+        dest_dir = str(dest_path.parent)
+        if dest_dir not in taken_by_dir:
+            try:
+                taken_by_dir[dest_dir] = {name.lower() for name in os.listdir(dest_dir)}
+            except FileNotFoundError:
+                taken_by_dir[dest_dir] = set()
+
+        name = _unique_name(dest_path.name, taken_by_dir[dest_dir])
+        taken_by_dir[dest_dir].add(name.lower())
+        resolved.append({**operation, 'destination': str(dest_path.parent / name)})
+    return resolved
+
+
+def journal_file_operations(session: Session, job_id: str, operations: List[dict]) -> List[int]:
+    """
+    Resolve collisions for operations and record them as PENDING in the journal.
+
+    Operations are dicts with 'source', 'type' and, for moves and copies, 'destination'.
+    Returns the journal ids in plan order; the caller commits.
+    """
+    entries = [
+        FileOperation(
+            job_id=job_id,
+            operation_type=operation['type'],
+            source_path=operation['source'],
+            destination_path=operation.get('destination'),
+            status=FILE_OPERATION_STATUS_PENDING
+        )
+        for operation in resolve_destinations(operations)
+    ]
+    session.add_all(entries)
+    session.flush()
+    return [entry.id for entry in entries]
+
+
+def _copy_file_range(source_file, dest_file) -> bool:
+    """Copy with copy_file_range so the kernel can reflink or copy server side. False if unsupported."""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    try:
+        while os.copy_file_range(source_file.fileno(), dest_file.fileno(), COPY_BUFFER_SIZE * 64):
+            pass
+        return True
+    except OSError as e:
+        if e.errno not in _COPY_FILE_RANGE_UNSUPPORTED:
+            raise
+        source_file.seek(0)
+        dest_file.seek(0)
+        dest_file.truncate()
+        return False
+
+
+def _ensure_free(destination: Path):
+    """Plans can be old, refuse to replace a file that appeared at the destination since."""
+    if destination.exists():
+        raise FileExistsError(f"Destination already exists: {destination}")
+
+
+def copy_file(source: Path, destination: Path):
+    """
+    Copy source to destination via a partial file, so destination only ever exists complete.
+
+    Raises FileExistsError rather than replacing a file already at destination.
+    """
+    _ensure_free(destination)
+    partial = destination.with_name(f".{destination.name}.partial")
+    with open(source, "rb") as source_file, open(partial, "wb") as dest_file:
+        if not _copy_file_range(source_file, dest_file):
+            shutil.copyfileobj(source_file, dest_file, COPY_BUFFER_SIZE)
+    shutil.copystat(source, partial)
+    try:
+        _ensure_free(destination)
+    except FileExistsError:
+        partial.unlink()
+        raise
+    os.replace(partial, destination)
+
+
+def _rename(source: Path, destination: Path) -> bool:
+    """Rename within a filesystem. False when source and destination are on different devices."""
+    try:
+        os.rename(source, destination)
+        return True
+    except OSError as e:
+        if e.errno == errno.EXDEV:
+            return False
+        raise
+
+
+def _is_copy_of(source: Path, destination: Path) -> bool:
+    """True when destination has source's size and modification time, which copy_file carries over."""
+    source_stat, destination_stat = source.stat(), destination.stat()
+    return (
+        source_stat.st_size == destination_stat.st_size
+        and abs(source_stat.st_mtime - destination_stat.st_mtime) < MTIME_TOLERANCE_SECONDS
+    )
+
+
+def _already_applied(operation: FileOperation) -> bool:
+    """
+    True when a resumed operation finished before the job was interrupted.
+
+    A copy only counts as done when the file at its destination matches the source, an
+    unrelated file that appeared there is left alone and the copy fails instead.
+    """
+    source = Path(operation.source_path)
+    destination = Path(operation.destination_path) if operation.destination_path else None
+    if operation.operation_type == FILE_OPERATION_MOVE:
+        return not source.exists() and destination.exists()
+    if operation.operation_type == FILE_OPERATION_COPY:
+        return source.exists() and destination.exists() and _is_copy_of(source, destination)
+    return False
+
+
+def _copy_across_devices(operation: FileOperation):
+    source = Path(operation.source_path)
+    copy_file(source, Path(operation.destination_path))
+    if operation.operation_type == FILE_OPERATION_MOVE:
+        source.unlink()
+
+
+def execute_file_operations(
+        session: Session,
+        operations: List[FileOperation],
+        max_workers: int = COPY_MAX_WORKERS
+) -> Tuple[int, int]:
+    """
+    Apply PENDING journal entries and record the outcome of each one.
+
+    Moves within a filesystem are a single rename. Copies, and moves that cross
+    filesystems, run concurrently on a thread pool. Moved photos have their database
+    paths rewritten in the same transaction that marks the journal entries DONE, and
+    source folders left empty by moves are removed. An operation whose destination was taken
+    after planning fails instead of replacing that file. Returns (done, failed); the caller commits.
+    """
+    pending = [op for op in operations if op.status == FILE_OPERATION_STATUS_PENDING]
+    for directory in {Path(op.destination_path).parent for op in pending if op.destination_path}:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    done: List[FileOperation] = []
+    failed = 0
+    cross_device: List[FileOperation] = []
+
+    for operation in pending:
+        source = Path(operation.source_path)
+        try:
+            if _already_applied(operation):
+                done.append(operation)
+            elif not source.exists():
+                raise FileNotFoundError(f"Source file not found: {source}")
+            elif operation.operation_type == FILE_OPERATION_MOVE:
+                # os.rename replaces an existing file on POSIX
+                destination = Path(operation.destination_path)
+                _ensure_free(destination)
+                if _rename(source, destination):
+                    done.append(operation)
+                else:
+                    cross_device.append(operation)
+            elif operation.operation_type == FILE_OPERATION_COPY:
+                _ensure_free(Path(operation.destination_path))
+                cross_device.append(operation)
+            elif operation.operation_type == FILE_OPERATION_TRASH:
+                send2trash.send2trash(str(source))
+                done.append(operation)
+            elif operation.operation_type == FILE_OPERATION_DELETE:
+                os.remove(source)
+                done.append(operation)
+            else:
+                raise ValueError(f"Unknown file operation type: {operation.operation_type}")
+        except Exception as e:
+            logger.error(f"Error processing {source}: {e}")
+            operation.status = FILE_OPERATION_STATUS_FAILED
+            operation.error = str(e)
+            failed += 1
+
+    if cross_device:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_copy_across_devices, op): op for op in cross_device}
+            for future in as_completed(futures):
+                operation = futures[future]
+                try:
+                    future.result()
+                    done.append(operation)
+                except Exception as e:
+                    logger.error(f"Error copying {operation.source_path}: {e}")
+                    operation.status = FILE_OPERATION_STATUS_FAILED
+                    operation.error = str(e)
+                    failed += 1
+
+    for operation in done:
+        operation.status = FILE_OPERATION_STATUS_DONE
+        logger.debug(f"{operation.operation_type}: {operation.source_path} -> {operation.destination_path}")
+
+    moves = [
+        (op.source_path, op.destination_path)
+        for op in done if op.operation_type == FILE_OPERATION_MOVE
+    ]
+    rewrite_photo_paths(session, moves)
+    remove_empty_directories(
+        Path(op.source_path).parent
+        for op in done if op.operation_type == FILE_OPERATION_MOVE
+    )
+    return len(done), failed
+
+
+def rewrite_photo_paths(session: Session, moves: List[Tuple[str, str]]):
+    """Point photos (and face thumbnails stored next to them) at their new location."""
+    if not moves:
+        return
+
+    new_path_by_old = dict(moves)
+    photos = session.query(Photo).filter(Photo.full_file_path.in_(list(new_path_by_old))).all()
+    photo_ids = [photo.id for photo in photos]
+    faces = session.query(Face).filter(Face.photo_id.in_(photo_ids)).all() if photo_ids else []
+    faces_by_photo_id: Dict[int, List[Face]] = {}
+    for face in faces:
+        faces_by_photo_id.setdefault(face.photo_id, []).append(face)
+
+    for photo in photos:
+        old_photo_path = Path(photo.full_file_path)
+        new_path = new_path_by_old[photo.full_file_path]
+        photo.full_file_path = new_path
+        logger.debug(f"Updated photo path in database: {old_photo_path} -> {new_path}")
+
+        for face in faces_by_photo_id.get(photo.id, []):
+            old_face_path = Path(face.full_file_path)
+            if old_face_path.parent == old_photo_path.parent:
+                face.full_file_path = str(Path(new_path).parent / old_face_path.name)
+
+
+def remove_empty_directories(directories: Iterable[Path]):
+    """Remove each directory and its parents while they are empty, deepest first."""
+    visited = set()
+    for directory in sorted(set(directories), key=lambda d: len(d.parts), reverse=True):
+        current = directory
+        while current != current.parent and current not in visited:
+            visited.add(current)
+            try:
+                # rmdir only succeeds on an empty directory, no need to list it first
+                os.rmdir(current)
+                logger.debug(f"Removed empty directory: {current}")
+            except OSError:
+                break
+            current = current.parent
+
+
+def _undo(operation: FileOperation) -> bool:
+    source = Path(operation.source_path)
+    destination = Path(operation.destination_path) if operation.destination_path else None
+    if operation.operation_type == FILE_OPERATION_COPY:
+        destination.unlink(missing_ok=True)
+        return True
+    if operation.operation_type == FILE_OPERATION_MOVE:
+        if source.exists() or not destination.exists():
+            raise FileExistsError(f"Cannot move {destination} back to {source}")
+        source.parent.mkdir(parents=True, exist_ok=True)
+        if not _rename(destination, source):
+            copy_file(destination, source)
+            destination.unlink()
+        return True
+    # Deleted files are gone and trashed files have to be restored from the system trash
+    return False
+
+
+def rollback_file_operations(session: Session, job_id: str) -> Tuple[int, int]:
+    """
+    Undo the completed moves and copies of a job, newest first.
+
+    Trash and delete operations can't be undone and are left as DONE. Returns
+    (rolled_back, failed); the caller commits.
+    """
+    operations = session.query(FileOperation).filter_by(
+        job_id=job_id, status=FILE_OPERATION_STATUS_DONE
+    ).order_by(FileOperation.id.desc()).all()
+
+    rolled_back = []
+    failed = 0
+    for operation in operations:
+        try:
+            if _undo(operation):
+                operation.status = FILE_OPERATION_STATUS_ROLLED_BACK
+                rolled_back.append(operation)
+        except Exception as e:
+            logger.error(f"Error rolling back {operation.destination_path}: {e}")
+            operation.error = str(e)
+            failed += 1
+
+    rewrite_photo_paths(session, [
+        (op.destination_path, op.source_path)
+        for op in rolled_back if op.operation_type == FILE_OPERATION_MOVE
+    ])
+    remove_empty_directories(
+        Path(op.destination_path).parent
+        for op in rolled_back if op.destination_path
+    )
+    return len(rolled_back), failed
+
+
+def load_file_operations(session: Session, operation_ids: List[int]) -> List[FileOperation]:
+    operations = session.query(FileOperation).filter(FileOperation.id.in_(operation_ids)).all()
+    return sorted(operations, key=lambda op: op.id)
+
+
+def pending_file_operation_ids(session: Session, job_id: str) -> List[int]:
+    rows = session.query(FileOperation.id).filter_by(
+        job_id=job_id, status=FILE_OPERATION_STATUS_PENDING
+    ).order_by(FileOperation.id).all()
+    return [row.id for row in rows]
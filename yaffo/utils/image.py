@@ -1,8 +1,22 @@
+import hashlib
+import tempfile
 import numpy as np
-import pillow_heif
 from pathlib import Path
 from PIL.Image import Image as PIL_Image
-from PIL import Image
+from PIL import Image, ImageOps
+
+from yaffo.utils.lazy_import import lazy_import
+
+pillow_heif = lazy_import("pillow_heif")
+
+HEIF_EXTENSIONS = [".heic", ".heif"]
+JPEG_EXTENSIONS = [".jpg", ".jpeg"]
+
+# imagehash.phash resizes to 32x32 before the DCT, anything above this is wasted decode work
+PHASH_DECODE_SIZE = 32
+PREVIEW_SIZES = [256, 512, 1024, 2048]
+# Part of the preview cache key, bump it when the way previews are rendered changes
+PREVIEW_CACHE_VERSION = 2
 
 def convert_heif(file_path: Path):
     heif_file = pillow_heif.read_heif(str(file_path))
@@ -15,17 +29,92 @@ def convert_heif(file_path: Path):
         heif_file.stride,
     )
 
+def _normalize_mode(image: PIL_Image) -> PIL_Image:
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGB")
+    return image
+
 def image_from_path(path: Path) -> PIL_Image:
-    if path.suffix.lower() in [".heic", ".heif"]:
+    if path.suffix.lower() in HEIF_EXTENSIONS:
         try:
             image = convert_heif(path)
         except Exception:
             image = Image.open(path)
     else:
         image = Image.open(path)
-    if image.mode in ("RGBA", "LA", "P"):
-        image = image.convert("RGB")
+    return _normalize_mode(image)
+
+def _heif_thumbnail(path: Path, size: int) -> PIL_Image | None:
+    """Return the smallest embedded HEIF thumbnail that still covers size, if the file has one."""
+    heif_file = pillow_heif.open_heif(str(path))
+    thumbnail_boxes = heif_file.info.get("thumbnails") or []
+    candidates = sorted(
+        (box, index) for index, box in enumerate(thumbnail_boxes) if box >= size
+    )
+    if not candidates:
+        return None
+    _, index = candidates[0]
+    thumbnail = heif_file[heif_file.primary_index].get_thumbnail(index)
+    return Image.frombytes(
+        thumbnail.mode,
+        thumbnail.size,
+        thumbnail.data,
+        "raw",
+        thumbnail.mode,
+        thumbnail.stride,
+    )
+
+def image_from_path_reduced(path: Path, size: int) -> PIL_Image:
+    """
+    Decode an image at the smallest resolution that still covers size pixels.
+
+    JPEGs use libjpeg DCT scaling through Image.draft (1/2, 1/4 or 1/8 of the native
+    resolution), HEIF files use an embedded thumbnail when one is large enough.
+    Everything else falls back to a full decode. The result is not resized to size
+    exactly; callers that need a fixed size should still call thumbnail/resize.
+    """
+    suffix = path.suffix.lower()
+    if suffix in HEIF_EXTENSIONS:
+        try:
+            image = _heif_thumbnail(path, size)
+        except Exception:
+            image = None
+        return _normalize_mode(image) if image is not None else image_from_path(path)
+
+    image = Image.open(path)
+    if suffix in JPEG_EXTENSIONS or image.format == "JPEG":
+        image.draft("RGB", (size, size))
+    return _normalize_mode(image)
+
+def preview_from_path(path: Path, size: int) -> PIL_Image:
+    """Decode an image for display, bounded to size x size pixels and turned upright by its EXIF orientation."""
+    image = ImageOps.exif_transpose(image_from_path_reduced(path, size))
+    image.thumbnail((size, size))
     return image
 
+def get_cached_preview(path: Path, size: int, cache_dir: Path) -> Path:
+    """
+    Return a JPEG preview of path no larger than size, rendering it into cache_dir on first use.
+
+    Sizes are snapped up to one of PREVIEW_SIZES so the cache holds a bounded number of
+    variants per photo. The cache key includes the source mtime and file size, so edited
+    files get a fresh preview. The orientation is applied to the pixels, previews carry no EXIF.
+    """
+    preview_size = next((s for s in PREVIEW_SIZES if s >= size), PREVIEW_SIZES[-1])
+    stat = path.stat()
+    key = hashlib.sha1(f"{path}|{stat.st_mtime_ns}|{stat.st_size}|{preview_size}|{PREVIEW_CACHE_VERSION}".encode()).hexdigest()
+    cached_path = cache_dir / key[:2] / f"{key}.jpg"
+    if cached_path.exists():
+        return cached_path
+
+    cached_path.parent.mkdir(parents=True, exist_ok=True)
+    image = preview_from_path(path, preview_size)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    with tempfile.NamedTemporaryFile(dir=cached_path.parent, suffix=".tmp", delete=False) as temp_file:
+        image.save(temp_file, format="JPEG", quality=85)
+    Path(temp_file.name).replace(cached_path)
+    return cached_path
+
 def image_to_numpy(image: PIL_Image):
-    return np.array(image)
\ No newline at end of file
+    return np.array(image)
@@ -11,7 +11,6 @@ from concurrent.futures import ProcessPoolExecutor, as_completed
 from PIL.Image import Image as PIL_Image
 from PIL import Image
 
-import face_recognition
 import piexif
 from sqlalchemy.orm import Session
 
@@ -21,6 +20,10 @@ from yaffo.common import PHOTO_EXTENSIONS, TEMP_DIR, THUMBNAIL_DIR, ROOT_DIR
 from yaffo.utils.photo_dates import PhotoDateInfo, get_photo_date_info
 from yaffo.utils.image import image_from_path, image_to_numpy
 from yaffo.utils.exiftool_path import get_exiftool_path, is_exiftool_available
+from yaffo.utils.lazy_import import lazy_import
+
+# Loads dlib and its face models, the web process only uses the file helpers in here
+face_recognition = lazy_import("face_recognition")
 
 logger = get_logger(__name__, 'background_tasks')
 
@@ -0,0 +1,159 @@
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import chain
+from queue import Queue, Full
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from yaffo.common import JOB_EVENTS_PORT
+from yaffo.db.models import Job
+from yaffo.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+JOB_EVENTS_ADDRESS = ("127.0.0.1", JOB_EVENTS_PORT)
+# Wake-ups arriving within this window are answered with a single query
+JOB_EVENTS_COALESCE_SECONDS = 0.2
+# Re-read rows updated slightly before the last query, their transactions may have committed after it
+JOB_EVENTS_OVERLAP = timedelta(seconds=2)
+JOB_EVENTS_QUEUE_SIZE = 1000
+
+_publish_socket: Optional[socket.socket] = None
+
+
+def publish_jobs_changed():
+    """Wake the web process' job event hub. Fire-and-forget: nobody listening is fine."""
+    global _publish_socket
+    try:
+        if _publish_socket is None:
+            _publish_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _publish_socket.sendto(b"jobs", JOB_EVENTS_ADDRESS)
+    except OSError:
+        pass
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_job_statements(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is Job:
+        orm_execute_state.session.info["jobs_changed"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_job_flushes(session, flush_context):
+    if any(isinstance(obj, Job) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["jobs_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_job_commits(session):
+    if session.info.pop("jobs_changed", False):
+        publish_jobs_changed()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_job_changes(session):
+    session.info.pop("jobs_changed", None)
+
+
+class JobEventHub:
+    """
+    Web process side of the job events channel.
+
+    A daemon thread waits for wake-ups published after commits that touched the jobs
+    table, loads the jobs updated since its last look with one query no matter how many
+    browsers are listening, and puts the snapshot of every job that actually changed on
+    each subscriber's queue.
+    """
+
+    def __init__(self, sock: socket.socket, load_changed_jobs: Callable[[datetime], list[dict]]):
+        self._sock = sock
+        self._load_changed_jobs = load_changed_jobs
+        self._subscribers: set[Queue] = set()
+        self._lock = threading.Lock()
+        self._last_sent: dict[str, dict] = {}
+
+    @classmethod
+    def start(cls, load_changed_jobs: Callable[[datetime], list[dict]]) -> Optional["JobEventHub"]:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(JOB_EVENTS_ADDRESS)
+        except OSError as e:
+            logger.warning(f"Job events unavailable, port {JOB_EVENTS_ADDRESS[1]} is in use: {e}")
+            sock.close()
+            return None
+
+        hub = cls(sock, load_changed_jobs)
+        threading.Thread(target=hub._run, name="job-event-hub", daemon=True).start()
+        return hub
+
+    def subscribe(self) -> Queue:
+        queue = Queue(maxsize=JOB_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: Queue):
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    def _drain(self):
+        self._sock.setblocking(False)
+        try:
+            while True:
+                self._sock.recv(64)
+        except (BlockingIOError, OSError):
+            pass
+        finally:
+            self._sock.setblocking(True)
+
+    def _broadcast(self, snapshot: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue in subscribers:
+            try:
+                queue.put_nowait(snapshot)
+            except Full:
+                # A stalled browser tab only loses intermediate progress, its next event is a full snapshot
+                pass
+
+    def _run(self):
+        since = datetime.utcnow()
+        while True:
+            try:
+                self._sock.recv(64)
+                time.sleep(JOB_EVENTS_COALESCE_SECONDS)
+                self._drain()
+
+                loaded_at = datetime.utcnow()
+                jobs = self._load_changed_jobs(since - JOB_EVENTS_OVERLAP)
+                since = loaded_at
+
+                if len(self._last_sent) > JOB_EVENTS_QUEUE_SIZE:
+                    self._last_sent.clear()
+                for snapshot in jobs:
+                    if self._last_sent.get(snapshot['id']) != snapshot:
+                        self._last_sent[snapshot['id']] = snapshot
+                        self._broadcast(snapshot)
+            except Exception as e:
+                logger.error(f"Error publishing job events: {e}", exc_info=True)
+
+
+_hub: Optional[JobEventHub] = None
+_hub_started = False
+_hub_lock = threading.Lock()
+
+
+def get_job_event_hub(load_changed_jobs: Callable[[datetime], list[dict]]) -> Optional[JobEventHub]:
+    """The process-wide hub, started on first use. None when another process already owns the port."""
+    global _hub, _hub_started
+    with _hub_lock:
+        if not _hub_started:
+            _hub = JobEventHub.start(load_changed_jobs)
+            _hub_started = True
+        return _hub
@@ -0,0 +1,27 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a top-level module without running it until one of its attributes is used.
+
+    For heavy ML and imaging libraries (face_recognition loads dlib and its models,
+    imagehash and pillow_heif pull in scipy and libheif) that the web process imports
+    through shared modules but never calls. A missing module still fails at import
+    time. Submodules like sklearn.cluster can't be deferred this way, finding them
+    runs the parent package, so import those inside the function that uses them.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,59 @@
+from calendar import month_name
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from yaffo.utils.exiftool import read_exif_batch
+from yaffo.utils.photo_dates import get_photo_date, get_date_from_filename
+
+ORGANIZE_DATE_TAGS = ["DateTimeOriginal"]
+
+
+def get_destination_folder(target_path: Path, pattern: str, date_taken: Optional[datetime]) -> Path:
+    if not date_taken:
+        return target_path / "unknown"
+
+    if pattern == 'year_month':
+        return target_path / str(date_taken.year) / month_name[date_taken.month]
+    if pattern == 'year_month_day':
+        return target_path / str(date_taken.year) / month_name[date_taken.month] / f"{date_taken.day:02d}"
+    if pattern == 'year':
+        return target_path / str(date_taken.year)
+    return target_path / "unknown"
+
+
+def read_photo_dates(photo_files: List[Path]) -> Dict[str, Optional[datetime]]:
+    """
+    Resolve the date taken for files that are not in the database.
+
+    EXIF dates are read with batched exiftool calls; get_photo_date then falls back to
+    the filename. Without exiftool every file is read individually with Pillow.
+    """
+    exif_data = read_exif_batch(photo_files, ORGANIZE_DATE_TAGS)
+    dates = {}
+    for photo_file in photo_files:
+        metadata = exif_data.get(str(photo_file)) if exif_data is not None else None
+        if metadata is not None and "DateTimeOriginal" not in metadata:
+            # exiftool already found no EXIF date, don't reopen the file with Pillow
+            dates[str(photo_file)] = get_date_from_filename(str(photo_file)).date
+        else:
+            dates[str(photo_file)] = get_photo_date(str(photo_file), metadata)
+    return dates
+
+
+def plan_file_operation(
+        photo_file: Path,
+        date_taken: Optional[datetime],
+        target_path: Path,
+        pattern: str,
+        operation_type: str
+) -> Optional[dict[str, str]]:
+    """Return the move/copy for photo_file, or None when it is already where the pattern puts it."""
+    dest_file = get_destination_folder(target_path, pattern, date_taken) / photo_file.name
+    if photo_file.resolve() == dest_file.resolve():
+        return None
+    return {
+        'source': str(photo_file),
+        'destination': str(dest_file),
+        'type': operation_type
+    }
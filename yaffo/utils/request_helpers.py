@@ -1,4 +1,4 @@
-from flask import Request
+from flask import Request, request, url_for
 boolean_map = {'true': True, 'false': False}
 
 def parse_boolean_from_form(request: Request, name: str, default: bool) -> bool:
@@ -6,3 +6,28 @@ def parse_boolean_from_form(request: Request, name: str, default: bool) -> bool:
     if isinstance(value, str) and value in boolean_map.keys():
         return boolean_map.get(value.lower())
     return default
+
+
+def parse_bbox(value: str | None) -> tuple[float, float, float, float] | None:
+    """A map extent sent as "min_lon,min_lat,max_lon,max_lat", or None if value isn't one."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in (value or "").split(","))
+    except ValueError:
+        return None
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        return None
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def page_url(endpoint: str | None = None, **changes) -> str:
+    """
+    URL of endpoint (default: the current one) with the current request's query string,
+    each of changes replacing an arg and None removing it. Keeps filters on pagination links.
+    """
+    args = request.args.to_dict(flat=False)
+    for name, value in changes.items():
+        if value is None:
+            args.pop(name, None)
+        else:
+            args[name] = value
+    return url_for(endpoint or request.endpoint, **(request.view_args or {}), **args)
@@ -1,16 +1,31 @@
+import hashlib
 import json
 import platform
 import subprocess
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 from PIL import Image, PngImagePlugin
 import piexif
+from yaffo.logging_config import get_logger
+from yaffo.utils.exiftool import read_exif_batch, get_exiftool_session
 from yaffo.utils.exiftool_path import get_exiftool_path, is_exiftool_available
 
+logger = get_logger(__name__, 'background_tasks')
+
 
 _IS_MAC = platform.system().lower() == "darwin"
 _EXIFTOOL_PATH = get_exiftool_path()
 _HAS_EXIFTOOL = is_exiftool_available()
+_EXIFTOOL_EXTENSIONS = (".heic", ".heif", ".jpg", ".jpeg")
+
+
+@dataclass
+class PhotoMetadata:
+    photo_path: Path
+    date_taken: Optional[str] = None
+    location_name: Optional[str] = None
+    people_names: Optional[list[str]] = None
 
 
 def _get_existing_person_in_image(photo_path: Path) -> list[str]:
@@ -28,12 +43,7 @@ def _get_existing_person_in_image(photo_path: Path) -> list[str]:
         if not data:
             return []
 
-        person_in_image = data[0].get("PersonInImage", [])
-        if isinstance(person_in_image, str):
-            return [person_in_image]
-        elif isinstance(person_in_image, list):
-            return person_in_image
-        return []
+        return _person_in_image_values(data[0].get("PersonInImage", []))
     except (json.JSONDecodeError, subprocess.SubprocessError, Exception):
         return []
 
@@ -59,6 +69,64 @@ def _run_exiftool(args: list[str]) -> subprocess.CompletedProcess:
     return subprocess.run(cmd, check=True, capture_output=True, text=True)
 
 
+def metadata_digest(item: PhotoMetadata) -> str:
+    """
+    Digest of the metadata a sync would write for this photo.
+
+    People are compared case-insensitively and order-free, the same way they are merged
+    into PersonInImage, so a digest only changes when the written file would.
+    """
+    payload = json.dumps([
+        _format_date(item.date_taken),
+        item.location_name,
+        sorted({name.lower() for name in item.people_names or []})
+    ])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(photo_path: Path) -> Optional[str]:
+    """Cheap on-disk identity of a file (size and mtime), None if it can't be read."""
+    try:
+        stat = photo_path.stat()
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _format_date(date_taken: Optional[str]) -> Optional[str]:
+    if not date_taken:
+        return None
+    if len(date_taken) == 10:
+        return date_taken + " 00:00:00"
+    return date_taken
+
+
+def _person_in_image_values(value) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    elif isinstance(value, list):
+        return value
+    return []
+
+
+def _exiftool_write_args(
+    ext: str,
+    date_str: Optional[str],
+    location_name: Optional[str],
+    merged_people: Optional[list[str]]
+) -> list[str]:
+    args = ["-overwrite_original"]
+    if date_str:
+        args.append(f"-DateTimeOriginal={date_str}")
+        if ext in (".jpg", ".jpeg"):
+            args.append(f"-CreateDate={date_str}")
+    if location_name:
+        args.append(f"-XMP:Location={location_name}")
+    for person in merged_people or []:
+        args.append(f"-XMP:PersonInImage={person}")
+    return args
+
+
 def write_photo_metadata(
     photo_path: Path,
     date_taken: Optional[str] = None,
@@ -69,12 +137,7 @@ def write_photo_metadata(
         return False, f"File not found: {photo_path}"
 
     ext = photo_path.suffix.lower()
-
-    date_str = None
-    if date_taken:
-        date_str = date_taken
-        if len(date_str) == 10:
-            date_str += " 00:00:00"
+    date_str = _format_date(date_taken)
 
     try:
         if ext in (".heic", ".heif"):
@@ -98,17 +161,11 @@ def _write_heic_metadata(
     people_names: Optional[list[str]]
 ) -> tuple[bool, Optional[str]]:
     if _HAS_EXIFTOOL:
-        args = ["-overwrite_original"]
-        if date_str:
-            args.append(f"-DateTimeOriginal={date_str}")
-        if location_name:
-            args.append(f"-XMP:Location={location_name}")
+        merged_people = None
         if people_names:
             existing_people = _get_existing_person_in_image(photo_path)
             merged_people = _merge_people_names(existing_people, people_names)
-            if merged_people and len(merged_people) > 0:
-                for person in merged_people:
-                    args.append(f"-XMP:PersonInImage={person}")
+        args = _exiftool_write_args(photo_path.suffix.lower(), date_str, location_name, merged_people)
         args.append(str(photo_path))
         _run_exiftool(args)
         return True, None
@@ -123,18 +180,11 @@ def _write_jpeg_metadata(
     people_names: Optional[list[str]]
 ) -> tuple[bool, Optional[str]]:
     if _HAS_EXIFTOOL:
-        args = ["-overwrite_original"]
-        if date_str:
-            args.append(f"-DateTimeOriginal={date_str}")
-            args.append(f"-CreateDate={date_str}")
-        if location_name:
-            args.append(f"-XMP:Location={location_name}")
+        merged_people = None
         if people_names:
             existing_people = _get_existing_person_in_image(photo_path)
             merged_people = _merge_people_names(existing_people, people_names)
-            if merged_people and len(merged_people) > 0:
-                for person in merged_people:
-                    args.append(f"-XMP:PersonInImage={person}")
+        args = _exiftool_write_args(photo_path.suffix.lower(), date_str, location_name, merged_people)
         args.append(str(photo_path))
         _run_exiftool(args)
         return True, None
@@ -182,4 +232,55 @@ def _write_png_metadata(
             png_info.add_text(f"Person_{index}", person_name)
 
     img.save(photo_path, pnginfo=png_info)
-    return True, None
\ No newline at end of file
+    return True, None
+
+
+def _exiftool_result(stdout: str, stderr: str) -> tuple[bool, Optional[str]]:
+    if "1 image files updated" in stdout or "1 image files unchanged" in stdout:
+        return True, None
+    return False, (stderr.strip() or stdout.strip() or "exiftool did not update the file")
+
+
+def write_photos_metadata_batch(items: list[PhotoMetadata]) -> dict[Path, tuple[bool, Optional[str]]]:
+    """
+    Write metadata for many photos, returning (success, error) per photo path.
+
+    Existing PersonInImage values for the whole batch are read with one exiftool call,
+    then every write goes through this worker's persistent -stay_open exiftool session
+    as its own -execute block. Files exiftool doesn't handle, or every file when
+    exiftool isn't installed, fall back to write_photo_metadata.
+    """
+    results: dict[Path, tuple[bool, Optional[str]]] = {}
+    exiftool_items = []
+    for item in items:
+        if not item.photo_path.exists():
+            results[item.photo_path] = (False, f"File not found: {item.photo_path}")
+        elif _HAS_EXIFTOOL and item.photo_path.suffix.lower() in _EXIFTOOL_EXTENSIONS:
+            exiftool_items.append(item)
+        else:
+            results[item.photo_path] = write_photo_metadata(
+                item.photo_path, item.date_taken, item.location_name, item.people_names
+            )
+
+    if not exiftool_items:
+        return results
+
+    with_people = [item.photo_path for item in exiftool_items if item.people_names]
+    existing = read_exif_batch(with_people, ["XMP:PersonInImage"]) if with_people else {}
+    session = get_exiftool_session()
+
+    for item in exiftool_items:
+        merged_people = None
+        if item.people_names:
+            existing_people = _person_in_image_values((existing or {}).get(str(item.photo_path), {}).get("PersonInImage"))
+            merged_people = _merge_people_names(existing_people, item.people_names)
+        args = _exiftool_write_args(
+            item.photo_path.suffix.lower(), _format_date(item.date_taken), item.location_name, merged_people
+        )
+        args.append(str(item.photo_path))
+        try:
+            results[item.photo_path] = _exiftool_result(*session.execute(args))
+        except Exception as e:
+            logger.warning(f"exiftool session failed on {item.photo_path}: {e}")
+            results[item.photo_path] = (False, f"Tool error: {e}")
+    return results